@@ -10,6 +10,8 @@ from components.data_analysis import render_data_analysis
 from components.visualizations import render_visualizations
 from components.text_analysis import render_text_analysis
 from utils.get_pdf_report import setup_pdf_download_button
+from utils.memory_budget import enforce_memory_budget, MB
+from config import SESSION_MEMORY_BUDGET_MB
 warnings.filterwarnings('ignore')
 
 def main():
@@ -72,8 +74,13 @@ def main():
             </div>
         </div>
         """, unsafe_allow_html=True)
-
     
+    # Spill cold frames once this rerun has created everything it needs
+    resident, mapped = enforce_memory_budget()
+    with st.sidebar:
+        st.caption(f"Session memory: {resident / MB:,.0f} MB of {SESSION_MEMORY_BUDGET_MB:,} MB "
+                   f"(+{mapped / MB:,.0f} MB memory-mapped, not budgeted)")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
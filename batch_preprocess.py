@@ -0,0 +1,75 @@
+"""Apply a fitted preprocessing pipeline exported from the app to new CSV files, chunk by chunk.
+
+Run from the repository root:
+    python batch_preprocess.py preprocessing_pipeline.json input.csv [more.csv ...] --output-dir out
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from config import STREAMING_CHUNK_ROWS
+from utils.data_processor import load_pipeline, parse_numeric_columns, transform_frame
+from utils.row_hash import row_hashes
+
+
+class _SeenRows:
+    """Row hashes already written, so duplicates are dropped across chunk boundaries"""
+
+    def __init__(self):
+        self._seen = np.empty(0, dtype=np.uint64)
+
+    def new_rows(self, chunk):
+        hashes = row_hashes(chunk)
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        if self._seen.size:
+            keep &= ~np.isin(hashes, self._seen)
+        self._seen = np.union1d(self._seen, hashes[keep])
+        return keep
+
+
+def process_file(pipeline, source, target, chunksize=STREAMING_CHUNK_ROWS):
+    """Stream one CSV through the pipeline; returns (rows read, rows written)"""
+    seen = _SeenRows() if pipeline['drop_duplicates'] else None
+    # Chunks infer dtypes on their own rows; categorical columns must stay strings to match
+    # the fitted categories even where a chunk's values all look like numbers
+    header = pd.read_csv(source, nrows=0).columns
+    dtype = {col: str for col in pipeline['string_columns'] if col in header}
+    rows_in = rows_out = 0
+    with open(target, 'w', newline='') as out:
+        for i, chunk in enumerate(pd.read_csv(source, chunksize=chunksize, dtype=dtype)):
+            rows_in += len(chunk)
+            # Parse numeric strings first so duplicates are found on the values the app compared
+            chunk = parse_numeric_columns(chunk, pipeline['parse_numbers'])
+            if seen is not None:
+                chunk = chunk[seen.new_rows(chunk)]
+            chunk = transform_frame(chunk, pipeline)
+            chunk.to_csv(out, header=i == 0, index=False)
+            rows_out += len(chunk)
+    return rows_in, rows_out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('pipeline', help="JSON file from the sidebar's Download Fitted Pipeline button")
+    parser.add_argument('inputs', nargs='+', help="CSV files to transform")
+    parser.add_argument('--output-dir', default='.', help="Where <name>_preprocessed.csv files are written")
+    parser.add_argument('--chunksize', type=int, default=STREAMING_CHUNK_ROWS, help="Rows per chunk")
+    args = parser.parse_args()
+
+    with open(args.pipeline) as f:
+        pipeline = load_pipeline(f.read())
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    for source in args.inputs:
+        name = os.path.splitext(os.path.basename(source))[0]
+        target = os.path.join(args.output_dir, f"{name}_preprocessed.csv")
+        start = time.perf_counter()
+        rows_in, rows_out = process_file(pipeline, source, target, args.chunksize)
+        elapsed = time.perf_counter() - start
+        print(f"{source} -> {target}: {rows_in:,} rows in, {rows_out:,} out "
+              f"in {elapsed:.2f}s ({rows_in / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
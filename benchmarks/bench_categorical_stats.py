@@ -0,0 +1,65 @@
+"""Benchmark the categorical statistics table: per-column value_counts comprehensions vs categorical_summary.
+
+Run from the repository root:
+    python -m benchmarks.bench_categorical_stats --rows 5000000 --cols 100
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from utils.categorical_stats import categorical_summary
+
+
+def legacy_cat_stats(df, columns):
+    """The table as previously built in components/data_analysis.py"""
+    cat_stats = pd.DataFrame(index=columns)
+    cat_stats['unique_values'] = [df[col].nunique() for col in columns]
+    cat_stats['missing'] = df[columns].isnull().sum().values
+    cat_stats['missing_pct'] = (df[columns].isnull().sum() / len(df) * 100).values.round(2)
+    cat_stats['most_common'] = [df[col].value_counts().index[0] if not df[col].value_counts().empty else None for col in columns]
+    cat_stats['most_common_count'] = [df[col].value_counts().values[0] if not df[col].value_counts().empty else None for col in columns]
+    cat_stats['most_common_pct'] = [(df[col].value_counts().values[0] / df[col].count() * 100).round(2) if not df[col].value_counts().empty else None for col in columns]
+    return cat_stats
+
+
+def make_frame(rows, cols, seed=0):
+    """Object columns with cardinalities from 5 to 100k and ~5% missing values"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(cols):
+        cardinality = int(np.geomspace(5, 100000, cols)[i])
+        pool = np.array([f"c{i}_v{j}" for j in range(cardinality)], dtype=object)
+        values = pool[rng.integers(0, cardinality, rows)]
+        values[rng.random(rows) < 0.05] = None
+        data[f"col_{i}"] = values
+    return pd.DataFrame(data)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000000)
+    parser.add_argument('--cols', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"Building {args.rows:,} x {args.cols} synthetic categorical frame...")
+    df = make_frame(args.rows, args.cols)
+    columns = df.columns.tolist()
+
+    legacy, legacy_time = timed(legacy_cat_stats, df, columns)
+    summary, summary_time = timed(categorical_summary, df, columns, args.workers)
+
+    pd.testing.assert_frame_equal(legacy, summary, check_dtype=False)
+    print(f"legacy comprehensions : {legacy_time:8.2f} s")
+    print(f"categorical_summary   : {summary_time:8.2f} s")
+    print(f"speedup               : {legacy_time / summary_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from utils.data_loader import get_profile, get_dataset_key
+from utils.categorical_stats import categorical_summary
+from utils.plot_aggregation import histogram_figure, correlation_heatmap_figure
+from utils.correlation import (CORRELATION_METHODS, correlation_key, correlation_note, get_correlation, get_clusters,
+                               top_pairs)
+from utils.figure_cache import cached_figure
+from utils.column_profile import QUANTILE_SAMPLE_SIZE
+from config import HEATMAP_MAX_COLUMNS
 
 def render_data_analysis():
     """Render the data analysis tab content"""
@@ -16,6 +24,8 @@ def render_data_analysis():
         df_to_analyze = st.session_state.data if data_option == "Original Data" else st.session_state.processed_data
     else:
         df_to_analyze = st.session_state.data
+    profile = get_profile(df_to_analyze)
+    approximate = st.session_state.approximate_mode
         
     # Descriptive Statistics
     st.markdown("<h3 class='subsection-header'>Descriptive Statistics</h3>", unsafe_allow_html=True)
@@ -25,25 +35,28 @@ def render_data_analysis():
     
     with stats_tab1:
         if st.session_state.numerical_features:
-            num_stats = df_to_analyze[st.session_state.numerical_features].describe().T
-            num_stats['range'] = num_stats['max'] - num_stats['min']
-            num_stats['missing'] = df_to_analyze[st.session_state.numerical_features].isnull().sum().values
-            num_stats['missing_pct'] = (df_to_analyze[st.session_state.numerical_features].isnull().sum() / len(df_to_analyze) * 100).values
+            num_stats = profile.numerical_table(st.session_state.numerical_features, approximate)
             num_stats = num_stats.round(2)
             
             st.dataframe(num_stats, use_container_width=True)
+            sampled = [] if approximate else profile.sampled_quantiles(st.session_state.numerical_features)
+            if sampled:
+                st.caption(f"Quartiles of {len(sampled)} column(s) were computed from a uniform sample of "
+                           f"{QUANTILE_SAMPLE_SIZE:,} values per column, because the file was read in chunks.")
         else:
             st.info("No numerical features available for statistics")
     
     with stats_tab2:
         if st.session_state.categorical_features:
-            cat_stats = pd.DataFrame(index=st.session_state.categorical_features)
-            cat_stats['unique_values'] = [df_to_analyze[col].nunique() for col in st.session_state.categorical_features]
-            cat_stats['missing'] = df_to_analyze[st.session_state.categorical_features].isnull().sum().values
-            cat_stats['missing_pct'] = (df_to_analyze[st.session_state.categorical_features].isnull().sum() / len(df_to_analyze) * 100).values.round(2)
-            cat_stats['most_common'] = [df_to_analyze[col].value_counts().index[0] if not df_to_analyze[col].value_counts().empty else None for col in st.session_state.categorical_features]
-            cat_stats['most_common_count'] = [df_to_analyze[col].value_counts().values[0] if not df_to_analyze[col].value_counts().empty else None for col in st.session_state.categorical_features]
-            cat_stats['most_common_pct'] = [(df_to_analyze[col].value_counts().values[0] / df_to_analyze[col].count() * 100).round(2) if not df_to_analyze[col].value_counts().empty else None for col in st.session_state.categorical_features]
+            categorical = st.session_state.categorical_features
+            cat_stats = profile.categorical_table(categorical, approximate=approximate)
+            # The profile is exact for columns whose every value frequency it tracked, and covers
+            # the whole file even when the frame is a sample of it; only columns with too many
+            # values to track are counted again, from a frame that holds every row
+            sampled = df_to_analyze is st.session_state.data and st.session_state.metadata.get('sampled')
+            inexact = [] if approximate or sampled else [col for col in categorical if not profile[col].exact]
+            if inexact:
+                cat_stats.loc[inexact] = categorical_summary(df_to_analyze, inexact)
             
             st.dataframe(cat_stats, use_container_width=True)
         else:
@@ -58,7 +71,7 @@ def render_data_analysis():
         selected_feature = st.selectbox("Select feature for detailed analysis:", all_features)
         
         # Get feature information
-        feature_data = df_to_analyze[selected_feature]
+        feature_profile = profile[selected_feature]
         feature_type = "Numerical" if selected_feature in st.session_state.numerical_features else "Categorical"
         
         # Feature metrics
@@ -71,35 +84,41 @@ def render_data_analysis():
             
         with col2:
             st.markdown("<div class='metric-container'>", unsafe_allow_html=True)
-            st.metric("Unique Values", feature_data.nunique())
+            distinct = feature_profile.distinct_count(approximate)
+            if approximate or not feature_profile.distinct_exact:
+                st.metric("Unique Values", f"≈{distinct:,}",
+                          help="HyperLogLog estimate" if approximate else
+                               "Estimated with HyperLogLog because the file was read in chunks")
+            else:
+                st.metric("Unique Values", distinct)
             st.markdown("</div>", unsafe_allow_html=True)
             
         with col3:
             st.markdown("<div class='metric-container'>", unsafe_allow_html=True)
-            missing_count = feature_data.isnull().sum()
-            missing_pct = (missing_count / len(feature_data) * 100).round(2)
+            missing_count = feature_profile.nulls
+            missing_pct = round(missing_count / feature_profile.total * 100, 2) if feature_profile.total else 0.0
             st.metric("Missing Values", f"{missing_count} ({missing_pct}%)")
             st.markdown("</div>", unsafe_allow_html=True)
             
         with col4:
             st.markdown("<div class='metric-container'>", unsafe_allow_html=True)
             if feature_type == "Numerical":
-                st.metric("Range", f"{feature_data.min()} to {feature_data.max()}")
+                st.metric("Range", f"{feature_profile.min} to {feature_profile.max}")
             else:
-                top_value = feature_data.value_counts().index[0] if not feature_data.value_counts().empty else "N/A"
+                top_values = feature_profile.top(1)
+                top_value = top_values.index[0] if not top_values.empty else "N/A"
                 st.metric("Most Common", top_value)
             st.markdown("</div>", unsafe_allow_html=True)
         
         # Feature visualization
         if feature_type == "Numerical":
-            fig = px.histogram(df_to_analyze, x=selected_feature, marginal="box", 
-                              title=f"Distribution of {selected_feature}",
-                              template="plotly_white")
+            fig = histogram_figure(df_to_analyze[selected_feature], f"Distribution of {selected_feature}",
+                                   selected_feature)
             fig.update_layout(height=400)
             st.plotly_chart(fig, use_container_width=True)
             
         else:  # Categorical
-            value_counts = feature_data.value_counts().sort_values(ascending=False).head(10)
+            value_counts = feature_profile.top(10)
             fig = px.bar(x=value_counts.index, y=value_counts.values, 
                        labels={'x': selected_feature, 'y': 'Count'},
                        title=f"Top 10 values for {selected_feature}",
@@ -113,29 +132,46 @@ def render_data_analysis():
     if len(st.session_state.numerical_features) > 1:
         st.markdown("<h3 class='subsection-header'>Correlation Analysis</h3>", unsafe_allow_html=True)
         
-        corr = df_to_analyze[st.session_state.numerical_features].corr()
+        method = st.selectbox("Correlation method:", CORRELATION_METHODS,
+                              format_func=str.capitalize, key="correlation_method")
+        columns = st.session_state.numerical_features
+        dataset_key = get_dataset_key(df_to_analyze)
+        key = correlation_key(columns, method, dataset_key)
+        corr = get_correlation(df_to_analyze, columns, method, dataset_key)
+        order, labels = get_clusters(corr, key)
         
-        fig = px.imshow(corr, 
-                      labels=dict(color="Correlation"),
-                      x=corr.columns, 
-                      y=corr.columns,
-                      color_continuous_scale="RdBu_r",
-                      title="Correlation Matrix",
-                      template="plotly_white")
+        # Only a clustered, block-averaged view of wide matrices is sent to the browser
+        fig = cached_figure(key + ('heatmap',), lambda: correlation_heatmap_figure(
+            corr, order, "Correlation Matrix (clustered)", HEATMAP_MAX_COLUMNS))
         fig.update_layout(height=500)
         st.plotly_chart(fig, use_container_width=True)
+        note = correlation_note(len(df_to_analyze), method, bool(profile.missing(columns).any()))
+        if note:
+            st.caption(note)
+        
+        if len(columns) > HEATMAP_MAX_COLUMNS:
+            st.caption(f"{len(columns)} columns are averaged into blocks of adjacent columns in clustered order. "
+                       "Drill into a cluster to see its columns individually.")
+            clusters = pd.unique(labels[order])
+            sizes = {cluster: int((labels == cluster).sum()) for cluster in clusters}
+            cluster = st.selectbox(
+                "Drill into cluster:", clusters,
+                format_func=lambda c: f"Cluster {c} ({sizes[c]} columns)",
+                key="correlation_cluster"
+            )
+            members = order[labels[order] == cluster]
+            fig = cached_figure(key + ('heatmap', int(cluster)), lambda: correlation_heatmap_figure(
+                corr, members, f"Cluster {cluster} correlations", HEATMAP_MAX_COLUMNS))
+            fig.update_layout(height=500)
+            st.plotly_chart(fig, use_container_width=True)
         
         # Top correlations
-        corr_pairs = []
-        for i in range(len(corr.columns)):
-            for j in range(i+1, len(corr.columns)):
-                corr_pairs.append((corr.columns[i], corr.columns[j], corr.iloc[i, j]))
-        corr_pairs = sorted(corr_pairs, key=lambda x: abs(x[2]), reverse=True)
+        corr_pairs = top_pairs(corr, k=5)
         
         st.markdown("<div class='metric-container'>", unsafe_allow_html=True)
         st.markdown("**Top 5 Feature Correlations:**")
         
-        for i, (feat1, feat2, corr_val) in enumerate(corr_pairs[:5]):
+        for i, (feat1, feat2, corr_val) in enumerate(corr_pairs):
             sign = "positive" if corr_val > 0 else "negative"
             st.write(f"{i+1}. **{feat1}** and **{feat2}**: {corr_val:.3f} ({sign})")
         
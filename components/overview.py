@@ -1,4 +1,5 @@
 import streamlit as st
+import pandas as pd
 
 def render_overview():
     """Render the overview tab content"""
@@ -8,6 +9,9 @@ def render_overview():
     st.markdown("<h3 class='subsection-header'>Data Preview</h3>", unsafe_allow_html=True)
     df_to_display = st.session_state.processed_data if st.session_state.processed_data is not None else st.session_state.data
     st.dataframe(df_to_display.head(10), use_container_width=True)
+    if st.session_state.metadata.get('sampled'):
+        st.caption(f"Streaming ingest: tabs work on a random sample of "
+                   f"{st.session_state.metadata['sample_rows']:,} rows; metadata covers the full file.")
     
     # Metadata
     st.markdown("<h3 class='subsection-header'>Dataset Metadata</h3>", unsafe_allow_html=True)
@@ -33,7 +37,14 @@ def render_overview():
         
     with col3:
         st.markdown("<div class='metric-container'>", unsafe_allow_html=True)
-        st.metric(label="Memory Usage", value=f"{st.session_state.metadata['memory_usage']:.2f} MB")
+        memory_before = st.session_state.metadata['memory_usage']
+        memory_after = st.session_state.metadata.get('memory_usage_optimized')
+        if memory_after is None:
+            st.metric(label="Memory Usage", value=f"{memory_before:.2f} MB")
+        else:
+            st.metric(label="Memory Usage", value=f"{memory_after:.2f} MB",
+                      delta=f"{memory_after - memory_before:.2f} MB vs {memory_before:.2f} MB as loaded",
+                      delta_color="inverse")
         st.markdown("</div>", unsafe_allow_html=True)
         
         st.markdown("<div class='metric-container'>", unsafe_allow_html=True)
@@ -54,10 +65,14 @@ def render_overview():
         
     with col2:
         st.markdown("<div class='metric-container'>", unsafe_allow_html=True)
-        st.metric(label="Duplicate Rows", value=f"{st.session_state.metadata['duplicates']:,}")
-        duplicate_percentage = (st.session_state.metadata['duplicates'] / st.session_state.metadata['rows']) * 100
-        st.progress(min(duplicate_percentage / 100, 1.0))
-        st.caption(f"{duplicate_percentage:.2f}% of total rows")
+        if st.session_state.metadata['duplicates'] is None:
+            st.metric(label="Duplicate Rows", value="N/A")
+            st.caption("Not counted for memory-mapped Parquet/Feather uploads")
+        else:
+            st.metric(label="Duplicate Rows", value=f"{st.session_state.metadata['duplicates']:,}")
+            duplicate_percentage = (st.session_state.metadata['duplicates'] / st.session_state.metadata['rows']) * 100
+            st.progress(min(duplicate_percentage / 100, 1.0))
+            st.caption(f"{duplicate_percentage:.2f}% of total rows")
         st.markdown("</div>", unsafe_allow_html=True)
     
     # Feature lists
@@ -92,4 +107,15 @@ def render_overview():
                 st.write(f"• {feat}")
         else:
             st.write("No text features detected")
-        st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    # Inferred column types with the confidence of each decision
+    inferred_types = st.session_state.metadata.get('inferred_types')
+    if inferred_types:
+        with st.expander("Inferred column types"):
+            types_df = pd.DataFrame.from_dict(inferred_types, orient='index')
+            types_df.index.name = 'column'
+            st.dataframe(types_df, use_container_width=True)
+            excluded = types_df.index[types_df['kind'].isin(['datetime', 'id'])].tolist()
+            if excluded:
+                st.caption("Datetime and ID-like columns are left out of the analysis tabs: " + ", ".join(map(str, excluded)))
@@ -1,6 +1,7 @@
 import streamlit as st
 from utils.data_loader import load_data, download_dependencies
-from utils.data_processor import preprocess_data
+from utils.data_processor import preprocess_data, dump_pipeline, export_frame, OPERATORS
+from utils.cache import content_fingerprint
 
 def render_sidebar():
     """Render the sidebar with data loading and preprocessing options"""
@@ -8,7 +9,22 @@ def render_sidebar():
         st.markdown("<h2 style='text-align: center; color: #1E40AF;margin-top:-3rem;'>Controls</h2>", unsafe_allow_html=True)
         download_dependencies()
         # File uploader
-        uploaded_file = st.file_uploader("Upload your dataset (CSV, Excel)", type=['csv', 'xlsx'])
+        uploaded_file = st.file_uploader("Upload your dataset (CSV, Excel, Parquet, Feather)",
+                                         type=['csv', 'xlsx', 'parquet', 'feather', 'arrow'])
+        st.checkbox(
+            "Streaming ingest (bounded memory)",
+            key="streaming_ingest",
+            help="Read CSV files in chunks and keep a random sample of rows for analysis. "
+                 "Large files switch to this mode automatically."
+        )
+        st.checkbox(
+            "Approximate mode (sketches)",
+            key="approximate_mode",
+            help="Answer distinct counts, quantiles and median imputation from HyperLogLog and KLL "
+                 "sketches built at ingest instead of scanning columns. When off, files loaded in "
+                 "full get exact statistics; files read in chunks still show sampled quartiles and "
+                 "estimated distinct counts, marked as such."
+        )
         
         if uploaded_file is not None:
             # Load data
@@ -38,28 +54,74 @@ def render_sidebar():
                 ["Remove duplicates", "Keep duplicates"],
                 key="dup_strategy"
             )
+            verify_duplicates = st.checkbox(
+                "Verify duplicates exactly",
+                key="verify_duplicates",
+                help="Rows are matched by a 64-bit hash; this also compares rows sharing a hash value by value."
+            )
+            
+            # Scaling, encoding and outlier operators
+            st.subheader("Transform Features")
+            operators = st.multiselect(
+                "Operators (applied in the order selected):",
+                list(OPERATORS),
+                key="operators",
+                help="Numerical operators run on numerical features, encoders on categorical features. "
+                     "One-hot encoding adds indicator columns after the original column, so it must be "
+                     "the last categorical operator selected. The tabs keep the original column; the "
+                     "downloaded data and batch output contain only the indicators."
+            )
             
             # Preprocessing button
             if st.button("Preprocess Data"):
                 with st.spinner("Preprocessing data..."):
-                    processed_data = preprocess_data(
+                    processed_data, pipeline, timings = preprocess_data(
                         st.session_state.data,
                         numerical_strategy,
                         categorical_strategy,
-                        duplicate_strategy
+                        duplicate_strategy,
+                        verify_duplicates,
+                        operators,
+                        st.session_state.approximate_mode
                     )
                     
                     if processed_data is not None:
                         st.session_state.processed_data = processed_data
+                        st.session_state.processed_profile = None
+                        st.session_state.pipeline = pipeline
+                        # Preprocessing is deterministic, so source data and options identify the result
+                        st.session_state.preprocessing_options = {
+                            'num_strategy': numerical_strategy,
+                            'cat_strategy': categorical_strategy,
+                            'dup_strategy': duplicate_strategy,
+                            'verify_duplicates': verify_duplicates,
+                            'operators': list(operators),
+                            'approximate': st.session_state.approximate_mode
+                        }
+                        st.session_state.processed_fingerprint = content_fingerprint(
+                            st.session_state.data_fingerprint.encode('utf-8'),
+                            **st.session_state.preprocessing_options
+                        )
                         st.success("Preprocessing completed!")
+                        if timings:
+                            st.caption(" · ".join(f"{step}: {seconds * 1000:.0f} ms" for step, seconds in timings))
                         
         # Download preprocessed Data
         if st.session_state.processed_data is not None:
             processed_data = st.session_state.processed_data
+            if st.session_state.pipeline is not None:
+                processed_data = export_frame(processed_data, st.session_state.pipeline)
             if st.download_button("Download Preprocessed Data",
                                     data=processed_data.to_csv(index=False), 
                                     file_name="preprocessed_data.csv"):
                 st.success("Download started!")
+            if st.session_state.pipeline is not None:
+                st.download_button("Download Fitted Pipeline",
+                                   data=dump_pipeline(st.session_state.pipeline),
+                                   file_name="preprocessing_pipeline.json",
+                                   mime="application/json",
+                                   help="Apply the same fills and operators to new files with: "
+                                        "python batch_preprocess.py preprocessing_pipeline.json new_data.csv")
                 
             
        
\ No newline at end of file
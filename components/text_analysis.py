@@ -1,14 +1,15 @@
 import streamlit as st
-import re
+import time
 import matplotlib.pyplot as plt
 import seaborn as sns
-import nltk
 import pandas as pd
 import plotly.express as px
 from wordcloud import WordCloud
-from textblob import TextBlob
-from nltk.util import ngrams
-from collections import Counter
+from utils.cache import content_fingerprint
+from utils.sentiment import iter_sentiment, sentiment_frame
+from utils.ngrams import top_ngrams
+from utils.token_index import get_token_index
+from utils.plot_aggregation import histogram_figure
 
 def render_text_analysis():
     st.markdown("<h2 class='section-header'>Text Data Analysis</h2>", unsafe_allow_html=True)
@@ -33,6 +34,15 @@ def render_text_analysis():
         if selected_text_col != "None":
             # Only run text analysis on selected column
             text_data = df_for_text[selected_text_col].dropna().astype(str)
+            # Content key for results cached across reruns
+            row_hashes = pd.util.hash_pandas_object(text_data, index=False).to_numpy()
+            column_key = (selected_text_col, content_fingerprint(row_hashes.tobytes()))
+            
+            # Tokenize the column once; every text view below reads this index
+            with st.spinner("Tokenizing text..."):
+                token_index = get_token_index(text_data, column_key)
+            from nltk.corpus import stopwords
+            stop_words = set(stopwords.words('english'))
             
             st.markdown("<div class='text-analysis-container'>", unsafe_allow_html=True)
             
@@ -44,7 +54,7 @@ def render_text_analysis():
                 
                 # Calculate text statistics
                 text_length = text_data.str.len()
-                word_count = text_data.str.split().str.len()
+                word_count = token_index.row_lengths()
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -55,21 +65,13 @@ def render_text_analysis():
                     st.metric("Avg. Words", f"{word_count.mean():.1f}")
                 
                 # Text length distribution
-                fig = px.histogram(
-                    x=text_length, 
-                    labels={'x': 'Text Length (characters)', 'y': 'Count'},
-                    title="Distribution of Text Length",
-                    template="plotly_white"
-                )
+                fig = histogram_figure(text_length, "Distribution of Text Length",
+                                       'Text Length (characters)', marginal_box=False)
                 st.plotly_chart(fig, use_container_width=True)
                 
                 # Word count distribution
-                fig = px.histogram(
-                    x=word_count, 
-                    labels={'x': 'Word Count', 'y': 'Count'},
-                    title="Distribution of Word Count",
-                    template="plotly_white"
-                )
+                fig = histogram_figure(word_count, "Distribution of Word Count", 'Word Count',
+                                       marginal_box=False)
                 st.plotly_chart(fig, use_container_width=True)
             
             with text_tabs[1]:  # Word Cloud
@@ -77,24 +79,17 @@ def render_text_analysis():
                 
                 # Progress indicator for word cloud generation
                 with st.spinner("Generating word cloud..."):
-                    # Combine all text
-                    all_text = ' '.join(text_data)
-                    
-                    # Get stop words
-                    from nltk.corpus import stopwords
-                    stop_words = set(stopwords.words('english'))
-                    
                     # Word cloud customization
                     max_words = st.slider("Maximum number of words:", 50, 300, 100)
                     
-                    # Generate word cloud
+                    # Generate word cloud from the token index frequencies
+                    word_mask = token_index.vocab_mask(stop_words, min_len=2)
                     wc = WordCloud(
                         width=800, 
                         height=400, 
                         background_color='white',
-                        max_words=max_words,
-                        stopwords=stop_words
-                    ).generate(all_text)
+                        max_words=max_words
+                    ).generate_from_frequencies(token_index.word_frequencies(word_mask))
                     
                     # Display word cloud
                     plt.figure(figsize=(10, 5))
@@ -104,9 +99,8 @@ def render_text_analysis():
                     st.pyplot(plt)
                     
                     # Top words table
-                    words = re.findall(r'\b[a-zA-Z]{3,15}\b', all_text.lower())
-                    word_freq = Counter(word for word in words if word not in stop_words)
-                    top_words = pd.DataFrame(word_freq.most_common(20), columns=['Word', 'Frequency'])
+                    top_word_mask = token_index.vocab_mask(stop_words, min_len=3, max_len=15)
+                    top_words = pd.DataFrame(token_index.top_words(20, top_word_mask), columns=['Word', 'Frequency'])
                     
                     st.markdown("<h4>Top 20 Words</h4>", unsafe_allow_html=True)
                     st.dataframe(top_words, use_container_width=True)
@@ -118,21 +112,11 @@ def render_text_analysis():
                 n_value = st.radio("Select N-gram size:", [2, 3], horizontal=True)
                 
                 with st.spinner(f"Generating {n_value}-grams..."):
-                    # Combine all text and tokenize
-                    all_text = ' '.join(text_data)
-                    tokens = nltk.word_tokenize(all_text.lower())
-                    
-                    # Remove stop words and punctuation
-                    from nltk.corpus import stopwords
-                    stop_words = set(stopwords.words('english'))
-                    filtered_tokens = [token for token in tokens if token.isalpha() and token not in stop_words]
-                    
-                    # Generate n-grams
-                    n_grams = list(ngrams(filtered_tokens, n_value))
-                    n_gram_freq = Counter(n_grams)
+                    # Count n-grams from the token index in parallel row shards (cached)
+                    n_gram_freq = top_ngrams(token_index, n_value, stop_words, k=20, cache_key=column_key)
                     
                     # Convert to DataFrame
-                    top_n_grams = pd.DataFrame(n_gram_freq.most_common(20), 
+                    top_n_grams = pd.DataFrame(n_gram_freq, 
                                                 columns=['N-gram', 'Frequency'])
                     top_n_grams['N-gram'] = top_n_grams['N-gram'].apply(lambda x: ' '.join(x))
                     
@@ -154,18 +138,30 @@ def render_text_analysis():
             with text_tabs[3]:  # Sentiment
                 st.markdown("<h3 class='subsection-header'>Sentiment Analysis</h3>", unsafe_allow_html=True)
                 
-                with st.spinner("Analyzing sentiment..."):
-                    # Process all rows instead of sampling
-                    sentiments = []
-                    for text in text_data:
-                        analysis = TextBlob(text)
-                        sentiments.append({
-                            'text': text[:100] + '...' if len(text) > 100 else text,
-                            'polarity': analysis.sentiment.polarity,
-                            'subjectivity': analysis.sentiment.subjectivity
-                        })
-                    
-                    sentiment_df = pd.DataFrame(sentiments)
+                # Results are kept per column content so reruns from other widgets are instant
+                if 'sentiment_results' not in st.session_state:
+                    st.session_state.sentiment_results = {}
+                sentiment_key = column_key
+                
+                if sentiment_key not in st.session_state.sentiment_results:
+                    progress = st.progress(0.0, text="Analyzing sentiment...")
+                    partial_view = st.empty()
+                    last_refresh = 0.0
+                    for scored, total, scores in iter_sentiment(text_data):
+                        progress.progress(scored / total if total else 1.0,
+                                          text=f"Scored {scored:,} of {total:,} unique texts")
+                        # Show partial results, refreshing at most once per second
+                        if time.monotonic() - last_refresh > 1.0 and scored < total:
+                            partial_view.dataframe(sentiment_frame(text_data.head(1000), scores),
+                                                   use_container_width=True, height=300)
+                            last_refresh = time.monotonic()
+                    progress.empty()
+                    partial_view.empty()
+                    # Keep only the latest column's results to bound session memory
+                    st.session_state.sentiment_results = {sentiment_key: sentiment_frame(text_data, scores)}
+                
+                with st.spinner("Preparing sentiment results..."):
+                    sentiment_df = st.session_state.sentiment_results[sentiment_key].copy()
                     
                     # Add sentiment categories
                     def categorize_sentiment(polarity):
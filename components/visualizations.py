@@ -1,6 +1,50 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from utils.data_loader import get_profile, get_dataset_key
+from utils.figure_cache import cached_figure
+from utils.density import BANDWIDTH_RULES
+from utils.plot_aggregation import (histogram_figure, box_figure, grouped_box_figure,
+                                    density_scatter_figure, density_violin_figure)
+from config import DENSITY_RENDER_THRESHOLD, CHARTS_PER_PAGE
+
+def render_chart_grid(features, chart_type, dataset_key, build, variant=None):
+    """Render one page of per-feature charts in two columns, building only the visible ones"""
+    pages = max(1, -(-len(features) // CHARTS_PER_PAGE))
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (1-{pages})", min_value=1, max_value=pages, value=1,
+                               key=f"{chart_type}_page")
+        start = (page - 1) * CHARTS_PER_PAGE
+        st.caption(f"Showing charts {start + 1}-{min(start + CHARTS_PER_PAGE, len(features))} of {len(features)}")
+    visible = features[(page - 1) * CHARTS_PER_PAGE:page * CHARTS_PER_PAGE]
+    
+    cols = st.columns(2)
+    for i, col_name in enumerate(visible):
+        with cols[i % 2]:
+            fig = cached_figure(dataset_key + (col_name, chart_type, variant), lambda: build(col_name))
+            st.plotly_chart(fig, use_container_width=True)
+
+def build_bar_chart(profile, col_name):
+    value_counts = profile.value_counts(col_name, 10)
+    return px.bar(x=value_counts.index, y=value_counts.values, 
+                  labels={'x': col_name, 'y': 'Count'},
+                  title=f"Top 10 values for {col_name}",
+                  template="plotly_white")
+
+def build_pie_chart(profile, col_name, approximate=False):
+    value_counts = profile.value_counts(col_name, 8)
+    
+    # If we have too many categories, show top 7 and group the rest
+    if profile[col_name].distinct_count(approximate) > 8:
+        others_count = profile[col_name].count - value_counts.sum()
+        value_counts = pd.concat([value_counts, pd.Series([others_count], index=["Others"])])
+    
+    fig = px.pie(values=value_counts.values, names=value_counts.index,
+                 title=f"Distribution of {col_name}",
+                 template="plotly_white")
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return fig
 
 def render_visualizations():
     """Render the visualizations tab content"""
@@ -17,6 +61,8 @@ def render_visualizations():
             df_to_visualize = st.session_state.data if data_option == "Original Data" else st.session_state.processed_data
     else:
         df_to_visualize = st.session_state.data
+    profile = get_profile(df_to_visualize)
+    dataset_key = get_dataset_key(df_to_visualize)
     
     # Numerical Visualizations
     if st.session_state.numerical_features:
@@ -26,22 +72,25 @@ def render_visualizations():
         viz_num_selection = st.selectbox("Select visualization type:", viz_num_options, key="num_viz_type")
         
         if viz_num_selection == "Distribution Plots":
-            cols = st.columns(2)
-            for i, col_name in enumerate(st.session_state.numerical_features):
-                with cols[i % 2]:
-                    fig = px.histogram(df_to_visualize, x=col_name, marginal="box", 
-                                        title=f"Distribution of {col_name}",
-                                        template="plotly_white")
-                    st.plotly_chart(fig, use_container_width=True)
+            kde_col1, kde_col2 = st.columns(2)
+            with kde_col1:
+                show_kde = st.checkbox("Overlay density (KDE)", key="dist_kde")
+            kde_bandwidth = None
+            if show_kde:
+                with kde_col2:
+                    kde_bandwidth = st.selectbox("Bandwidth rule:", BANDWIDTH_RULES, key="dist_kde_bw")
+            render_chart_grid(
+                st.session_state.numerical_features, "distribution", dataset_key,
+                lambda col_name: histogram_figure(df_to_visualize[col_name], f"Distribution of {col_name}", col_name,
+                                                  kde_bandwidth=kde_bandwidth),
+                variant=kde_bandwidth
+            )
         
         elif viz_num_selection == "Box Plots":
-            cols = st.columns(2)
-            for i, col_name in enumerate(st.session_state.numerical_features):
-                with cols[i % 2]:
-                    fig = px.box(df_to_visualize, y=col_name, 
-                                title=f"Box Plot of {col_name}",
-                                template="plotly_white")
-                    st.plotly_chart(fig, use_container_width=True)
+            render_chart_grid(
+                st.session_state.numerical_features, "box", dataset_key,
+                lambda col_name: box_figure(df_to_visualize[col_name], f"Box Plot of {col_name}", col_name)
+            )
         
         elif viz_num_selection == "Scatter Plots":
             if len(st.session_state.numerical_features) >= 2:
@@ -58,9 +107,16 @@ def render_visualizations():
                     if color_selection != "None":
                         color_by = color_selection
                 
-                fig = px.scatter(df_to_visualize, x=x_feature, y=y_feature, color=color_by,
-                                title=f"Scatter Plot: {x_feature} vs {y_feature}",
-                                template="plotly_white")
+                if len(df_to_visualize) > DENSITY_RENDER_THRESHOLD:
+                    # Too many points for the browser: send a server-side density image
+                    st.caption(f"Showing point density for {len(df_to_visualize):,} rows "
+                               f"(rasterized above {DENSITY_RENDER_THRESHOLD:,} rows)")
+                    fig = density_scatter_figure(df_to_visualize, x_feature, y_feature, color_by,
+                                                 f"Scatter Plot: {x_feature} vs {y_feature}")
+                else:
+                    fig = px.scatter(df_to_visualize, x=x_feature, y=y_feature, color=color_by,
+                                    title=f"Scatter Plot: {x_feature} vs {y_feature}",
+                                    template="plotly_white")
                 st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info("Need at least 2 numerical features for scatter plots")
@@ -75,32 +131,15 @@ def render_visualizations():
         viz_cat_selection = st.selectbox("Select visualization type:", viz_cat_options, key="cat_viz_type")
         
         if viz_cat_selection == "Bar Charts":
-            cols = st.columns(2)
-            for i, col_name in enumerate(st.session_state.categorical_features):
-                with cols[i % 2]:
-                    value_counts = df_to_visualize[col_name].value_counts().head(10)
-                    fig = px.bar(x=value_counts.index, y=value_counts.values, 
-                                labels={'x': col_name, 'y': 'Count'},
-                                title=f"Top 10 values for {col_name}",
-                                template="plotly_white")
-                    st.plotly_chart(fig, use_container_width=True)
+            render_chart_grid(st.session_state.categorical_features, "bar", dataset_key,
+                              lambda col_name: build_bar_chart(profile, col_name))
         
         elif viz_cat_selection == "Pie Charts":
-            cols = st.columns(2)
-            for i, col_name in enumerate(st.session_state.categorical_features):
-                with cols[i % 2]:
-                    value_counts = df_to_visualize[col_name].value_counts().head(8)
-                    
-                    # If we have too many categories, show top 7 and group the rest
-                    if df_to_visualize[col_name].nunique() > 8:
-                        others_count = df_to_visualize[col_name].value_counts().iloc[8:].sum()
-                        value_counts = pd.concat([value_counts, pd.Series([others_count], index=["Others"])])
-                    
-                    fig = px.pie(values=value_counts.values, names=value_counts.index,
-                                title=f"Distribution of {col_name}",
-                                template="plotly_white")
-                    fig.update_traces(textposition='inside', textinfo='percent+label')
-                    st.plotly_chart(fig, use_container_width=True)
+            # The Others slice depends on the distinct count, so the mode is part of the figure key
+            approximate = st.session_state.approximate_mode
+            render_chart_grid(st.session_state.categorical_features, "pie", dataset_key,
+                              lambda col_name: build_pie_chart(profile, col_name, approximate),
+                              variant=('approximate', approximate))
         
         elif viz_cat_selection == "Count Plots by Category":
             if len(st.session_state.categorical_features) >= 2:
@@ -110,7 +149,7 @@ def render_visualizations():
                                             key="count_color")
                 
                 # Limit to top categories for readability
-                top_x_cats = df_to_visualize[x_feature].value_counts().head(8).index
+                top_x_cats = profile.value_counts(x_feature, 8).index
                 filtered_df = df_to_visualize[df_to_visualize[x_feature].isin(top_x_cats)]
                 
                 fig = px.histogram(filtered_df, x=x_feature, color=color_feature,
@@ -130,27 +169,32 @@ def render_visualizations():
         cat_feature = st.selectbox("Select categorical feature:", st.session_state.categorical_features, key="relation_cat")
         
         # Limit to top categories for readability
-        top_cats = df_to_visualize[cat_feature].value_counts().head(10).index
+        top_cats = profile.value_counts(cat_feature, 10).index
         filtered_df = df_to_visualize[df_to_visualize[cat_feature].isin(top_cats)]
         
         viz_relation_options = ["Box Plot", "Violin Plot", "Bar Plot (Mean)"]
         viz_relation_selection = st.selectbox("Select visualization type:", viz_relation_options, key="relation_viz_type")
         
         if viz_relation_selection == "Box Plot":
-            fig = px.box(filtered_df, x=cat_feature, y=num_feature, 
-                        title=f"{num_feature} by {cat_feature}",
-                        template="plotly_white")
+            fig = grouped_box_figure(filtered_df, cat_feature, num_feature, top_cats,
+                                     f"{num_feature} by {cat_feature}")
             st.plotly_chart(fig, use_container_width=True)
         
         elif viz_relation_selection == "Violin Plot":
-            fig = px.violin(filtered_df, x=cat_feature, y=num_feature, 
-                            box=True, points="all",
-                            title=f"{num_feature} by {cat_feature}",
-                            template="plotly_white")
+            if len(filtered_df) > DENSITY_RENDER_THRESHOLD:
+                st.caption(f"Showing binned densities for {len(filtered_df):,} rows "
+                           f"(individual points hidden above {DENSITY_RENDER_THRESHOLD:,} rows)")
+                fig = density_violin_figure(filtered_df, cat_feature, num_feature, top_cats,
+                                            f"{num_feature} by {cat_feature}")
+            else:
+                fig = px.violin(filtered_df, x=cat_feature, y=num_feature, 
+                                box=True, points="all",
+                                title=f"{num_feature} by {cat_feature}",
+                                template="plotly_white")
             st.plotly_chart(fig, use_container_width=True)
         
         elif viz_relation_selection == "Bar Plot (Mean)":
-            mean_by_cat = filtered_df.groupby(cat_feature)[num_feature].mean().sort_values(ascending=False)
+            mean_by_cat = filtered_df.groupby(cat_feature, observed=True)[num_feature].mean().sort_values(ascending=False)
             fig = px.bar(x=mean_by_cat.index, y=mean_by_cat.values,
                         labels={'x': cat_feature, 'y': f'Mean {num_feature}'},
                         title=f"Mean {num_feature} by {cat_feature}",
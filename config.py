@@ -1,3 +1,5 @@
+import os
+import tempfile
 import streamlit as st
 
 def setup_page_config():
@@ -10,4 +12,89 @@ def setup_page_config():
     )
 
 # Dependency for NLTK Resources
-REQUIRED_NLTK_RESOURCES = ['punkt', 'stopwords'] 
\ No newline at end of file
+REQUIRED_NLTK_RESOURCES = ['punkt', 'stopwords'] 
+# Number of parsed uploads kept in the shared ingest cache (LRU, across sessions)
+INGEST_CACHE_MAX_ENTRIES = 4
+
+# Streaming CSV ingest: files above this size (or with the sidebar toggle on) are
+# read in chunks, keeping only a uniform reservoir sample of rows in memory
+STREAMING_THRESHOLD_MB = 500
+STREAMING_CHUNK_ROWS = 100000
+STREAMING_SAMPLE_ROWS = 200000
+
+# On-disk caches shared by all sessions (sentiment scores, converted uploads, reports)
+CACHE_DIR = os.environ.get('EDA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'eda_cache'))
+
+# Sentiment scoring: texts per process-pool task and number of worker processes
+SENTIMENT_BATCH_SIZE = 2000
+SENTIMENT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# N-gram counting: rows per parallel shard, heavy-hitter counter size,
+# worker threads and number of cached (column, n, stop words) results
+NGRAM_SHARD_ROWS = 20000
+NGRAM_COUNTER_CAPACITY = 5000
+NGRAM_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+NGRAM_CACHE_MAX_ENTRIES = 16
+
+# Token indexes of text columns kept in memory (LRU, across sessions)
+TOKEN_INDEX_CACHE_MAX_ENTRIES = 4
+
+# Scatter and violin plots with more rows than this are rasterized server-side
+# into a DENSITY_GRID_SIZE x DENSITY_GRID_SIZE density grid
+DENSITY_RENDER_THRESHOLD = 200000
+DENSITY_GRID_SIZE = 300
+
+# Visualizations tab: charts built per page and figures kept in the shared cache
+CHARTS_PER_PAGE = 6
+FIGURE_CACHE_MAX_ENTRIES = 256
+
+# Worker processes rendering PDF report charts
+REPORT_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+# Generated PDF reports kept per dataset fingerprint and processing state (LRU).
+# Set EDA_REPORT_STORE_PERSIST=0 to keep them in memory only.
+REPORT_STORE_MAX_ENTRIES = 16
+REPORT_STORE_DIR = (os.path.join(CACHE_DIR, 'reports')
+                    if os.environ.get('EDA_REPORT_STORE_PERSIST', '1') != '0' else None)
+
+# Rows sampled per string column of a Parquet/Feather upload to tell categorical from text
+COLUMNAR_CLASSIFY_ROWS = 10000
+
+# Parsed uploads are spilled here as uncompressed Arrow IPC files. Parquet/Feather uploads
+# are analysed straight from the memory-mapped file (with Arrow-backed dtypes); CSV and
+# Excel uploads keep their pandas dtypes and are read back from the file, instead of
+# parsed, when the same content is uploaded again. Least recently used files are evicted
+# once the directory exceeds EDA_SPILL_CACHE_MAX_MB.
+SPILL_CACHE_DIR = os.path.join(CACHE_DIR, 'uploads')
+SPILL_CACHE_MAX_MB = int(os.environ.get('EDA_SPILL_CACHE_MAX_MB', '2048'))
+
+# Feature-type inference: rows in the stratified sample each column is judged on, and the
+# confidence below which a sample-based decision is re-checked against the full column
+INFERENCE_SAMPLE_ROWS = 10000
+INFERENCE_MIN_CONFIDENCE = 0.95
+
+# Correlation matrices: columns per BLAS block, matrices cached per dataset (LRU),
+# and rows sampled for Kendall's tau, which compares every pair of rows (2,000 rows give
+# a standard error of about 0.015)
+CORRELATION_BLOCK_COLUMNS = 256
+CORRELATION_CACHE_MAX_ENTRIES = 8
+KENDALL_SAMPLE_ROWS = 2000
+
+# Correlation heatmap: cells drawn per axis (larger matrices are averaged into blocks in
+# clustered order) and clusters offered for drill-down
+HEATMAP_MAX_COLUMNS = 60
+CORRELATION_MAX_CLUSTERS = 20
+
+# Memory budgets for frames, arrays and bytes held in memory. Over budget, a session
+# spills its cold frames (the original once a processed copy exists, then the processed
+# copy) to memory-mapped Arrow files: the original is mapped from its converted upload in
+# SPILL_CACHE_DIR, processed copies are written under CACHE_DIR/sessions. The session budget covers
+# its session state; the global budget covers every session of this server process plus
+# the shared ingest cache and report store, counting shared objects once. Memory-mapped
+# frames are file-backed page cache and are reported but not budgeted. Sessions idle for
+# longer than SESSION_IDLE_SECONDS no longer count towards the global budget.
+SESSION_MEMORY_BUDGET_MB = int(os.environ.get('EDA_SESSION_MEMORY_MB', '1024'))
+GLOBAL_MEMORY_BUDGET_MB = int(os.environ.get('EDA_GLOBAL_MEMORY_MB', '8192'))
+SESSION_SPILL_DIR = os.path.join(CACHE_DIR, 'sessions')
+SESSION_SPILL_MAX_MB = int(os.environ.get('EDA_SESSION_SPILL_MAX_MB', '4096'))
+SESSION_IDLE_SECONDS = 3600
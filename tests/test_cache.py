@@ -0,0 +1,20 @@
+from utils.cache import LRUCache, content_fingerprint
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache and len(cache) == 2
+    assert cache.values() == [1, 3]
+    assert cache.pop('a') == 1 and cache.get('a', 'missing') == 'missing'
+
+
+def test_fingerprint_covers_content_and_options():
+    content = b'a,b\n1,2\n'
+    assert content_fingerprint(content, sep=',') == content_fingerprint(bytearray(content), sep=',')
+    assert content_fingerprint(content, sep=',', header=0) == content_fingerprint(content, header=0, sep=',')
+    assert content_fingerprint(content, sep=',') != content_fingerprint(content, sep=';')
+    assert content_fingerprint(content) != content_fingerprint(content + b'3,4\n')
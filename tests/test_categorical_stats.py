@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from utils.categorical_stats import categorical_summary
+
+
+def test_categorical_summary_matches_value_counts():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'city': rng.choice(['Pune', 'Goa', 'Agra', None], 1000, p=[0.5, 0.2, 0.2, 0.1]),
+        'grade': pd.Categorical(rng.choice(['A', 'B'], 1000), categories=['A', 'B', 'C']),
+        'empty': [None] * 1000,
+    })
+    summary = categorical_summary(df, df.columns, max_workers=2)
+    for col in df.columns:
+        counts = df[col].value_counts()
+        counts = counts[counts > 0]
+        row = summary.loc[col]
+        assert row['unique_values'] == df[col].nunique()
+        assert row['missing'] == df[col].isna().sum()
+        if len(counts):
+            assert row['most_common'] == counts.index[0] and row['most_common_count'] == counts.iloc[0]
+    assert summary.loc['empty', 'most_common'] is None
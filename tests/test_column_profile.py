@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from utils.column_profile import QUANTILE_SAMPLE_SIZE, profile_frame
+
+
+def _frame(rows):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'skewed': rng.lognormal(0, 1, rows),
+        'counts': rng.integers(0, 1000, rows),
+        'city': rng.choice(['Pune', 'Delhi', 'Goa', None], rows),
+    })
+
+
+def test_quartiles_are_exact_above_sample_size():
+    df = _frame(QUANTILE_SAMPLE_SIZE * 3)
+    table = profile_frame(df).numerical_table(['skewed', 'counts'])
+    expected = df[['skewed', 'counts']].describe().T
+    for stat in ('25%', '50%', '75%', 'mean', 'std', 'min', 'max'):
+        np.testing.assert_allclose(table[stat], expected[stat], rtol=1e-12)
+
+
+def test_merged_profiles_report_sampled_quartiles():
+    df = _frame(QUANTILE_SAMPLE_SIZE * 2)
+    half = len(df) // 2
+    merged = profile_frame(df.iloc[:half]).merge(profile_frame(df.iloc[half:]))
+    assert merged.sampled_quantiles(['skewed', 'counts']) == ['skewed', 'counts']
+    assert profile_frame(df).sampled_quantiles(['skewed', 'counts']) == []
+
+
+def test_exact_mode_distinct_counts():
+    df = _frame(QUANTILE_SAMPLE_SIZE * 2)
+    profile = profile_frame(df)
+    for col in df.columns:
+        assert profile[col].distinct_count() == df[col].nunique()
+        assert profile[col].distinct_exact
+
+    half = len(df) // 2
+    merged = profile_frame(df.iloc[:half]).merge(profile_frame(df.iloc[half:]))
+    assert not merged['skewed'].distinct_exact
+    assert merged['city'].distinct_exact
+    assert merged['city'].distinct_count() == df['city'].nunique()
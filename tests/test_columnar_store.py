@@ -0,0 +1,40 @@
+import io
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import pytest
+from utils.columnar_store import ColumnarStore, iter_columnar_batches, write_ipc_batches
+
+
+def _table(rows=1000):
+    return pa.table({
+        'x': pa.array(range(rows), pa.int64()),
+        'city': pa.array(['Pune', 'Goa', None, 'Delhi'] * (rows // 4)).dictionary_encode(),
+    })
+
+
+def _upload(table, reader):
+    buffer = io.BytesIO()
+    if reader == 'parquet':
+        # Small row groups so each carries its own dictionary
+        pq.write_table(table, buffer, row_group_size=100)
+    else:
+        feather.write_feather(table, buffer)
+    return io.BytesIO(buffer.getvalue())
+
+
+@pytest.mark.parametrize('reader', ['parquet', 'feather'])
+def test_upload_streams_into_mapped_store(tmp_path, reader):
+    table = _table()
+    schema, batches = iter_columnar_batches(_upload(table, reader), reader)
+    path = str(tmp_path / 'upload.arrow')
+    write_ipc_batches(schema, batches, path)
+
+    store = ColumnarStore(path)
+    assert store.num_rows == table.num_rows
+    frame = store.to_frame()
+    expected = table.to_pandas()
+    assert frame['x'].tolist() == expected['x'].tolist()
+    assert frame['city'].astype(object).where(frame['city'].notna(), None).tolist() == \
+        expected['city'].astype(object).where(expected['city'].notna(), None).tolist()
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+from config import KENDALL_SAMPLE_ROWS
+from utils.correlation import (cluster_columns, correlation_key, correlation_matrix, correlation_note, get_clusters,
+                               get_correlation, kendall_standard_error, pearson_matrix, top_pairs)
+
+
+def _frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(0, 1, rows)
+    df = pd.DataFrame({
+        'base': base,
+        'linked': 0.5 * base + rng.normal(0, 1, rows),
+        'inverse': -base + rng.normal(0, 0.3, rows),
+        'noise': rng.normal(0, 1, rows),
+        'gappy': base ** 2 + rng.normal(0, 1, rows),
+        'ties': rng.integers(0, 5, rows),
+        'constant': np.full(rows, 3.0),
+    })
+    df.loc[rng.choice(rows, rows // 5, replace=False), 'gappy'] = np.nan
+    df.loc[rng.choice(rows, rows // 10, replace=False), 'linked'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('rows', [50, 3000])
+def test_pearson_matches_pandas_with_missing_values(rows):
+    df = _frame(rows)
+    columns = list(df.columns)
+    pd.testing.assert_frame_equal(correlation_matrix(df, columns, 'pearson'), df.corr('pearson'),
+                                  check_exact=False, atol=1e-10)
+
+
+def test_pearson_blocks_match_single_block():
+    values = _frame(500).to_numpy(dtype=float)
+    np.testing.assert_allclose(pearson_matrix(values, block_size=2), pearson_matrix(values), atol=1e-12)
+
+
+def test_spearman_matches_pandas_on_complete_columns():
+    df = _frame(2000).drop(columns=['gappy', 'linked'])
+    columns = list(df.columns)
+    pd.testing.assert_frame_equal(correlation_matrix(df, columns, 'spearman'), df.corr('spearman'),
+                                  check_exact=False, atol=1e-10)
+
+
+def test_kendall_matches_pandas_within_sample():
+    # pandas reports tau = 1 on the diagonal even for a constant column
+    df = _frame(300, seed=2).drop(columns=['constant'])
+    columns = list(df.columns)
+    pd.testing.assert_frame_equal(correlation_matrix(df, columns, 'kendall'), df.corr('kendall'),
+                                  check_exact=False, atol=1e-10)
+
+
+def test_sampled_kendall_stays_close_and_is_captioned():
+    df = _frame(KENDALL_SAMPLE_ROWS * 3, seed=4).drop(columns=['constant'])
+    sampled = correlation_matrix(df, list(df.columns), 'kendall')
+    bound = 4 * kendall_standard_error(KENDALL_SAMPLE_ROWS)
+    assert (sampled - df.corr('kendall')).abs().max().max() < bound
+    assert 'sample' in correlation_note(len(df), 'kendall', False)
+    assert correlation_note(KENDALL_SAMPLE_ROWS, 'kendall', True) is None
+    assert correlation_note(len(df), 'spearman', True) and correlation_note(len(df), 'spearman', False) is None
+    assert correlation_note(len(df), 'pearson', True) is None
+
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        correlation_matrix(_frame(10), ['base', 'noise'], 'cosine')
+
+
+def test_top_pairs_orders_by_strength_and_skips_missing():
+    names = ['a', 'b', 'c', 'd']
+    corr = pd.DataFrame([[1.0, 0.2, -0.9, np.nan],
+                         [0.2, 1.0, 0.5, 0.1],
+                         [-0.9, 0.5, 1.0, 0.3],
+                         [np.nan, 0.1, 0.3, 1.0]], index=names, columns=names)
+    assert top_pairs(corr, k=3) == [('a', 'c', -0.9), ('b', 'c', 0.5), ('c', 'd', 0.3)]
+    assert [pair[:2] for pair in top_pairs(corr, k=10)] == [('a', 'c'), ('b', 'c'), ('c', 'd'), ('a', 'b'), ('b', 'd')]
+    assert top_pairs(corr.iloc[:1, :1]) == []
+
+
+def _blocks_frame(rows=2000):
+    rng = np.random.default_rng(3)
+    x, y = rng.normal(0, 1, (2, rows))
+    noise = rng.normal(0, 0.2, (6, rows))
+    return pd.DataFrame({'x1': x + noise[0], 'y1': y + noise[1], 'x2': -x + noise[2],
+                         'y2': y + noise[3], 'x3': x + noise[4], 'y3': -y + noise[5]})
+
+
+def test_cluster_columns_groups_correlated_blocks():
+    df = _blocks_frame()
+    corr = correlation_matrix(df, list(df.columns))
+    order, labels = cluster_columns(corr, max_clusters=2)
+    label = dict(zip(df.columns, labels))
+    assert label['x1'] == label['x2'] == label['x3']
+    assert label['y1'] == label['y2'] == label['y3']
+    assert label['x1'] != label['y1']
+    # Each block is contiguous in dendrogram order
+    first = {df.columns[i][0] for i in order[:3]}
+    assert len(first) == 1
+
+
+def test_cached_matrix_and_clusters():
+    df = _frame(500)
+    key = ('test-dataset', 'original')
+    corr = get_correlation(df, df.columns, 'pearson', key)
+    assert get_correlation(df, df.columns, 'pearson', key) is corr
+    pd.testing.assert_frame_equal(corr, correlation_matrix(df, list(df.columns)))
+    matrix_key = correlation_key(list(df.columns), 'pearson', key)
+    clusters = get_clusters(corr, matrix_key, max_clusters=2)
+    assert get_clusters(corr, matrix_key, max_clusters=2) is clusters
+    assert get_correlation(df, df.columns, 'pearson', key) is corr
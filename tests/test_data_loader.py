@@ -0,0 +1,41 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from utils import data_loader
+from utils.spill_cache import SpillCache
+
+
+class _Upload(io.BytesIO):
+    name = 'upload.csv'
+
+
+@pytest.fixture
+def spill_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, '_spill_cache', SpillCache(str(tmp_path), 1 << 30))
+
+
+def _csv():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'age': rng.integers(18, 90, 300),
+        'score': rng.normal(0, 1, 300),
+        'city': rng.choice(['Pune', 'Delhi', 'Goa'], 300),
+        'note': [f"free text entry number {i} with words" for i in range(300)],
+    })
+    df.loc[3, 'score'] = np.nan
+    return _Upload(df.to_csv(index=False).encode('utf-8'))
+
+
+def test_csv_uploads_keep_numpy_dtypes_after_spill(spill_dir):
+    upload = _csv()
+    options = {'reader': 'csv'}
+    parsed = data_loader.parse_upload(upload, options)
+    expected = parsed['data'].dtypes
+
+    entry = data_loader.spill_entry('key', parsed)
+    reloaded = data_loader.load_spilled('key')
+    for frame in (entry['data'], reloaded['data']):
+        pd.testing.assert_series_equal(frame.dtypes, expected)
+        assert not any(isinstance(dtype, pd.ArrowDtype) for dtype in frame.dtypes)
+    pd.testing.assert_frame_equal(reloaded['data'], entry['data'])
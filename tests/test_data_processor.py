@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+from batch_preprocess import process_file
+from utils.column_profile import profile_frame
+from utils.data_processor import build_plan, dump_pipeline, execute_plan, export_frame, load_pipeline
+from utils.type_inference import infer_feature_types
+
+
+def _raw_frame(rows=200):
+    rng = np.random.default_rng(0)
+    amounts = [f"{value:,.2f}" for value in rng.uniform(500, 5000, rows)]
+    amounts[3] = None
+    age = rng.integers(18, 90, rows).astype(float)
+    age[5] = np.nan
+    return pd.DataFrame({
+        'amount': amounts,
+        'age': age,
+        'city': rng.choice(['Pune', 'Delhi', 'Goa'], rows),
+    })
+
+
+def _fit(raw, operators):
+    """Ingest-style conversion and a fitted plan, as the app runs them"""
+    data = raw.copy()
+    num, cat, _, inferences, conversions = infer_feature_types(data)
+    for col, values in conversions.items():
+        data[col] = values
+    parsed = [col for col, inference in inferences.items() if inference.kind == 'numeric_string']
+    strings = [col for col in cat if inferences[col].kind != 'boolean']
+    plan = build_plan(profile_frame(data), num, cat, "Median", "Mode", "Remove duplicates",
+                      operators=operators, parsed_columns=parsed, string_columns=strings)
+    return execute_plan(data, plan)
+
+
+@pytest.mark.parametrize('operators', [["Standard scaling"], ["IQR outlier clipping", "Ordinal encoding"],
+                                       ["Ordinal encoding", "One-hot encoding"]])
+def test_pipeline_round_trip_through_batch_cli(tmp_path, operators):
+    raw = _raw_frame()
+    processed, pipeline, _ = _fit(raw, operators)
+    assert pipeline['parse_numbers'] == ['amount']
+
+    source = tmp_path / 'raw.csv'
+    target = tmp_path / 'out.csv'
+    raw.to_csv(source, index=False)
+    pipeline = load_pipeline(dump_pipeline(pipeline))
+    rows_in, rows_out = process_file(pipeline, source, target, chunksize=64)
+
+    batch = pd.read_csv(target)
+    assert (rows_in, rows_out) == (len(raw), len(processed))
+    assert list(batch.columns) == list(export_frame(processed, pipeline).columns)
+    for col in ('amount', 'age'):
+        np.testing.assert_allclose(batch[col].to_numpy(float), processed[col].to_numpy(float), rtol=1e-9)
+
+
+def test_categories_that_look_numeric_in_a_chunk_still_encode(tmp_path):
+    raw = _raw_frame()
+    # The first chunk of the file only has digit codes, which pandas would read as integers
+    raw['code'] = [str(i % 3) for i in range(150)] + ['x'] * 50
+    processed, pipeline, _ = _fit(raw, ["Ordinal encoding"])
+    assert 'code' in pipeline['string_columns']
+
+    source = tmp_path / 'raw.csv'
+    raw.to_csv(source, index=False)
+    process_file(load_pipeline(dump_pipeline(pipeline)), source, tmp_path / 'out.csv', chunksize=64)
+    batch = pd.read_csv(tmp_path / 'out.csv')
+    assert batch['code'].notna().all()
+    np.testing.assert_array_equal(batch['code'].to_numpy(float), processed['code'].to_numpy(float))
+
+
+def test_one_hot_output_replaces_the_source_column():
+    processed, pipeline, _ = _fit(_raw_frame(), ["One-hot encoding"])
+    exported = export_frame(processed, pipeline)
+    # The tabs keep reading 'city'; the downloaded data only has its indicators
+    assert 'city' in processed.columns and 'city' not in exported.columns
+    assert {'city_Pune', 'city_Delhi', 'city_Goa'} <= set(exported.columns)
+    assert (exported[['city_Pune', 'city_Delhi', 'city_Goa']].sum(axis=1) == 1).all()
+
+
+def test_one_hot_columns_must_not_overwrite_existing_ones():
+    raw = _raw_frame()
+    raw['city_Goa'] = 1.0
+    with pytest.raises(ValueError, match="city_Goa"):
+        _fit(raw, ["One-hot encoding"])
+
+
+def test_format_1_pipelines_still_load():
+    pipeline = load_pipeline('{"format": 1, "drop_duplicates": false, "fill_values": {}, "operators": {}}')
+    assert pipeline['parse_numbers'] == []
+    assert pipeline['string_columns'] == []
+
+
+def test_operators_after_one_hot_are_rejected():
+    data = _raw_frame().drop(columns='amount')
+    profile = profile_frame(data)
+    with pytest.raises(ValueError, match="One-hot encoding"):
+        build_plan(profile, ['age'], ['city'], "Median", "Mode", "Keep duplicates",
+                   operators=["One-hot encoding", "Standard scaling", "Ordinal encoding"])
+    # Numerical operators selected after it run on other columns and are fine
+    plan = build_plan(profile, ['age'], ['city'], "Median", "Mode", "Keep duplicates",
+                      operators=["One-hot encoding", "Standard scaling"])
+    assert plan['operators'] == {'age': ["Standard scaling"], 'city': ["One-hot encoding"]}
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from scipy.stats import gaussian_kde
+from utils.density import fft_kde, select_bandwidth
+
+
+def test_fft_kde_matches_direct_evaluation():
+    values = np.random.default_rng(0).normal(0, 1, 5000)
+    grid, density = fft_kde(values)
+    np.testing.assert_allclose(density, gaussian_kde(values)(grid), atol=5e-3)
+    assert np.sum(density) * (grid[1] - grid[0]) == pytest.approx(1, abs=1e-2)
+
+
+def test_fft_kde_skips_missing_and_constant_values():
+    grid, density = fft_kde(np.array([np.nan, 2.0, 2.0, np.inf]))
+    assert grid.tolist() == [2.0] and density.tolist() == [1.0]
+    assert fft_kde(np.array([np.nan]))[0].size == 0
+
+
+def test_select_bandwidth_rules():
+    values = np.random.default_rng(1).normal(0, 2, 1000)
+    assert select_bandwidth(values, 'scott') == pytest.approx(gaussian_kde(values).factor * values.std(ddof=1))
+    assert select_bandwidth(values, 0.3) == 0.3
+    with pytest.raises(ValueError):
+        select_bandwidth(values, 'unknown')
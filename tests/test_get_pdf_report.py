@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+from utils.get_pdf_report import generate_pdf_report, histogram_with_kde, render_histogram_png
+
+
+def _frame(rows=500):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'income': rng.normal(50, 10, rows),
+        'age': rng.integers(18, 90, rows),
+        'city': rng.choice(['Pune', 'Delhi', 'Goa'], rows),
+    })
+
+
+def test_histogram_png_renders():
+    png = render_histogram_png(*histogram_with_kde(_frame()['income']), 'income')
+    assert png.startswith(b'\x89PNG')
+
+
+def test_report_builds_for_numeric_columns():
+    data = _frame()
+    metadata = {'rows': len(data), 'columns': data.shape[1], 'missing_values': 0, 'duplicates': 0}
+    pdf = generate_pdf_report(data, metadata, ['income', 'age'], ['city'], [])
+    assert pdf.startswith(b'%PDF')
@@ -0,0 +1,87 @@
+import gc
+import os
+import weakref
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from utils import memory_budget
+from utils.cache import LRUCache
+from utils.column_profile import profile_frame
+from utils.spill_cache import SpillCache
+
+
+def test_shared_objects_are_counted_once():
+    frame = pd.DataFrame({'x': np.arange(100000, dtype=np.int64)})
+    size = memory_budget.resident_bytes(frame)
+    assert size >= frame['x'].nbytes
+    held = memory_budget._held_objects([frame, {'data': frame}, frame.to_numpy()])
+    assert sum(held.values()) == size + frame['x'].nbytes
+
+
+def test_mapped_frames_are_reported_not_charged():
+    frame = memory_budget.mark_mapped(pd.DataFrame({'x': np.arange(1000)}))
+    assert memory_budget.resident_bytes(frame) == 0
+    assert memory_budget.mapped_bytes(frame) > 0
+
+
+def test_global_total_includes_shared_holders(monkeypatch):
+    cached = pd.DataFrame({'x': np.arange(50000, dtype=np.int64)})
+    report = b'%PDF' * 1000
+    monkeypatch.setattr(memory_budget, '_shared_holders', [lambda: [{'data': cached}], lambda: [report]])
+    monkeypatch.setattr(memory_budget, '_usage', {})
+    own = memory_budget._held_objects([cached])
+    total, sessions = memory_budget._record('session', own)
+    assert sessions == 1
+    assert total == memory_budget.resident_bytes(cached) + len(report)
+
+
+class _SessionState(dict):
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+def test_spilling_the_original_releases_the_parsed_frame(tmp_path, monkeypatch):
+    from utils import data_loader
+    monkeypatch.setattr(data_loader, '_spill_cache', SpillCache(str(tmp_path / 'uploads'), 1 << 30))
+    monkeypatch.setattr(data_loader, '_ingest_cache', LRUCache(max_entries=4))
+    monkeypatch.setattr(memory_budget, '_session_spill', SpillCache(str(tmp_path / 'sessions'), 1 << 30))
+    state = _SessionState(data_fingerprint='upload', unspillable_frames=set())
+    monkeypatch.setattr(memory_budget, 'st', SimpleNamespace(session_state=state))
+
+    frame = pd.DataFrame({'x': np.arange(20000, dtype=np.int64), 'label': ['a', 'b'] * 10000})
+    entry = data_loader.spill_entry('upload', {'data': frame, 'numerical_features': ['x'],
+                                               'categorical_features': ['label'], 'text_features': [],
+                                               'metadata': {}, 'profile': profile_frame(frame)})
+    data_loader._ingest_cache.put('upload', entry)
+    state['data'] = entry['data']
+    parsed = weakref.ref(frame)
+    del frame, entry
+
+    assert memory_budget.spill_frame('data')
+    gc.collect()
+    assert parsed() is None
+    assert memory_budget.resident_bytes(state['data']) == 0
+    assert data_loader._ingest_cache.get('upload')['data'] is state['data']
+    np.testing.assert_array_equal(state['data']['x'].to_numpy(dtype=np.int64), np.arange(20000))
+    # The upload's converted file is mapped; nothing new is written
+    assert not os.listdir(tmp_path / 'sessions')
+
+
+def test_processed_frames_spill_to_the_session_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory_budget, '_session_spill', SpillCache(str(tmp_path / 'sessions'), 1 << 30))
+    processed = pd.DataFrame({'x': np.arange(1000, dtype=np.float64)})
+    state = _SessionState(processed_fingerprint='processed', unspillable_frames=set(), processed_data=processed)
+    monkeypatch.setattr(memory_budget, 'st', SimpleNamespace(session_state=state))
+
+    assert memory_budget.spill_frame('processed_data')
+    assert state['processed_data'] is not processed
+    assert memory_budget.resident_bytes(state['processed_data']) == 0
+    np.testing.assert_array_equal(state['processed_data']['x'].to_numpy(dtype=float), processed['x'].to_numpy())
+    assert os.listdir(tmp_path / 'sessions')
+
+    # Frames Arrow cannot hold stay in memory and are not retried
+    state['processed_fingerprint'] = 'mixed'
+    state['processed_data'] = pd.DataFrame({'x': [1, 'a']})
+    assert not memory_budget.spill_frame('processed_data')
+    assert 'mixed' in state['unspillable_frames']
+    assert not memory_budget.spill_frame('processed_data')
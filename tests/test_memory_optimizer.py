@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+from utils.memory_optimizer import optimize_dtypes
+
+
+def test_optimize_dtypes_keeps_values():
+    df = pd.DataFrame({
+        'small': np.arange(100, dtype=np.int64),
+        'halves': np.arange(100) / 2,
+        'precise': np.arange(100) / 3,
+        'city': ['Pune', 'Goa'] * 50,
+        'note': [f"note {i}" for i in range(100)],
+    })
+    optimized = optimize_dtypes(df, ['small', 'halves', 'precise'], ['city'], ['note'])
+    assert optimized['small'].dtype == np.int8
+    assert optimized['halves'].dtype == np.float32
+    # float32 would round thirds, so the column stays float64
+    assert optimized['precise'].dtype == np.float64
+    assert isinstance(optimized['city'].dtype, pd.CategoricalDtype)
+    assert optimized.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+    pd.testing.assert_frame_equal(optimized.astype(object), df.astype(object), check_dtype=False)
@@ -0,0 +1,38 @@
+from collections import Counter
+import numpy as np
+import pandas as pd
+from utils.ngrams import SpaceSavingCounter, top_ngrams
+from utils.token_index import TokenIndex
+
+
+def _texts():
+    rng = np.random.default_rng(0)
+    words = np.array(['the', 'quick', 'brown', 'fox', 'jumps', 'over', 'lazy', 'dog', 'again'])
+    return pd.Series([' '.join(rng.choice(words, rng.integers(0, 12))) for _ in range(3000)])
+
+
+def test_top_ngrams_match_direct_count():
+    texts = _texts()
+    stop_words = {'the', 'over'}
+    expected = Counter()
+    for text in texts:
+        tokens = [token for token in text.lower().split() if token not in stop_words]
+        expected.update(zip(tokens, tokens[1:]))
+    # Fewer distinct bigrams than the counter holds, so every count is exact
+    result = top_ngrams(TokenIndex.build(texts), 2, stop_words, k=100)
+    assert dict(result) == dict(expected)
+    assert [count for _, count in result] == sorted((count for _, count in result), reverse=True)
+
+
+def test_space_saving_keeps_heavy_hitters():
+    rng = np.random.default_rng(1)
+    items = np.concatenate([np.repeat(['a', 'b'], [3000, 2000]), rng.integers(0, 5000, 5000).astype(str)])
+    rng.shuffle(items)
+    left, right = SpaceSavingCounter(50), SpaceSavingCounter(50)
+    left.update(items[:5000])
+    right.update(items[5000:])
+    merged = left.merge(right)
+    top = dict(merged.most_common(2))
+    assert set(top) == {'a', 'b'}
+    for item, exact in (('a', 3000), ('b', 2000)):
+        assert exact <= top[item] <= exact + merged.errors[item]
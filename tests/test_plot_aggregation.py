@@ -0,0 +1,28 @@
+import numpy as np
+from utils.plot_aggregation import MAX_BINS, block_means, box_stats, histogram_bins
+
+
+def test_histogram_bins_count_every_value():
+    values = np.random.default_rng(0).standard_cauchy(100000)
+    counts, edges = histogram_bins(values)
+    assert counts.sum() == values.size
+    assert len(edges) <= MAX_BINS + 1
+
+
+def test_box_stats_match_numpy():
+    values = np.random.default_rng(1).standard_t(2, 50000)
+    stats = box_stats(values)
+    np.testing.assert_allclose([stats['q1'], stats['median'], stats['q3']],
+                               np.quantile(values, [0.25, 0.5, 0.75]))
+    iqr = stats['q3'] - stats['q1']
+    assert stats['lowerfence'] >= stats['q1'] - 1.5 * iqr
+    assert stats['outliers'].min() == values.min() and stats['outliers'].max() == values.max()
+
+
+def test_block_means_ignore_missing_cells():
+    matrix = np.arange(25, dtype=float).reshape(5, 5)
+    matrix[0, 0] = np.nan
+    edges = np.array([0, 2, 5])
+    expected = [[np.nanmean(matrix[r0:r1, c0:c1]) for c0, c1 in zip(edges[:-1], edges[1:])]
+                for r0, r1 in zip(edges[:-1], edges[1:])]
+    np.testing.assert_allclose(block_means(matrix, edges), expected)
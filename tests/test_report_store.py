@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from utils.report_store import ReportStore, report_key
+
+
+def test_reports_are_stored_and_persisted(tmp_path):
+    store = ReportStore(2, str(tmp_path))
+    key = report_key('fingerprint', 'original', {'approximate': False})
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert store.request(key, executor, lambda: b'%PDF-1').result() == b'%PDF-1'
+        assert store.request(key, executor, lambda: b'other') == b'%PDF-1'
+    assert ReportStore(2, str(tmp_path)).get(key) == b'%PDF-1'
+
+
+def test_failed_builds_are_not_resubmitted():
+    store = ReportStore(2)
+    calls = []
+
+    def build():
+        calls.append(1)
+        raise ValueError("broken chart")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        first = store.request('key', executor, build)
+        with pytest.raises(ValueError):
+            first.result()
+        again = store.request('key', executor, build)
+        assert again is first and len(calls) == 1
+
+        store.discard_failure('key')
+        with pytest.raises(ValueError):
+            store.request('key', executor, build).result()
+    assert len(calls) == 2
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from utils.row_hash import count_duplicates, duplicate_mask, row_hashes
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'a': rng.integers(0, 4, 2000),
+        'b': rng.choice(['x', 'y', None], 2000),
+        'c': rng.choice([0.5, np.nan], 2000),
+    })
+    return df.set_index(np.arange(2000)[::-1])
+
+
+def test_duplicate_mask_matches_pandas():
+    df = _frame()
+    expected = df.duplicated().to_numpy()
+    np.testing.assert_array_equal(duplicate_mask(df), expected)
+    np.testing.assert_array_equal(duplicate_mask(df, verify=True), expected)
+    assert count_duplicates(df) == expected.sum()
+
+
+def test_verify_rules_out_hash_collisions():
+    df = _frame()
+    colliding = np.zeros(len(df), dtype=np.uint64)
+    assert duplicate_mask(df, colliding)[1:].all()
+    np.testing.assert_array_equal(duplicate_mask(df, colliding, verify=True), df.duplicated().to_numpy())
+
+
+def test_hashes_ignore_the_index():
+    df = _frame()
+    np.testing.assert_array_equal(row_hashes(df), row_hashes(df.reset_index(drop=True)))
+
+
+def test_hashes_ignore_numeric_dtype():
+    ints = pd.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z']})
+    floats = ints.astype({'a': 'float64'})
+    small = ints.astype({'a': 'int8'})
+    np.testing.assert_array_equal(row_hashes(ints), row_hashes(floats))
+    np.testing.assert_array_equal(row_hashes(ints), row_hashes(small))
+    # Integers float64 cannot hold exactly keep their own hashes
+    big = pd.DataFrame({'a': [2 ** 60, 2 ** 60 + 1]})
+    assert len(set(row_hashes(big))) == 2
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.sketches import HyperLogLog, KLLSketch, KLL_K
+
+
+@pytest.mark.parametrize('distinct', [100, 5000, 200000])
+def test_hll_count_within_error_bound(distinct):
+    values = pd.Series(np.arange(distinct)).sample(frac=1, random_state=0)
+    hll = HyperLogLog().update(values).update(values.iloc[:distinct // 2])
+    assert abs(hll.count() - distinct) / distinct < 3 * hll.relative_error
+
+
+def test_hll_merge_equals_sketch_of_union():
+    left = pd.Series(np.arange(0, 60000))
+    right = pd.Series(np.arange(40000, 100000))
+    merged = HyperLogLog().update(left).merge(HyperLogLog().update(right))
+    union = HyperLogLog().update(pd.concat([left, right]))
+    np.testing.assert_array_equal(merged.registers, union.registers)
+    assert abs(merged.count() - 100000) / 100000 < 3 * merged.relative_error
+
+
+def _rank_errors(sketch, values, qs):
+    ordered = np.sort(values)
+    estimates = sketch.quantile(qs)
+    return np.abs(np.searchsorted(ordered, estimates, side='right') / ordered.size - qs)
+
+
+def test_kll_quantiles_within_rank_error():
+    values = np.random.default_rng(0).lognormal(0, 1, 200000)
+    sketch = KLLSketch()
+    for start in range(0, values.size, 10000):
+        sketch.update(values[start:start + 10000])
+    qs = np.linspace(0.05, 0.95, 19)
+    assert sketch.count == values.size
+    assert _rank_errors(sketch, values, qs).max() < 0.02
+    # The sketch holds O(k log n) values, not the input
+    assert sum(level.size for level in sketch.levels) < 10 * KLL_K
+
+
+def test_kll_merge_keeps_rank_error():
+    rng = np.random.default_rng(1)
+    first, second = rng.normal(0, 1, 80000), rng.normal(3, 1, 120000)
+    merged = KLLSketch().update(first).merge(KLLSketch().update(second))
+    qs = np.linspace(0.05, 0.95, 19)
+    assert merged.count == first.size + second.size
+    assert _rank_errors(merged, np.concatenate([first, second]), qs).max() < 0.02
+
+
+def test_kll_ignores_missing_values():
+    sketch = KLLSketch().update([np.nan, np.inf, 1.0, 2.0, 3.0])
+    assert sketch.count == 3
+    assert sketch.quantile(0.5) == 2.0
+    assert np.isnan(KLLSketch().quantile(0.5))
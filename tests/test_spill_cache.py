@@ -0,0 +1,38 @@
+import os
+import pyarrow as pa
+import pytest
+from utils.spill_cache import SpillCache
+
+posix_only = pytest.mark.skipif(not hasattr(os, 'getuid'), reason="POSIX ownership and modes")
+
+
+def test_round_trip_in_private_directory(tmp_path):
+    cache = SpillCache(str(tmp_path / 'uploads'), 1 << 30)
+    assert cache.enabled
+    cache.put('key', pa.table({'x': [1, 2, 3]}), {'format': 1})
+    store, sidecar = cache.get('key')
+    assert sidecar == {'format': 1} and store.table.column('x').to_pylist() == [1, 2, 3]
+    if hasattr(os, 'getuid'):
+        assert os.stat(tmp_path / 'uploads').st_mode & 0o777 == 0o700
+
+
+@posix_only
+def test_directories_open_to_others_are_tightened(tmp_path):
+    directory = tmp_path / 'uploads'
+    directory.mkdir(mode=0o777)
+    os.chmod(directory, 0o777)
+    assert SpillCache(str(directory), 1 << 30).enabled
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+
+
+@posix_only
+def test_directories_of_other_users_are_not_loaded_from(tmp_path, monkeypatch):
+    cache = SpillCache(str(tmp_path / 'uploads'), 1 << 30)
+    cache.put('key', pa.table({'x': [1]}), {'format': 1})
+    # As seen by another user, the directory is not theirs
+    monkeypatch.setattr(os, 'getuid', lambda: os.stat(tmp_path).st_uid + 1)
+    other = SpillCache(str(tmp_path / 'uploads'), 1 << 30)
+    assert not other.enabled
+    assert other.get('key') is None
+    with pytest.raises(OSError):
+        other.put('key', pa.table({'x': [2]}), {'format': 1})
@@ -0,0 +1,70 @@
+import io
+import numpy as np
+import pandas as pd
+from utils import column_profile
+from utils.streaming_loader import ReservoirSample, stream_csv
+
+
+def _mixed_csv():
+    """'code' parses as numbers in the first chunk and as strings in the second"""
+    codes = [str(i % 10) for i in range(100)] + ['a', 'b', None, 'a'] * 25
+    values = np.arange(200, dtype=float)
+    values[::7] = np.nan
+    return pd.DataFrame({'code': codes, 'value': values}).to_csv(index=False)
+
+
+def test_profile_merges_columns_whose_dtype_changes_between_chunks():
+    entry = stream_csv(io.StringIO(_mixed_csv()), chunksize=100, sample_size=50)
+    full = pd.read_csv(io.StringIO(_mixed_csv()), dtype={'code': str})
+    code = entry['profile']['code']
+    assert code.nulls == int(full['code'].isna().sum())
+    assert code.count == int(full['code'].notna().sum())
+    assert code.distinct_count() == full['code'].nunique()
+    assert code.distinct_exact
+    assert sum(code.counts.values()) == code.count
+
+    value = entry['profile']['value']
+    assert value.nulls == int(full['value'].isna().sum())
+    np.testing.assert_allclose(value.mean, full['value'].mean())
+    assert entry['metadata']['rows'] == len(full)
+
+
+def test_reservoir_sample_size_and_coverage():
+    sample = ReservoirSample(100, seed=1)
+    for start in range(0, 10000, 1000):
+        sample.add(pd.DataFrame({'x': np.arange(start, start + 1000)}))
+    assert sample.seen == 10000 and len(sample.rows) == 100
+    assert sample.rows['x'].is_unique
+    # Rows from late chunks make it into the sample
+    assert sample.rows['x'].max() > 5000
+
+
+def test_duplicates_found_across_chunks_parsed_as_int_and_float():
+    # The second chunk has a missing 'count', so pandas reads that column as float64 there
+    csv = "count,city\n1,Pune\n2,Goa\n3,Agra\n1,Pune\n2,Goa\n,Agra\n"
+    entry = stream_csv(io.StringIO(csv), chunksize=3, sample_size=10)
+    assert entry['metadata']['duplicates'] == 2 == pd.read_csv(io.StringIO(csv)).duplicated().sum()
+
+
+def test_continuous_columns_stop_tracking_frequencies(monkeypatch):
+    monkeypatch.setattr(column_profile, 'MAX_TRACKED_VALUES', 150)
+    csv = pd.DataFrame({'x': np.arange(600) / 7, 'code': np.arange(600) % 5}).to_csv(index=False)
+    entry = stream_csv(io.StringIO(csv), chunksize=100, sample_size=50)
+    x = entry['profile']['x']
+    assert x.counts == {} and not x.exact
+    assert abs(x.distinct_count() - 600) / 600 < 0.05
+    code = entry['profile']['code']
+    assert code.exact and code.counts == {value: 120 for value in range(5)}
+
+
+def test_numeric_strings_parsed_from_the_sample_keep_file_counts():
+    rng = np.random.default_rng(2)
+    amounts = pd.Series([f"{value:,}" for value in rng.integers(1000, 10 ** 6, 3000)], dtype=object)
+    amounts[rng.choice(3000, 30, replace=False)] = None
+    csv = pd.DataFrame({'amount': amounts}).to_csv(index=False)
+    entry = stream_csv(io.StringIO(csv), chunksize=500, sample_size=300)
+    assert entry['metadata']['inferred_types']['amount']['kind'] == 'numeric_string'
+    amount = entry['profile']['amount']
+    assert amount.numeric and (amount.count, amount.nulls) == (2970, 30)
+    assert entry['profile'].sampled_quantiles(['amount']) == ['amount']
+    assert not amount.distinct_exact
@@ -0,0 +1,16 @@
+import pandas as pd
+from utils.token_index import TokenIndex
+
+
+def test_token_index_word_counts():
+    texts = pd.Series(["Don't stop", "stop the stop", ""])
+    index = TokenIndex.build(texts)
+    assert index.row_lengths().tolist() == [2, 3, 0]
+    mask = index.vocab_mask(stop_words={'the'}, alpha_only=False)
+    assert index.top_words(5, mask) == [('stop', 3), ("don't", 1)]
+
+
+def test_row_ids_follow_offsets():
+    index = TokenIndex.build(pd.Series(["a b", "", "c"]))
+    assert index.row_ids().tolist() == [0, 0, 2]
+    assert index.frequencies().sum() == 3
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from utils.type_inference import infer_feature_types, parse_numbers, stratified_positions
+
+
+def _frame(rows=20000):
+    rng = np.random.default_rng(0)
+    amounts = rng.integers(0, 5000000, rows)
+    return pd.DataFrame({
+        'user_id': rng.permutation(rows),
+        'score': rng.normal(0, 1, rows),
+        'amount': [f" {value:,} " for value in amounts],
+        'flag': rng.choice(['Yes', 'no'], rows),
+        'city': rng.choice(['Pune', 'Delhi', 'Goa', 'Agra'], rows),
+        'review': [f"review number {i} says the product was fine overall" for i in range(rows)],
+        'when': pd.date_range('2024-01-01', periods=rows, freq='h').strftime('%Y-%m-%d %H:%M'),
+    }), amounts
+
+
+def test_infer_feature_types_on_sample():
+    df, amounts = _frame()
+    numerical, categorical, text, inferences, conversions = infer_feature_types(df, sample_rows=2000)
+    kinds = {col: inference.kind for col, inference in inferences.items()}
+    assert kinds == {'user_id': 'id', 'score': 'numerical', 'amount': 'numeric_string', 'flag': 'boolean',
+                     'city': 'categorical', 'review': 'text', 'when': 'datetime'}
+    assert numerical == ['score', 'amount']
+    assert categorical == ['flag', 'city']
+    assert text == ['review']
+    np.testing.assert_array_equal(conversions['amount'].to_numpy(), amounts)
+
+
+def test_parse_numbers():
+    parsed = parse_numbers(pd.Series([' 1,234 ', '-12,345.5', '5.5', 'n/a', None, '1,5', '3,4', '12,34,567']))
+    np.testing.assert_array_equal(parsed.to_numpy(), [1234, -12345.5, 5.5] + [np.nan] * 5)
+
+
+def test_stratified_positions_cover_every_block():
+    positions = stratified_positions(100000, 1000)
+    assert positions.size == 1000 and np.unique(positions).size == 1000
+    counts, _ = np.histogram(positions, bins=10, range=(0, 100000))
+    assert counts.tolist() == [100] * 10
+    np.testing.assert_array_equal(stratified_positions(50, 1000), np.arange(50))
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import stat
+import threading
+from collections import OrderedDict
+
+
+def content_fingerprint(content, **options):
+    """Return a stable hex digest of raw bytes plus the options used to interpret them"""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(memoryview(content))
+    for key in sorted(options):
+        hasher.update(f"|{key}={options[key]!r}".encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def private_directory(path):
+    """Create a directory only this user can use and return whether it is safe to load files from.
+
+    The directory and its parent must be owned by this user and closed to everyone else;
+    otherwise another user could plant or swap the files read back from it.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, mode=0o700, exist_ok=True)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if not hasattr(os, 'getuid'):
+        # No POSIX ownership; the user profile's ACLs protect the default cache location
+        return True
+    for directory in (path, parent):
+        info = os.lstat(directory)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+            return False
+        if stat.S_IMODE(info.st_mode) & 0o077:
+            # Created by an earlier version with the default mode
+            os.chmod(directory, 0o700)
+    return True
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache shared by every Streamlit session in the process"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def values(self):
+        """Snapshot of the cached values, least recently used first"""
+        with self._lock:
+            return list(self._entries.values())
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,50 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+CAT_STATS_COLUMNS = ['unique_values', 'missing', 'missing_pct', 'most_common', 'most_common_count', 'most_common_pct']
+
+
+def default_workers():
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def observed_value_counts(series):
+    """value_counts without the zero-count entries categorical columns report for unused categories"""
+    counts = series.value_counts()
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        counts = counts[counts > 0]
+    return counts
+
+
+def value_counts_parallel(df, columns, max_workers=None):
+    """Run one value_counts per column on a thread pool and return them by column name"""
+    columns = list(columns)
+    if len(columns) <= 1:
+        return {col: observed_value_counts(df[col]) for col in columns}
+    with ThreadPoolExecutor(max_workers=max_workers or default_workers()) as pool:
+        counts = pool.map(lambda col: observed_value_counts(df[col]), columns)
+        return dict(zip(columns, counts))
+
+
+def summarize_value_counts(value_counts, rows):
+    """Unique count, missing, mode, mode count and mode share from a single value_counts result"""
+    present = int(value_counts.sum())
+    missing = rows - present
+    missing_pct = round(missing / rows * 100, 2) if rows else 0.0
+    if value_counts.empty:
+        return [0, missing, missing_pct, None, None, None]
+    mode_count = int(value_counts.iloc[0])
+    return [len(value_counts), missing, missing_pct, value_counts.index[0], mode_count,
+            round(mode_count / present * 100, 2)]
+
+
+def categorical_summary(df, columns, max_workers=None):
+    """Build the categorical statistics table with one value_counts per column, columns in parallel"""
+    counts = value_counts_parallel(df, columns, max_workers)
+    rows = len(df)
+    return pd.DataFrame(
+        [summarize_value_counts(counts[col], rows) for col in columns],
+        index=list(columns),
+        columns=CAT_STATS_COLUMNS
+    )
@@ -0,0 +1,389 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from utils.categorical_stats import CAT_STATS_COLUMNS, default_workers, value_counts_parallel
+from utils.sketches import HyperLogLog, KLLSketch, hash_values
+
+# Values kept per quantile sketch, used for quantiles of merged partials; frames at or
+# below this size have exact sketches
+QUANTILE_SAMPLE_SIZE = 20000
+
+# Quantiles computed exactly when a whole frame is profiled
+QUARTILES = (0.25, 0.5, 0.75)
+
+# Distinct values whose frequencies are tracked per non-numeric column
+MAX_TRACKED_VALUES = 50000
+
+DESCRIBE_ROWS = ['count', 'unique', 'top', 'freq', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+def is_numeric_column(series):
+    """Numeric for profiling purposes; booleans are treated as categorical like describe() does"""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+class QuantileSketch:
+    """Mergeable uniform sample of a column's values used to answer quantile queries"""
+
+    def __init__(self, values, population, size=QUANTILE_SAMPLE_SIZE):
+        self.values = values
+        self.population = population
+        self.size = size
+
+    @property
+    def exact(self):
+        return self.values.size == self.population
+
+    def quantile(self, q):
+        if self.values.size == 0:
+            return np.nan
+        return np.quantile(self.values, q)
+
+    def merge(self, other, rng=None):
+        """Combine two sketches, subsampling each side in proportion to its population"""
+        population = self.population + other.population
+        if self.values.size + other.values.size <= self.size:
+            return QuantileSketch(np.concatenate([self.values, other.values]), population, self.size)
+
+        rng = rng or np.random.default_rng(0)
+        parts = []
+        for sketch in (self, other):
+            take = min(sketch.values.size, int(round(self.size * sketch.population / population)))
+            parts.append(rng.choice(sketch.values, size=take, replace=False))
+        return QuantileSketch(np.concatenate(parts), population, self.size)
+
+
+class ColumnProfile:
+    """Partial statistics for one column; partials of the same column can be merged"""
+
+    def __init__(self, name, numeric, count, nulls):
+        self.name = name
+        self.numeric = numeric
+        self.count = count
+        self.nulls = nulls
+        self.mean = np.nan
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.sketch = None
+        self.quartiles = {}
+        self.counts = {}
+        self.distinct = 0
+        self.distinct_exact = True
+        # Whether counts holds the frequency of every value
+        self.exact = True
+        self.hll = None
+        self.kll = None
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def total(self):
+        return self.count + self.nulls
+
+    @property
+    def exact_quantiles(self):
+        """Whether quantile() answers the quartiles exactly outside approximate mode"""
+        return bool(self.quartiles) or (self.sketch is not None and self.sketch.exact)
+
+    def quantile(self, q, approximate=False):
+        """Exact quartile when the whole column was profiled at once, else from the sample
+        sketch; from the KLL sketch in approximate mode"""
+        if approximate and self.kll is not None:
+            return self.kll.quantile(q)
+        if q in self.quartiles:
+            return self.quartiles[q]
+        return self.sketch.quantile(q) if self.sketch is not None else np.nan
+
+    def distinct_count(self, approximate=False):
+        """Distinct values, or the HyperLogLog estimate in approximate mode. Merged partials
+        can only estimate them too; distinct_exact says whether this count is exact."""
+        if approximate and self.hll is not None:
+            return int(round(self.hll.count()))
+        return self.distinct
+
+    def top(self, k=None):
+        """Most frequent values, shaped like value_counts().head(k)"""
+        freqs = pd.Series(self.counts, dtype='int64')
+        if not freqs.empty:
+            freqs = freqs.sort_values(ascending=False, kind='stable')
+        freqs.name = 'count'
+        return freqs if k is None else freqs.head(k)
+
+    def merge(self, other):
+        """Combine two partials of the same column, e.g. from consecutive chunks"""
+        numeric = self.numeric and other.numeric
+        merged = ColumnProfile(self.name, numeric, self.count + other.count, self.nulls + other.nulls)
+
+        if numeric:
+            # Chan et al. parallel update of mean and sum of squared deviations
+            if self.count == 0 or other.count == 0:
+                source = self if other.count == 0 else other
+                merged.mean, merged.m2 = source.mean, source.m2
+            else:
+                delta = other.mean - self.mean
+                merged.mean = self.mean + delta * other.count / merged.count
+                merged.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / merged.count
+            merged.min = np.nanmin([self.min, other.min]) if merged.count else np.nan
+            merged.max = np.nanmax([self.max, other.max]) if merged.count else np.nan
+            # Quartiles of the parts do not give the quartiles of the whole; the merged
+            # sample answers them, exactly while it still holds every value
+            merged.sketch = self.sketch.merge(other.sketch)
+            if self.kll is not None and other.kll is not None:
+                merged.kll = self.kll.merge(other.kll)
+            merged.hll = _merge_hll([self, other])
+        else:
+            # Numeric and non-numeric partials hash values differently, so only tracked
+            # frequencies can be combined across them
+            merged.hll = _merge_hll([self, other]) if not (self.numeric or other.numeric) else None
+
+        # Frequencies are merged whatever each side's dtype; numeric partials carry them
+        # only when profiled with numeric_counts, as streamed chunks are. Numeric columns
+        # that are no longer exact stop carrying them.
+        if numeric and not (self.exact and other.exact):
+            merged.counts, merged.exact = {}, False
+        else:
+            merged.counts, merged.exact = _merge_counts([self, other])
+        merged.distinct_exact = merged.exact
+        if merged.exact:
+            merged.distinct = len(merged.counts)
+        elif merged.hll is not None:
+            merged.distinct = int(round(merged.hll.count()))
+        else:
+            merged.distinct = max(len(merged.counts), self.distinct, other.distinct)
+        return merged
+
+
+def _merge_counts(profiles):
+    """Summed value frequencies of the partials, and whether they still cover every value"""
+    counts = dict(profiles[0].counts)
+    for p in profiles[1:]:
+        for value, freq in p.counts.items():
+            counts[value] = counts.get(value, 0) + freq
+    exact = all(p.exact for p in profiles)
+    if len(counts) > MAX_TRACKED_VALUES:
+        kept = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+        counts = dict(kept[:MAX_TRACKED_VALUES])
+        exact = False
+    return counts, exact
+
+
+def _merge_hll(profiles):
+    """Union of the partials' HyperLogLogs, or None if any partial has none"""
+    if any(p.hll is None for p in profiles):
+        return None
+    merged = profiles[0].hll
+    for p in profiles[1:]:
+        merged = merged.merge(p.hll)
+    return merged
+
+
+class DatasetProfile:
+    """Column profiles for a whole frame, read by every tab and the PDF report"""
+
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def profile_columns(self, names):
+        """Hook for profiles that compute columns on first use; every column is already here"""
+
+    def merge(self, other):
+        columns = dict(self.columns)
+        for name, profile in other.columns.items():
+            columns[name] = columns[name].merge(profile) if name in columns else profile
+        return DatasetProfile(self.rows + other.rows, columns)
+
+    def value_counts(self, name, k=None):
+        return self[name].top(k)
+
+    def missing(self, names):
+        self.profile_columns(names)
+        return pd.Series({name: self[name].nulls for name in names}, dtype='int64')
+
+    def sampled_quantiles(self, names):
+        """Numerical columns whose quartiles outside approximate mode come from a value sample"""
+        self.profile_columns(names)
+        return [name for name in names if self[name].numeric and not self[name].exact_quantiles]
+
+    def numerical_table(self, names, approximate=False):
+        """describe().T for numerical columns with range and missing columns appended"""
+        self.profile_columns(names)
+        table = pd.DataFrame(
+            [[p.count, p.mean, p.std, p.min, *(p.quantile(q, approximate) for q in (0.25, 0.5, 0.75)), p.max]
+             for p in (self[name] for name in names)],
+            index=names,
+            columns=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'],
+            dtype=float
+        )
+        table['range'] = table['max'] - table['min']
+        table['missing'] = self.missing(names).values
+        table['missing_pct'] = table['missing'] / self.rows * 100 if self.rows else 0.0
+        return table
+
+    def categorical_table(self, names, approximate=False):
+        """The categorical statistics table answered from the profile, without reading the frame"""
+        self.profile_columns(names)
+        rows = []
+        for name in names:
+            p = self[name]
+            missing_pct = round(p.nulls / p.total * 100, 2) if p.total else 0.0
+            top = p.top(1)
+            if top.empty:
+                rows.append([p.distinct_count(approximate), p.nulls, missing_pct, None, None, None])
+                continue
+            mode_count = int(top.iloc[0])
+            rows.append([p.distinct_count(approximate), p.nulls, missing_pct, top.index[0], mode_count,
+                         round(mode_count / p.count * 100, 2)])
+        return pd.DataFrame(rows, index=list(names), columns=CAT_STATS_COLUMNS)
+
+    def describe(self):
+        """Table shaped like DataFrame.describe(include='all')"""
+        names = list(self)
+        self.profile_columns(names)
+        table = pd.DataFrame(index=DESCRIBE_ROWS, columns=names, dtype=object)
+        for name in names:
+            p = self[name]
+            table.at['count', name] = float(p.count)
+            if p.numeric:
+                if p.count:
+                    table.at['mean', name] = p.mean
+                    table.at['std', name] = p.std
+                    table.at['min', name] = p.min
+                    table.at['25%', name] = p.quantile(0.25)
+                    table.at['50%', name] = p.quantile(0.5)
+                    table.at['75%', name] = p.quantile(0.75)
+                    table.at['max', name] = p.max
+            elif p.counts:
+                top = p.top(1)
+                table.at['unique', name] = p.distinct
+                table.at['top', name] = top.index[0]
+                table.at['freq', name] = top.iloc[0]
+        return table.dropna(how='all')
+
+
+def _numeric_sketches(series):
+    """HyperLogLog and KLL sketches of a numeric column, hashed as float64 so int and float
+    chunks of the same column agree"""
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    values = values[~np.isnan(values)]
+    return HyperLogLog().add_hashes(pd.util.hash_array(values)), KLLSketch().update(values)
+
+
+def _set_counts(profile, freqs):
+    """Keep a column's value frequencies, up to MAX_TRACKED_VALUES of them"""
+    profile.exact = len(freqs) <= MAX_TRACKED_VALUES
+    if not profile.exact:
+        freqs = freqs.head(MAX_TRACKED_VALUES)
+    profile.counts = dict(zip(freqs.index, freqs.to_numpy(dtype='int64').tolist()))
+
+
+def profile_frame(df, columns=None, sample_size=QUANTILE_SAMPLE_SIZE, seed=0, numeric_counts=()):
+    """Profile a frame with one vectorized reduction per statistic and one value_counts per column.
+
+    Numeric columns get value frequencies only when listed in numeric_counts, for partials
+    that may be merged with chunks where the same column did not parse as numbers, and
+    only while they have at most MAX_TRACKED_VALUES distinct values.
+    """
+    columns = list(df.columns) if columns is None else list(columns)
+    frame = df[columns]
+    rows = len(frame)
+    counts = frame.count()
+    numeric = [col for col in columns if is_numeric_column(frame[col])]
+    numeric_counts = set(numeric_counts)
+
+    if numeric:
+        num = frame[numeric]
+        means = num.mean()
+        m2s = num.var(ddof=0) * counts[numeric]
+        mins = num.min()
+        maxs = num.max()
+        distincts = num.nunique()
+        quartiles = num.quantile(list(QUARTILES))
+        sampled = num if rows <= sample_size else num.sample(n=sample_size, random_state=seed)
+        with ThreadPoolExecutor(max_workers=default_workers()) as pool:
+            sketches = dict(zip(numeric, pool.map(lambda col: _numeric_sketches(num[col]), numeric)))
+
+    value_counts = value_counts_parallel(frame, [col for col in columns
+                                                 if col in numeric_counts or col not in numeric])
+
+    profiles = {}
+    for col in columns:
+        profile = ColumnProfile(col, col in numeric, int(counts[col]), rows - int(counts[col]))
+        if profile.numeric:
+            if profile.count:
+                profile.mean = float(means[col])
+                profile.m2 = float(m2s[col])
+                profile.min = mins[col]
+                profile.max = maxs[col]
+            values = sampled[col].dropna().to_numpy(dtype=float)
+            profile.sketch = QuantileSketch(values, profile.count, sample_size)
+            if profile.count:
+                profile.quartiles = {q: float(quartiles.at[q, col]) for q in QUARTILES}
+            profile.distinct = int(distincts[col])
+            profile.hll, profile.kll = sketches[col]
+            if col in numeric_counts and len(value_counts[col]) <= MAX_TRACKED_VALUES:
+                _set_counts(profile, value_counts[col])
+            else:
+                # Some frequencies of a continuous column say nothing; the HyperLogLog counts it
+                profile.exact = False
+        else:
+            freqs = value_counts[col]
+            profile.distinct = len(freqs)
+            # Hashing the distinct values is enough for the HyperLogLog
+            profile.hll = HyperLogLog().add_hashes(hash_values(pd.Series(freqs.index)))
+            _set_counts(profile, freqs)
+        profiles[col] = profile
+
+    return DatasetProfile(rows, profiles)
+
+
+class LazyDatasetProfile(DatasetProfile):
+    """Profile of a frame whose columns are profiled the first time something reads them.
+
+    Used for memory-mapped columnar uploads, where profiling every column up front
+    would read the whole file before the first tab renders.
+    """
+
+    def __init__(self, df, sample_size=QUANTILE_SAMPLE_SIZE):
+        super().__init__(len(df), {})
+        self._frame = df
+        self._sample_size = sample_size
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        self.profile_columns([name])
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self._frame.columns
+
+    def __iter__(self):
+        return iter(self._frame.columns)
+
+    def profile_columns(self, names):
+        todo = [name for name in names if name not in self.columns]
+        if todo:
+            profiled = profile_frame(self._frame, todo, self._sample_size).columns
+            with self._lock:
+                self.columns.update(profiled)
+
+    def merge(self, other):
+        self.profile_columns(list(self))
+        return DatasetProfile(self.rows, dict(self.columns)).merge(other)
@@ -0,0 +1,124 @@
+import io
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from config import COLUMNAR_CLASSIFY_ROWS
+
+
+# Rows per record batch when streaming a Parquet upload
+PARQUET_BATCH_ROWS = 65536
+
+
+def read_columnar_upload(uploaded_file, reader):
+    """Arrow table from a Parquet or Feather upload, decoded in full"""
+    source = io.BytesIO(uploaded_file.getvalue())
+    if reader == 'parquet':
+        return pq.read_table(source)
+    return feather.read_table(source)
+
+
+def _plain_schema(schema):
+    """schema with dictionary columns stored as their value type"""
+    return pa.schema([
+        field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+        for field in schema
+    ], metadata=schema.metadata)
+
+
+def iter_columnar_batches(uploaded_file, reader):
+    """(schema, record batches) of a Parquet or Feather upload, decoded one batch at a time.
+
+    Parquet row groups may each carry their own dictionary, which an IPC file cannot
+    replace mid-file, so dictionary columns are decoded to their values.
+    """
+    source = io.BytesIO(uploaded_file.getvalue())
+    if reader == 'parquet':
+        parquet = pq.ParquetFile(source)
+        schema = _plain_schema(parquet.schema_arrow)
+        batches = (batch.cast(schema) if batch.schema != schema else batch
+                   for batch in parquet.iter_batches(batch_size=PARQUET_BATCH_ROWS))
+        return schema, batches
+    try:
+        ipc_reader = ipc.open_file(source)
+    except pa.ArrowInvalid:
+        # Feather version 1 files are not IPC files and are read whole
+        table = feather.read_table(source)
+        return table.schema, iter(table.to_batches())
+    return ipc_reader.schema, (ipc_reader.get_batch(i) for i in range(ipc_reader.num_record_batches))
+
+
+def arrow_dtype(arrow_type):
+    """types_mapper keeping columns Arrow-backed; dictionary columns become pandas categoricals"""
+    if pa.types.is_dictionary(arrow_type):
+        return None
+    return pd.ArrowDtype(arrow_type)
+
+
+def write_ipc_batches(schema, batches, path):
+    """Write record batches as an uncompressed Arrow IPC file so it can be memory-mapped without decoding"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with ipc.new_file(sink, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    os.replace(tmp_path, path)
+
+
+def write_ipc(table, path):
+    """Write a table as an uncompressed Arrow IPC file"""
+    write_ipc_batches(table.schema, table.to_batches(), path)
+
+
+def classify_table(table, sample_rows=COLUMNAR_CLASSIFY_ROWS):
+    """Numerical, categorical and text columns from the schema plus a leading slice of string columns"""
+    head = table.slice(0, sample_rows)
+    numerical, categorical, text = [], [], []
+    for field in table.schema:
+        kind = field.type
+        if pa.types.is_dictionary(kind):
+            kind = kind.value_type
+        if pa.types.is_integer(kind) or pa.types.is_floating(kind):
+            numerical.append(field.name)
+        elif pa.types.is_boolean(kind):
+            categorical.append(field.name)
+        elif pa.types.is_string(kind) or pa.types.is_large_string(kind):
+            values = head.column(field.name).to_pandas(types_mapper=arrow_dtype)
+            lengths = values.str.len().dropna()
+            # Same rules as for CSV uploads, applied to the sampled rows
+            if values.nunique() > len(values) * 0.3 or (len(lengths) and lengths.mean() > 30):
+                text.append(field.name)
+            else:
+                categorical.append(field.name)
+    return numerical, categorical, text
+
+
+class ColumnarStore:
+    """Memory-mapped Arrow IPC file exposed to pandas without copying column buffers.
+
+    Pages are read from disk only when a column's values are touched, so opening a
+    wide file costs the schema and footer, not a parse of every column.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._source = pa.memory_map(path, 'r')
+        self.table = ipc.open_file(self._source).read_all()
+
+    @property
+    def num_rows(self):
+        return self.table.num_rows
+
+    @property
+    def column_names(self):
+        return self.table.column_names
+
+    def column(self, name):
+        return self.table.column(name).to_pandas(types_mapper=arrow_dtype)
+
+    def to_frame(self):
+        """DataFrame of ArrowDtype columns that wrap the mapped buffers"""
+        return self.table.to_pandas(types_mapper=arrow_dtype)
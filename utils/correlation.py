@@ -0,0 +1,187 @@
+import warnings
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster, leaves_list, linkage
+from scipy.spatial.distance import squareform
+from config import (CORRELATION_BLOCK_COLUMNS, CORRELATION_CACHE_MAX_ENTRIES, KENDALL_SAMPLE_ROWS,
+                    CORRELATION_MAX_CLUSTERS)
+from utils.cache import LRUCache, content_fingerprint
+
+CORRELATION_METHODS = ['pearson', 'spearman', 'kendall']
+
+# Row pairs times columns held per matrix product when computing Kendall's tau
+KENDALL_PAIR_BLOCK = 2000000
+
+# Correlation matrices keyed by (dataset fingerprint, variant, method, columns), and their
+# clusterings in a cache of their own so caching one never evicts a matrix
+_correlation_cache = LRUCache(max_entries=CORRELATION_CACHE_MAX_ENTRIES)
+_cluster_cache = LRUCache(max_entries=CORRELATION_CACHE_MAX_ENTRIES)
+
+
+def _blocks(p, size):
+    return [(start, min(start + size, p)) for start in range(0, p, size)]
+
+
+def pearson_matrix(values, block_size=CORRELATION_BLOCK_COLUMNS):
+    """Pairwise-complete Pearson correlation of the columns of a float array with NaNs.
+
+    Sums over the rows where both columns are present come from matrix products of
+    the centred values and the presence mask, one block of columns against another,
+    so no Python loop runs over column pairs.
+    """
+    valid = ~np.isnan(values)
+    with warnings.catch_warnings():
+        # All-missing columns have no mean; they end up with NaN correlations
+        warnings.simplefilter('ignore', RuntimeWarning)
+        means = np.nanmean(values, axis=0)
+    # Centring first keeps the sums of squares from cancelling catastrophically
+    centred = np.where(valid, values - means, 0.0)
+    mask = valid.astype(float)
+    squares = centred ** 2
+    p = values.shape[1]
+    corr = np.empty((p, p))
+    complete = valid.all()
+
+    for i0, i1 in _blocks(p, block_size):
+        for j0, j1 in _blocks(p, block_size):
+            if j0 < i0:
+                continue
+            xy = centred[:, i0:i1].T @ centred[:, j0:j1]
+            if complete:
+                cov = xy
+                variances = np.outer(squares[:, i0:i1].sum(axis=0), squares[:, j0:j1].sum(axis=0))
+            else:
+                n = mask[:, i0:i1].T @ mask[:, j0:j1]
+                sx = centred[:, i0:i1].T @ mask[:, j0:j1]
+                sy = mask[:, i0:i1].T @ centred[:, j0:j1]
+                sxx = squares[:, i0:i1].T @ mask[:, j0:j1]
+                syy = mask[:, i0:i1].T @ squares[:, j0:j1]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    cov = xy - sx * sy / n
+                    variances = (sxx - sx ** 2 / n) * (syy - sy ** 2 / n)
+                variances[n < 2] = 0
+            # Constant columns and pairs with fewer than two shared rows have no correlation
+            with np.errstate(divide='ignore', invalid='ignore'):
+                block = np.where(variances > 0, cov / np.sqrt(variances), np.nan)
+            block = np.clip(block, -1, 1)
+            corr[i0:i1, j0:j1] = block
+            corr[j0:j1, i0:i1] = block.T
+    return corr
+
+
+def kendall_matrix(values, sample_rows=KENDALL_SAMPLE_ROWS, seed=0):
+    """Kendall's tau-b for every column pair on a row sample, NaN-aware.
+
+    Each row pair contributes the sign of its difference per column; concordance
+    and tie counts for all column pairs are then matrix products of those signs.
+    """
+    if values.shape[0] > sample_rows:
+        rng = np.random.default_rng(seed)
+        values = values[np.sort(rng.choice(values.shape[0], size=sample_rows, replace=False))]
+    first, second = np.triu_indices(values.shape[0], 1)
+    p = values.shape[1]
+    concordance = np.zeros((p, p))
+    untied = np.zeros((p, p))
+    step = max(1, KENDALL_PAIR_BLOCK // max(p, 1))
+    for start in range(0, first.size, step):
+        a = values[first[start:start + step]]
+        b = values[second[start:start + step]]
+        valid = ~(np.isnan(a) | np.isnan(b))
+        signs = np.where(valid, np.sign(a - b), 0.0)
+        concordance += signs.T @ signs
+        # Pairs untied in one column among those present in the other
+        untied += (signs != 0).astype(float).T @ valid.astype(float)
+    ties = untied * untied.T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.clip(np.where(ties > 0, concordance / np.sqrt(ties), np.nan), -1, 1)
+
+
+def correlation_matrix(df, columns, method='pearson'):
+    """Correlation matrix of numeric columns as a DataFrame, like df[columns].corr(method).
+
+    Pearson matches pandas exactly. Spearman ranks each column once over its present
+    values, where pandas re-ranks every pair over their shared rows, so the two differ
+    slightly for columns with missing values. Kendall is computed on a row sample of
+    frames longer than KENDALL_SAMPLE_ROWS; correlation_note describes both.
+    """
+    values = df[columns].to_numpy(dtype=float, na_value=np.nan)
+    values[~np.isfinite(values)] = np.nan
+    if method == 'spearman':
+        # Ranks are taken over each column's present values
+        values = pd.DataFrame(values).rank().to_numpy()
+        matrix = pearson_matrix(values)
+    elif method == 'kendall':
+        matrix = kendall_matrix(values)
+    elif method == 'pearson':
+        matrix = pearson_matrix(values)
+    else:
+        raise ValueError(f"Unknown correlation method: {method}")
+    return pd.DataFrame(matrix, index=columns, columns=columns)
+
+
+def kendall_standard_error(rows):
+    """Standard error of Kendall's tau over rows observations of independent columns"""
+    return np.sqrt(2 * (2 * rows + 5) / (9 * rows * (rows - 1))) if rows > 1 else np.nan
+
+
+def correlation_note(rows, method, has_missing):
+    """Caption for a matrix that is not exactly df.corr(method) of a frame with rows rows, or None"""
+    if method == 'kendall' and rows > KENDALL_SAMPLE_ROWS:
+        return (f"Kendall's tau is estimated from a uniform sample of {KENDALL_SAMPLE_ROWS:,} of "
+                f"{rows:,} rows (standard error about {kendall_standard_error(KENDALL_SAMPLE_ROWS):.3f}).")
+    if method == 'spearman' and has_missing:
+        return ("Columns with missing values are ranked once over all their present values rather "
+                "than per pair of columns, so values can differ slightly from pairwise-complete ranks.")
+    return None
+
+
+def correlation_key(columns, method, dataset_key):
+    """Cache key of a correlation matrix, shared with the figures drawn from it"""
+    return dataset_key + (method, content_fingerprint('\x00'.join(map(str, columns)).encode('utf-8')))
+
+
+def get_correlation(df, columns, method, dataset_key):
+    """Correlation matrix cached per dataset, method and column set"""
+    columns = list(columns)
+    key = correlation_key(columns, method, dataset_key)
+    corr = _correlation_cache.get(key)
+    if corr is None:
+        corr = correlation_matrix(df, columns, method)
+        _correlation_cache.put(key, corr)
+    return corr
+
+
+def cluster_columns(corr, max_clusters=CORRELATION_MAX_CLUSTERS):
+    """(column positions in dendrogram order, cluster label per column) from average-linkage
+    clustering on 1 - |r|, so strongly correlated columns, of either sign, sit together"""
+    p = corr.shape[0]
+    if p < 3:
+        return np.arange(p), np.ones(p, dtype=np.int64)
+    distance = 1 - np.abs(np.nan_to_num(corr.to_numpy(), nan=0.0))
+    np.fill_diagonal(distance, 0)
+    tree = linkage(squareform(distance.clip(min=0), checks=False), method='average')
+    return leaves_list(tree), fcluster(tree, t=max_clusters, criterion='maxclust')
+
+
+def get_clusters(corr, key, max_clusters=CORRELATION_MAX_CLUSTERS):
+    """Clustering of a cached correlation matrix, cached alongside it"""
+    cluster_key = key + (max_clusters,)
+    clusters = _cluster_cache.get(cluster_key)
+    if clusters is None:
+        clusters = cluster_columns(corr, max_clusters)
+        _cluster_cache.put(cluster_key, clusters)
+    return clusters
+
+
+def top_pairs(corr, k=5):
+    """The k column pairs with the largest |r|, found with argpartition on the upper triangle"""
+    rows, cols = np.triu_indices(corr.shape[0], 1)
+    strength = np.abs(corr.to_numpy()[rows, cols])
+    strength[np.isnan(strength)] = -1
+    k = min(k, strength.size)
+    if k == 0:
+        return []
+    top = np.argpartition(-strength, k - 1)[:k]
+    top = top[np.argsort(-strength[top], kind='stable')]
+    names = corr.columns
+    return [(names[rows[i]], names[cols[i]], corr.iat[rows[i], cols[i]]) for i in top if strength[i] >= 0]
@@ -1,7 +1,32 @@
 import streamlit as st
 import pandas as pd
 import nltk
-from config import REQUIRED_NLTK_RESOURCES
+import pyarrow as pa
+from config import (REQUIRED_NLTK_RESOURCES, INGEST_CACHE_MAX_ENTRIES, STREAMING_THRESHOLD_MB,
+                    STREAMING_CHUNK_ROWS, STREAMING_SAMPLE_ROWS, SPILL_CACHE_DIR, SPILL_CACHE_MAX_MB)
+from utils.cache import LRUCache, content_fingerprint
+from utils.streaming_loader import stream_csv
+from utils.column_profile import profile_frame, LazyDatasetProfile
+from utils.columnar_store import read_columnar_upload, iter_columnar_batches, classify_table, arrow_dtype
+from utils.spill_cache import SpillCache
+from utils.memory_optimizer import optimize_dtypes
+from utils.row_hash import row_hashes, count_duplicates
+from utils.type_inference import infer_feature_types
+from utils.memory_budget import mark_mapped, register_shared, register_mapped_source
+
+# Parsed uploads keyed by content fingerprint, shared by all sessions
+_ingest_cache = LRUCache(max_entries=INGEST_CACHE_MAX_ENTRIES)
+register_shared(_ingest_cache.values)
+
+# The same uploads converted to Arrow on disk, memory-mapped when they are uploaded again
+_spill_cache = SpillCache(SPILL_CACHE_DIR, SPILL_CACHE_MAX_MB * 1024 * 1024)
+
+# Layout of spilled sidecars; older ones are ignored and the upload is parsed again
+SPILL_FORMAT = 6
+
+# Entry fields written next to the spilled frame
+SPILLED_KEYS = ('numerical_features', 'categorical_features', 'text_features', 'metadata', 'profile',
+                'descriptive_stats', 'row_hashes', 'arrow_backed', 'dtypes')
 
 def initialize_session_state():
     """Initialize session state variables if not already defined"""
@@ -19,6 +44,28 @@ def initialize_session_state():
         st.session_state.metadata = {}
     if 'descriptive_stats' not in st.session_state:
         st.session_state.descriptive_stats = {}
+    if 'profile' not in st.session_state:
+        st.session_state.profile = None
+    if 'processed_profile' not in st.session_state:
+        st.session_state.processed_profile = None
+    if 'data_fingerprint' not in st.session_state:
+        st.session_state.data_fingerprint = None
+    if 'processed_fingerprint' not in st.session_state:
+        st.session_state.processed_fingerprint = None
+    if 'pipeline' not in st.session_state:
+        st.session_state.pipeline = None
+    if 'preprocessing_options' not in st.session_state:
+        st.session_state.preprocessing_options = {}
+    if 'upload_key' not in st.session_state:
+        st.session_state.upload_key = None
+    if 'row_hashes' not in st.session_state:
+        st.session_state.row_hashes = None
+    if 'approximate_mode' not in st.session_state:
+        st.session_state.approximate_mode = False
+    if 'streaming_ingest' not in st.session_state:
+        st.session_state.streaming_ingest = False
+    if 'unspillable_frames' not in st.session_state:
+        st.session_state.unspillable_frames = set()
 
 def download_dependencies():
     """Download required NLTK and spaCy resources"""
@@ -31,53 +78,260 @@ def download_dependencies():
 
    
 
+def get_parser_options(uploaded_file):
+    """Return the options used to parse an upload; they are part of the cache key"""
+    if uploaded_file.name.endswith('.csv'):
+        size_mb = uploaded_file.size / (1024 * 1024)
+        if st.session_state.streaming_ingest or size_mb > STREAMING_THRESHOLD_MB:
+            return {'reader': 'csv', 'chunksize': STREAMING_CHUNK_ROWS, 'sample_rows': STREAMING_SAMPLE_ROWS}
+        return {'reader': 'csv'}
+    if uploaded_file.name.endswith('.parquet'):
+        return {'reader': 'parquet'}
+    if uploaded_file.name.endswith(('.feather', '.arrow')):
+        return {'reader': 'feather'}
+    return {'reader': 'excel'}
+
+def describe_columnar(table):
+    """Feature lists and metadata of an Arrow table from its schema, null counts and a leading
+    slice; columns are profiled when first used"""
+    numerical_features, categorical_features, text_features = classify_table(table)
+    metadata = {
+        'rows': table.num_rows,
+        'columns': table.num_columns,
+        # A duplicate scan reads every column; the report fills it in when built
+        'duplicates': None,
+        'missing_values': sum(column.null_count for column in table.columns),
+        'memory_usage': table.nbytes / (1024 * 1024),  # MB, mapped rather than resident once spilled
+        'memory_usage_optimized': None,
+        'numerical_cols': len(numerical_features),
+        'categorical_cols': len(categorical_features),
+        'text_cols': len(text_features)
+    }
+    return {
+        'numerical_features': numerical_features,
+        'categorical_features': categorical_features,
+        'text_features': text_features,
+        'metadata': metadata,
+        'profile': None,
+        'descriptive_stats': None,
+        'row_hashes': None,
+        'arrow_backed': True,
+        'dtypes': None
+    }
+
+def open_columnar(uploaded_file, options):
+    """Read a whole Parquet/Feather upload into memory; used when it cannot be spilled"""
+    table = read_columnar_upload(uploaded_file, options['reader'])
+    return dict(describe_columnar(table), data=table)
+
+def frame_from_store(store, sidecar):
+    """Parquet/Feather uploads stay Arrow-backed over the mapped file; frames that pandas parsed
+    get their own dtypes back, so tabs and exports see the same dtypes on every load"""
+    if sidecar['arrow_backed']:
+        return mark_mapped(store.to_frame())
+    frame = store.table.to_pandas()
+    # Arrow's pandas metadata does not keep the storage of string dtypes
+    changed = {col: dtype for col, dtype in sidecar['dtypes'].items() if frame[col].dtype != dtype}
+    return frame.astype(changed) if changed else frame
+
+def restore_entry(data, sidecar, store=None):
+    """Ingest entry around a frame; columnar uploads get a profile that fills in per column"""
+    entry = dict(sidecar, data=data, store=store)
+    if entry['profile'] is None:
+        entry['profile'] = LazyDatasetProfile(data)
+    return entry
+
+def spill_entry(fingerprint, entry):
+    """Write a parsed upload to the spill cache and swap its frame for the memory-mapped copy"""
+    data = entry['data']
+    sidecar = {key: entry.get(key, False) for key in SPILLED_KEYS}
+    sidecar['dtypes'] = None if sidecar['arrow_backed'] else data.dtypes.to_dict()
+    try:
+        table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+        store = _spill_cache.put(fingerprint, table, dict(sidecar, format=SPILL_FORMAT))
+    except (pa.ArrowException, OSError):
+        # Mixed-type object columns Arrow cannot hold, or no room on disk: stay in memory
+        if isinstance(data, pa.Table):
+            data = data.to_pandas(types_mapper=arrow_dtype)
+        return restore_entry(data, sidecar)
+    if not sidecar['arrow_backed']:
+        # The parsed frame is already in memory with its own dtypes; the file serves re-uploads
+        return restore_entry(data, sidecar, store)
+    return restore_entry(frame_from_store(store, sidecar), sidecar, store)
+
+def spill_columnar(fingerprint, uploaded_file, options):
+    """Stream a Parquet/Feather upload into the spill cache batch by batch and describe it
+    from the memory-mapped copy, so the upload is never decoded into memory as a whole"""
+    uploaded_file.seek(0)
+    schema, batches = iter_columnar_batches(uploaded_file, options['reader'])
+    try:
+        store, sidecar = _spill_cache.put_batches(
+            fingerprint, schema, batches,
+            lambda store: dict(describe_columnar(store.table), format=SPILL_FORMAT)
+        )
+    except (pa.ArrowException, OSError):
+        return spill_entry(fingerprint, parse_upload(uploaded_file, options))
+    sidecar = {key: value for key, value in sidecar.items() if key != 'format'}
+    return restore_entry(frame_from_store(store, sidecar), sidecar, store)
+
+def load_spilled(fingerprint):
+    """Entry for an upload converted by an earlier parse, or None"""
+    spilled = _spill_cache.get(fingerprint)
+    if spilled is None:
+        return None
+    store, sidecar = spilled
+    if sidecar.pop('format', None) != SPILL_FORMAT:
+        return None
+    return restore_entry(frame_from_store(store, sidecar), sidecar, store)
+
+def map_upload(fingerprint):
+    """Memory-mapped frame over an upload's spill file, for the memory budget manager.
+
+    The shared ingest entry is switched to the mapped frame as well, so once every
+    session has let go of the parsed frame nothing keeps it in memory.
+    """
+    entry = _ingest_cache.get(fingerprint)
+    store = entry['store'] if entry is not None else None
+    if store is None:
+        spilled = _spill_cache.get(fingerprint)
+        if spilled is None or spilled[1].get('format') != SPILL_FORMAT:
+            return None
+        store = spilled[0]
+    data = mark_mapped(store.to_frame())
+    if entry is not None:
+        _ingest_cache.put(fingerprint, dict(entry, data=data, store=store))
+    return data
+
+register_mapped_source('data', map_upload)
+
+def parse_upload(uploaded_file, options):
+    """Parse an upload and derive its feature classification, metadata and stats"""
+    uploaded_file.seek(0)
+    if options['reader'] in ('parquet', 'feather'):
+        return open_columnar(uploaded_file, options)
+    if 'chunksize' in options:
+        return stream_csv(uploaded_file, options['chunksize'], options['sample_rows'])
+    
+    if options['reader'] == 'csv':
+        data = pd.read_csv(uploaded_file)
+    else:
+        data = pd.read_excel(uploaded_file)
+    
+    # Segregate features from a stratified sample; only ambiguous columns are scanned in full
+    numerical_features, categorical_features, text_features, inferences, conversions = infer_feature_types(data)
+    for col, values in conversions.items():
+        data[col] = values
+    
+    # Profile every column in one pass; tabs and the report read from it
+    profile = profile_frame(data)
+    
+    # Row hashes answer the duplicate count here and "Remove duplicates" later
+    hashes = row_hashes(data)
+    
+    # Calculate metadata
+    metadata = {
+        'rows': data.shape[0],
+        'columns': data.shape[1],
+        'duplicates': count_duplicates(data, hashes),
+        'missing_values': int(profile.missing(data.columns).sum()),
+        'memory_usage': data.memory_usage(deep=True).sum() / (1024 * 1024),  # MB
+        'memory_usage_optimized': None,
+        'numerical_cols': len(numerical_features),
+        'categorical_cols': len(categorical_features),
+        'text_cols': len(text_features),
+        'inferred_types': {col: inference.as_dict() for col, inference in inferences.items()}
+    }
+    
+    # Shrink the frame kept in memory once stats are taken at full precision
+    data = optimize_dtypes(data, numerical_features, categorical_features, text_features)
+    metadata['memory_usage_optimized'] = data.memory_usage(deep=True).sum() / (1024 * 1024)
+    
+    return {
+        'data': data,
+        'numerical_features': numerical_features,
+        'categorical_features': categorical_features,
+        'text_features': text_features,
+        'metadata': metadata,
+        'profile': profile,
+        'descriptive_stats': profile.describe(),
+        'row_hashes': hashes
+    }
+
 def load_data(uploaded_file):
-    """Load data from uploaded file and initialize features"""
+    """Load data from uploaded file and initialize features.
+    
+    Parsed uploads are cached by a hash of their bytes and parser options, so
+    reruns and re-uploads of the same file skip parsing entirely. Cached frames
+    are shared between sessions and must be treated as read-only.
+    """
     try:
+        # Same upload widget value and options as the previous rerun: nothing to do
+        options = get_parser_options(uploaded_file)
+        file_id = getattr(uploaded_file, 'file_id', None)
+        upload_key = (file_id, tuple(sorted(options.items())))
+        if (file_id is not None and upload_key == st.session_state.upload_key
+                and st.session_state.data is not None):
+            return True
         
-        if uploaded_file.name.endswith('.csv'):
-            data = pd.read_csv(uploaded_file)
-        else:
-            data = pd.read_excel(uploaded_file)
-        
-        st.session_state.data = data.copy()
+        fingerprint = content_fingerprint(uploaded_file.getvalue(), **options)
+        st.session_state.upload_key = upload_key
+        if fingerprint == st.session_state.data_fingerprint and st.session_state.data is not None:
+            return True
         
-        # Segregate features
-        numerical_features = data.select_dtypes(include=['int64', 'float64']).columns.tolist()
-        categorical_features = data.select_dtypes(include=['object', 'category', 'bool']).columns.tolist()
+        entry = _ingest_cache.get(fingerprint)
+        if entry is None:
+            entry = load_spilled(fingerprint)
+            if entry is None and options['reader'] in ('parquet', 'feather'):
+                entry = spill_columnar(fingerprint, uploaded_file, options)
+            elif entry is None:
+                entry = spill_entry(fingerprint, parse_upload(uploaded_file, options))
+            _ingest_cache.put(fingerprint, entry)
         
-        # Identify text features
-        text_features = []
-        for col in categorical_features[:]:  # Use a copy for iteration
-            if data[col].nunique() > data.shape[0] * 0.3:  # More than 30% unique values
-                text_features.append(col)
-                categorical_features.remove(col)
-            elif data[col].astype(str).str.len().mean() > 30:  # Average length > 30 chars
-                text_features.append(col)
-                categorical_features.remove(col)
+        st.session_state.data = entry['data']
+        st.session_state.numerical_features = list(entry['numerical_features'])
+        st.session_state.categorical_features = list(entry['categorical_features'])
+        st.session_state.text_features = list(entry['text_features'])
+        st.session_state.metadata = dict(entry['metadata'])
+        st.session_state.descriptive_stats = entry['descriptive_stats']
+        st.session_state.profile = entry['profile']
+        st.session_state.row_hashes = entry['row_hashes']
+        st.session_state.data_fingerprint = fingerprint
         
-        st.session_state.numerical_features = numerical_features
-        st.session_state.categorical_features = categorical_features
-        st.session_state.text_features = text_features
-        
-        # Calculate metadata
-        st.session_state.metadata = {
-            'rows': data.shape[0],
-            'columns': data.shape[1],
-            'duplicates': data.duplicated().sum(),
-            'missing_values': data.isnull().sum().sum(),
-            'memory_usage': data.memory_usage(deep=True).sum() / (1024 * 1024),  # MB
-            'numerical_cols': len(numerical_features),
-            'categorical_cols': len(categorical_features),
-            'text_cols': len(text_features)
-        }
-        
-        # Calculate descriptive stats
-        st.session_state.descriptive_stats = data.describe(include='all')
+        # Results derived from a previous upload no longer apply
+        st.session_state.processed_data = None
+        st.session_state.processed_profile = None
+        st.session_state.processed_fingerprint = None
+        st.session_state.pipeline = None
         
         return True
         
     except Exception as e:
         st.error(f"Error: {e}")
         st.session_state.data = None
-        return False
\ No newline at end of file
+        st.session_state.data_fingerprint = None
+        st.session_state.upload_key = None
+        return False
+
+def get_profile(df):
+    """Return the column profile for the original or processed frame"""
+    if df is st.session_state.data and st.session_state.profile is not None:
+        return st.session_state.profile
+    if df is st.session_state.processed_data:
+        if st.session_state.processed_profile is None:
+            st.session_state.processed_profile = profile_frame(df)
+        return st.session_state.processed_profile
+    return profile_frame(df)
+
+def get_dataset_key(df):
+    """Identify the original or processed frame for caches shared across reruns"""
+    if df is st.session_state.processed_data:
+        return (st.session_state.processed_fingerprint, 'processed')
+    return (st.session_state.data_fingerprint, 'original')
+
+def get_row_hashes(df):
+    """Row hashes of the original frame, kept in the session; other frames are hashed on the fly"""
+    if df is not st.session_state.data:
+        return row_hashes(df)
+    if st.session_state.row_hashes is None:
+        st.session_state.row_hashes = row_hashes(df)
+    return st.session_state.row_hashes
@@ -1,38 +1,414 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import numpy as np
 import streamlit as st
+import pandas as pd
+from utils.categorical_stats import default_workers, observed_value_counts
+from utils.data_loader import get_profile, get_row_hashes
+from utils.row_hash import duplicate_mask
+from utils.sketches import KLLSketch
+from utils.type_inference import parse_numbers
 
+# Fill strategies computed from the data, by the name DataFrame.agg knows them under
+AGGREGATE_FILLS = {"Mean": 'mean', "Median": 'median', "Mode": 'mode'}
 
-def preprocess_data(data, num_strategy, cat_strategy, duplicate_strategy):
-    """Preprocess data based on selected strategies"""
+# Fill strategies that use a constant
+CONSTANT_FILLS = {"Zero": 0, "Missing": "Missing"}
+
+# Version of the exported pipeline JSON layout; format 1 files predate 'parse_numbers' and
+# formats 1 and 2 predate 'string_columns'
+PIPELINE_FORMAT = 3
+READABLE_PIPELINE_FORMATS = (1, 2, 3)
+
+# Most frequent values that get an indicator column under one-hot encoding
+MAX_ONE_HOT_CATEGORIES = 50
+
+
+class Operator:
+    """A per-column transformation: fit learns parameters from a column, transform applies them.
+
+    kind says which feature list ('numerical' or 'categorical') the operator runs on.
+    transform returns a Series replacing the column or a DataFrame of new columns
+    added next to it.
+    """
+
+    label = None
+    kind = 'numerical'
+    adds_columns = False
+
+    def fit(self, series):
+        return {}
+
+    def transform(self, series, params):
+        raise NotImplementedError
+
+
+# Registered operators by label, in the order the sidebar offers them
+OPERATORS = {}
+
+
+def register_operator(cls):
+    """Make an operator available to plans and the sidebar under its label"""
+    OPERATORS[cls.label] = cls()
+    return cls
+
+
+@register_operator
+class StandardScaling(Operator):
+    label = "Standard scaling"
+
+    def fit(self, series):
+        return {'mean': float(series.mean()), 'std': float(series.std())}
+
+    def transform(self, series, params):
+        return (series - params['mean']) / (params['std'] or 1.0)
+
+
+@register_operator
+class RobustScaling(Operator):
+    label = "Robust scaling"
+
+    def fit(self, series):
+        q1, median, q3 = series.quantile([0.25, 0.5, 0.75]).astype(float)
+        return {'median': median, 'iqr': q3 - q1}
+
+    def transform(self, series, params):
+        return (series - params['median']) / (params['iqr'] or 1.0)
+
+
+@register_operator
+class IQRClipping(Operator):
+    label = "IQR outlier clipping"
+
+    def fit(self, series):
+        q1, q3 = series.quantile([0.25, 0.75]).astype(float)
+        return {'lower': q1 - 1.5 * (q3 - q1), 'upper': q3 + 1.5 * (q3 - q1)}
+
+    def transform(self, series, params):
+        return series.astype('float64').clip(params['lower'], params['upper'])
+
+
+@register_operator
+class ZScoreClipping(Operator):
+    label = "Z-score outlier clipping"
+
+    def fit(self, series, threshold=3.0):
+        mean, std = float(series.mean()), float(series.std())
+        return {'lower': mean - threshold * std, 'upper': mean + threshold * std}
+
+    def transform(self, series, params):
+        return series.astype('float64').clip(params['lower'], params['upper'])
+
+
+@register_operator
+class LogTransform(Operator):
+    label = "Log transform"
+
+    def fit(self, series):
+        # Shift negative columns so the smallest value maps to log1p(0)
+        return {'shift': max(0.0, -float(series.min()))}
+
+    def transform(self, series, params):
+        return np.log1p(series.astype('float64') + params['shift'])
+
+
+@register_operator
+class OneHotEncoding(Operator):
+    label = "One-hot encoding"
+    kind = 'categorical'
+    adds_columns = True
+
+    def fit(self, series):
+        return {'categories': observed_value_counts(series).index[:MAX_ONE_HOT_CATEGORIES].tolist()}
+
+    def transform(self, series, params):
+        categories = params['categories']
+        codes = pd.Categorical(series, categories=categories).codes
+        indicators = (codes[:, None] == np.arange(len(categories))).astype(np.uint8)
+        return pd.DataFrame(indicators, index=series.index,
+                            columns=[f"{series.name}_{category}" for category in categories])
+
+
+@register_operator
+class OrdinalEncoding(Operator):
+    label = "Ordinal encoding"
+    kind = 'categorical'
+
+    def fit(self, series):
+        return {'categories': sorted(observed_value_counts(series).index.tolist(), key=str)}
+
+    def transform(self, series, params):
+        codes = pd.Categorical(series, categories=params['categories']).codes.astype('float64')
+        # Missing and unseen values have no code
+        codes[codes < 0] = np.nan
+        return pd.Series(codes, index=series.index, name=series.name)
+
+
+def build_plan(profile, numerical_features, categorical_features, num_strategy, cat_strategy,
+               duplicate_strategy, verify_duplicates=False, operators=(), approximate=False,
+               parsed_columns=(), string_columns=()):
+    """Describe preprocessing as data: rows to drop, per fill strategy the columns it applies to,
+    and per column the operator labels to run in order.
+
+    parsed_columns are the columns ingest converted from numeric strings; the frame
+    already holds numbers, but the exported pipeline parses them again on raw files.
+    string_columns are read as strings from raw files, so a chunk whose values all look
+    like numbers still matches the categories fitted on them.
+
+    Fill values are fitted for every column of a strategy so the exported pipeline
+    covers them all, but only columns the ingest profile shows to have missing
+    values are filled in this frame. In approximate mode medians come from KLL sketches.
+    """
+    plan = {
+        'drop_duplicates': duplicate_strategy == "Remove duplicates",
+        'verify_duplicates': verify_duplicates,
+        'approximate': approximate,
+        'parse_numbers': list(parsed_columns),
+        'string_columns': list(string_columns),
+        'fills': {},
+        'missing': [],
+        'operators': {}
+    }
+    features_by_kind = {'numerical': numerical_features, 'categorical': categorical_features}
+    for kind in features_by_kind:
+        labels = [label for label in operators if OPERATORS[label].kind == kind]
+        adding = [label for label in labels[:-1] if OPERATORS[label].adds_columns]
+        if adding:
+            # Later operators would receive several new columns instead of the source column
+            raise ValueError(f"{adding[0]} adds columns, so it must be the last {kind} operator; "
+                             f"select {', '.join(labels[labels.index(adding[0]) + 1:])} before it")
+    for label in operators:
+        for col in features_by_kind[OPERATORS[label].kind]:
+            plan['operators'].setdefault(col, []).append(label)
+    for features, strategy in ((numerical_features, num_strategy), (categorical_features, cat_strategy)):
+        if features and (strategy in AGGREGATE_FILLS or strategy in CONSTANT_FILLS):
+            plan['fills'].setdefault(strategy, []).extend(features)
+            missing = profile.missing(features)
+            plan['missing'].extend(missing[missing > 0].index)
+    return plan
+
+
+@contextmanager
+def _timed(name, timings):
+    start = time.perf_counter()
+    yield
+    timings.append((name, time.perf_counter() - start))
+
+
+def _approximate_medians(frame, columns, profile=None):
+    """Medians from the ingest KLL sketches, or from sketches of the frame's columns when no
+    profile of these rows is available"""
+    medians = {}
+    for col in columns:
+        kll = profile[col].kll if profile is not None else None
+        if kll is None:
+            kll = KLLSketch().update(frame[col].to_numpy(dtype=float, na_value=np.nan))
+        median = kll.quantile(0.5)
+        if not np.isnan(median):
+            medians[col] = median
+    return medians
+
+
+def _fill_values(frame, fills, approximate=False, profile=None):
+    """Every fill value, with one aggregation call per statistic over all of its columns"""
+    values = {}
+    for strategy, columns in fills.items():
+        if strategy in CONSTANT_FILLS:
+            values.update(dict.fromkeys(columns, CONSTANT_FILLS[strategy]))
+        elif strategy == "Median" and approximate:
+            values.update(_approximate_medians(frame, columns, profile))
+        elif AGGREGATE_FILLS[strategy] == 'mode':
+            modes = frame[columns].mode()
+            if len(modes):
+                values.update(modes.iloc[0].dropna().to_dict())
+        else:
+            values.update(frame[columns].agg(AGGREGATE_FILLS[strategy]).dropna().to_dict())
+    return values
+
+
+def _prepare_dtypes(frame, values):
+    """Widen or extend the dtypes of columns that cannot hold their fill value as they are"""
+    casts = {}
+    categories = {}
+    for col, value in values.items():
+        dtype = frame[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            if value not in dtype.categories:
+                categories[col] = frame[col].cat.add_categories(value)
+        elif (pd.api.types.is_integer_dtype(dtype) and isinstance(value, float)
+              and not value.is_integer()):
+            # Arrow-backed integer columns keep their nulls; widen them so a mean or median fits
+            casts[col] = 'float64'
+    if casts:
+        frame = frame.astype(casts)
+    if categories:
+        frame = frame.assign(**categories)
+    return frame
+
+
+def fill_missing(frame, values):
+    """Apply fill values in one fillna, after adjusting the dtypes that need it"""
+    values = {col: value for col, value in values.items() if col in frame.columns}
+    return _prepare_dtypes(frame, values).fillna(values)
+
+
+def parse_numeric_columns(frame, columns):
+    """Convert columns holding numbers as strings, as ingest did; numeric columns are left alone"""
+    parsed = {col: parse_numbers(frame[col]) for col in columns
+              if col in frame.columns and not pd.api.types.is_numeric_dtype(frame[col])}
+    return frame.assign(**parsed) if parsed else frame
+
+
+def _apply_column(series, labels, fitted=None):
+    """Apply a column's operators in order, fitting each one unless fitted params are given.
+
+    Returns the output and the (label, params) steps applied; build_plan only lets
+    an operator adding columns come last.
+    """
+    output = series
+    steps = []
+    for i, label in enumerate(labels):
+        operator = OPERATORS[label]
+        params = operator.fit(output) if fitted is None else fitted[i][1]
+        output = operator.transform(output, params)
+        steps.append([label, params])
+    return output, steps
+
+
+def apply_operators(frame, operators, fitted=None, max_workers=None, keep_sources=True):
+    """Run every column's operator chain on a thread pool and assemble the result in one step.
+
+    operators maps columns to operator labels; with fitted (columns to the steps a
+    previous run returned) the stored params are applied instead of refitting.
+    Columns added by an encoder go after the frame's columns; the tabs still read the
+    source column, so it is dropped only with keep_sources=False.
+    Returns the new frame and the fitted steps per column.
+    """
+    columns = [col for col in operators if col in frame.columns]
+
+    def run(col):
+        return _apply_column(frame[col], operators[col], None if fitted is None else fitted[col])
+
+    with ThreadPoolExecutor(max_workers=max_workers or default_workers()) as pool:
+        results = dict(zip(columns, pool.map(run, columns)))
+    outputs = {col: output for col, (output, _) in results.items()}
+    replaced = {col: output for col, output in outputs.items() if isinstance(output, pd.Series)}
+    added = {col: output for col, output in outputs.items() if isinstance(output, pd.DataFrame)}
+    kept = [col for col in frame.columns if keep_sources or col not in added]
+    result = pd.DataFrame({col: replaced.get(col, frame[col]) for col in kept}, index=frame.index)
+    if added:
+        names = pd.Index(kept).append([output.columns for output in added.values()])
+        clashes = names[names.duplicated()].unique().tolist()
+        if clashes:
+            raise ValueError(f"Encoded columns would overwrite other columns: {', '.join(map(str, clashes))}")
+        result = pd.concat([result] + list(added.values()), axis=1)
+    return result, {col: steps for col, (_, steps) in results.items()}
+
+
+def encoded_sources(pipeline):
+    """Columns a fitted pipeline replaces with the columns an encoder added"""
+    return [col for col, steps in pipeline['operators'].items() if OPERATORS[steps[-1][0]].adds_columns]
+
+
+def export_frame(frame, pipeline):
+    """A processed frame as downloaded: encoded source columns are left out, as in batch output"""
+    sources = [col for col in encoded_sources(pipeline) if col in frame.columns]
+    return frame.drop(columns=sources) if sources else frame
+
+
+def execute_plan(data, plan, hashes=None, profile=None):
+    """Run a plan and return the new frame, the fitted pipeline and (step, seconds) timings.
+
+    profile, when given, describes data and supplies sketches in approximate mode.
+
+    The input frame is never modified: row filtering, dtype changes, the fused
+    fillna and operators all return new frames, so no defensive copy is taken up front.
+    """
+    timings = []
+    pipeline = {
+        'format': PIPELINE_FORMAT,
+        'drop_duplicates': plan['drop_duplicates'],
+        'parse_numbers': plan['parse_numbers'],
+        'string_columns': plan['string_columns'],
+        'fill_values': {},
+        'operators': {}
+    }
+    frame = data
+    if plan['drop_duplicates']:
+        with _timed("Remove duplicates", timings):
+            frame = frame[~duplicate_mask(data, hashes, verify=plan['verify_duplicates'])]
+    if plan['fills']:
+        with _timed("Compute fill values", timings):
+            # Ingest sketches describe the original rows only
+            sketches = profile if frame is data else None
+            pipeline['fill_values'] = _fill_values(frame, plan['fills'], plan['approximate'], sketches)
+        with _timed("Fill missing values", timings):
+            values = {col: pipeline['fill_values'][col] for col in plan['missing']
+                      if col in pipeline['fill_values']}
+            if values:
+                frame = fill_missing(frame, values)
+    if plan['operators']:
+        with _timed("Apply operators", timings):
+            frame, pipeline['operators'] = apply_operators(frame, plan['operators'])
+    if frame is data:
+        # Keep the processed frame a distinct object from the original
+        frame = data.copy(deep=False)
+    return frame, pipeline, timings
+
+
+def transform_frame(frame, pipeline):
+    """Apply a fitted pipeline's number parsing, fills and operators to new rows without refitting anything"""
+    frame = parse_numeric_columns(frame, pipeline['parse_numbers'])
+    if pipeline['fill_values']:
+        frame = fill_missing(frame, pipeline['fill_values'])
+    if pipeline['operators']:
+        operators = {col: [label for label, _ in steps] for col, steps in pipeline['operators'].items()}
+        frame, _ = apply_operators(frame, operators, fitted=pipeline['operators'], keep_sources=False)
+    return frame
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot store {type(value).__name__} in a pipeline")
+
+
+def dump_pipeline(pipeline):
+    """Serialize a fitted pipeline to JSON"""
+    return json.dumps(pipeline, default=_json_value, indent=2)
+
+
+def load_pipeline(text):
+    """Read a pipeline written by dump_pipeline"""
+    pipeline = json.loads(text)
+    if pipeline.get('format') not in READABLE_PIPELINE_FORMATS:
+        raise ValueError(f"Unsupported pipeline format: {pipeline.get('format')}")
+    pipeline.setdefault('parse_numbers', [])
+    pipeline.setdefault('string_columns', [])
+    return pipeline
+
+
+def preprocess_data(data, num_strategy, cat_strategy, duplicate_strategy, verify_duplicates=False,
+                    operators=(), approximate=False):
+    """Preprocess data based on selected strategies; returns the frame, fitted pipeline and per-step timings"""
     try:
-        # Create a copy of the original data
-        processed_data = data.copy()
-        
-        # Handle duplicates
-        if duplicate_strategy == "Remove duplicates":
-            initial_rows = processed_data.shape[0]
-            processed_data = processed_data.drop_duplicates()
-            
-        
-        # Handle missing values in numerical features
-        for col in st.session_state.numerical_features:
-            if processed_data[col].isnull().sum() > 0:
-                if num_strategy == "Mean":
-                    processed_data[col] = processed_data[col].fillna(processed_data[col].mean())
-                elif num_strategy == "Median":
-                    processed_data[col] = processed_data[col].fillna(processed_data[col].median())
-                elif num_strategy == "Zero":
-                    processed_data[col] = processed_data[col].fillna(0)
-        
-        # Handle missing values in categorical features
-        for col in st.session_state.categorical_features:
-            if processed_data[col].isnull().sum() > 0:
-                if cat_strategy == "Mode":
-                    processed_data[col] = processed_data[col].fillna(processed_data[col].mode()[0])
-                elif cat_strategy == "Missing":
-                    processed_data[col] = processed_data[col].fillna("Missing")
-        
-        return processed_data
-        
+        profile = get_profile(data)
+        inferred = st.session_state.metadata.get('inferred_types', {})
+        categorical = st.session_state.categorical_features
+        plan = build_plan(
+            profile,
+            st.session_state.numerical_features,
+            categorical,
+            num_strategy, cat_strategy, duplicate_strategy, verify_duplicates, operators, approximate,
+            parsed_columns=[col for col, inference in inferred.items() if inference['kind'] == 'numeric_string'],
+            # Booleans keep the True/False values pandas parses; other categories were strings
+            string_columns=[col for col in categorical if inferred.get(col, {}).get('kind') != 'boolean']
+        )
+        hashes = get_row_hashes(data) if plan['drop_duplicates'] else None
+        return execute_plan(data, plan, hashes, profile)
+
     except Exception as e:
         st.error(f"Error during preprocessing: {e}")
-        return None
\ No newline at end of file
+        return None, None, []
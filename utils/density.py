@@ -0,0 +1,59 @@
+import numpy as np
+
+BANDWIDTH_RULES = ['scott', 'silverman']
+
+
+def select_bandwidth(values, rule='scott'):
+    """Gaussian kernel bandwidth from a named rule of thumb or a fixed number"""
+    if not isinstance(rule, str):
+        return float(rule)
+    n = values.size
+    std = values.std(ddof=1) if n > 1 else 0.0
+    if rule == 'scott':
+        factor = n ** (-1 / 5)
+    elif rule == 'silverman':
+        factor = (n * 3 / 4) ** (-1 / 5)
+    else:
+        raise ValueError(f"Unknown bandwidth rule: {rule}")
+    return std * factor
+
+
+def fft_kde(values, grid_size=512, bandwidth='scott', cut=3):
+    """Gaussian KDE by linear binning onto a regular grid and FFT convolution.
+
+    Cost is O(n + grid_size log grid_size) instead of O(n * grid_size) for a
+    direct evaluation. Like seaborn, the grid extends `cut` bandwidths past the
+    data range. Returns (grid, density) with density integrating to one.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return np.zeros(0), np.zeros(0)
+    bw = select_bandwidth(values, bandwidth)
+    if not bw > 0:
+        # Constant data: no spread to estimate
+        return np.array([values[0]]), np.array([1.0])
+
+    lo = values.min() - cut * bw
+    hi = values.max() + cut * bw
+    grid = np.linspace(lo, hi, grid_size)
+    dx = grid[1] - grid[0]
+
+    # Linear binning: split each point's weight between its two neighbouring grid nodes
+    position = (values - lo) / dx
+    left = np.clip(np.floor(position).astype(np.int64), 0, grid_size - 2)
+    frac = position - left
+    weights = np.bincount(left, weights=1 - frac, minlength=grid_size)
+    weights += np.bincount(left + 1, weights=frac, minlength=grid_size)
+
+    # Kernel sampled on the grid, truncated where it is negligible
+    half = min(grid_size - 1, int(np.ceil(4 * bw / dx)))
+    offsets = np.arange(-half, half + 1) * dx
+    kernel = np.exp(-0.5 * (offsets / bw) ** 2)
+
+    size = grid_size + kernel.size - 1
+    n_fft = 1 << int(np.ceil(np.log2(size)))
+    smoothed = np.fft.irfft(np.fft.rfft(weights, n_fft) * np.fft.rfft(kernel, n_fft), n_fft)
+    density = smoothed[half:half + grid_size]
+    density = np.clip(density, 0, None) / (values.size * bw * np.sqrt(2 * np.pi))
+    return grid, density
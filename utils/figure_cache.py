@@ -0,0 +1,14 @@
+from config import FIGURE_CACHE_MAX_ENTRIES
+from utils.cache import LRUCache
+
+# Built Plotly figures keyed by (dataset fingerprint, variant, column, chart type)
+_figure_cache = LRUCache(max_entries=FIGURE_CACHE_MAX_ENTRIES)
+
+
+def cached_figure(key, build):
+    """Return the cached figure for key, building it on first use"""
+    fig = _figure_cache.get(key)
+    if fig is None:
+        fig = build()
+        _figure_cache.put(key, fig)
+    return fig
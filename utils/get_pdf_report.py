@@ -1,18 +1,160 @@
+import io
+import multiprocessing
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+import numpy as np
 import seaborn as sns
 from fpdf import FPDF
 import streamlit as st
-import tempfile
-import os
+from config import REPORT_WORKERS, REPORT_STORE_MAX_ENTRIES, REPORT_STORE_DIR
+from utils.column_profile import profile_frame
+from utils.density import fft_kde
+from utils.plot_aggregation import finite_values, histogram_bins
+from utils.data_loader import get_profile, get_dataset_key
+from utils.report_store import ReportStore, report_key
+from utils.memory_budget import register_shared
+from utils.row_hash import count_duplicates
 
-def generate_pdf_report(data, metadata, numerical_features, categorical_features, text_features):
+_chart_pool = None
+_init_lock = threading.Lock()
+
+# Report builds run here so the script thread never waits on them
+_report_executor = ThreadPoolExecutor(max_workers=2)
+
+# Generated reports shared by all sessions, keyed by dataset and processing state
+_report_store = ReportStore(REPORT_STORE_MAX_ENTRIES, REPORT_STORE_DIR)
+register_shared(_report_store.held)
+
+
+def _get_chart_pool():
+    global _chart_pool
+    with _init_lock:
+        if _chart_pool is None:
+            # Forking the threaded server process can copy locks held by other threads
+            _chart_pool = ProcessPoolExecutor(max_workers=REPORT_WORKERS,
+                                              mp_context=multiprocessing.get_context('spawn'))
+        return _chart_pool
+
+
+def _figure_png():
+    """Save the current matplotlib figure to PNG bytes and close it"""
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=100)
+    plt.close()
+    return buffer.getvalue()
+
+
+def histogram_with_kde(values):
+    """Bin counts and an FFT KDE curve scaled to counts, so workers only receive small arrays"""
+    values = finite_values(values)
+    counts, edges = histogram_bins(values)
+    grid, density = fft_kde(values)
+    width = edges[1] - edges[0] if len(edges) > 1 else 1.0
+    return counts, edges, grid, density * values.size * width
+
+
+def render_histogram_png(counts, edges, grid, curve, feature):
+    """Histogram chart with KDE line for the report; runs in a worker process"""
+    plt.figure(figsize=(5, 3))
+    if counts.size:
+        # Bins are already counted, so draw them directly rather than re-binning in seaborn
+        ax = plt.gca()
+        ax.stairs(counts, edges, fill=True, alpha=0.6, color='C0')
+        ax.plot(grid, curve, color='C0')
+        ax.set_ylabel('Count')
+        ax.set_xlabel(feature)
+    plt.title(f"Distribution of {feature}")
+    plt.tight_layout()
+    return _figure_png()
+
+
+def render_bar_png(labels, counts, feature):
+    """Top-values bar chart for the report; runs in a worker process"""
+    plt.figure(figsize=(5, 3))
+    sns.barplot(x=labels, y=counts)
+    plt.title(f"Top values: {feature}")
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+    return _figure_png()
+
+
+class ReportPDF(FPDF):
+    """FPDF that places images from in-memory PNG bytes instead of files"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_buffers = {}
+
+    def register_image(self, name, png):
+        self.image_buffers[name] = png
+
+    def load_resource(self, reason, filename):
+        if reason == "image" and filename in self.image_buffers:
+            return io.BytesIO(self.image_buffers[filename])
+        return super().load_resource(reason, filename)
+
+
+def _numerical_stats_rows(profile, numerical_features, stats_to_show, approximate=False):
+    """Formatted rows of the numerical statistics table"""
+    num_stats = profile.numerical_table(numerical_features, approximate).round(2)[stats_to_show]
+    rows = []
+    for feature in num_stats.index:
+        # Feature name (possibly truncated)
+        feat_name = str(feature)[:15] + "..." if len(str(feature)) > 15 else str(feature)
+        values = []
+        for stat in stats_to_show:
+            val = num_stats.loc[feature, stat]
+            values.append(f"{val:.2f}" if isinstance(val, float) else str(val))
+        rows.append((feat_name, values))
+    return rows
+
+
+def _value_count_tables(profile, categorical_features, approximate=False):
+    """Top 8 values, their counts and the distinct count for each reported categorical feature"""
+    tables = []
+    for feature in categorical_features[:5]:
+        value_counts = profile.value_counts(feature, 8)  # Show top 8 values
+        rows = []
+        for val, count in value_counts.items():
+            val_str = str(val)
+            if len(val_str) > 25:
+                val_str = val_str[:22] + "..."
+            rows.append((val_str, str(count)))
+        tables.append((feature, rows, profile[feature].distinct_count(approximate)))
+    return tables
+
+def generate_pdf_report(data, metadata, numerical_features, categorical_features, text_features, profile=None,
+                        approximate=False):
     """
     Generate a comprehensive PDF report with statistics and visualizations.
     Pre-generates the report and stores it in session state for quick download.
+    Statistics are read from the dataset profile, which is computed if not given.
     """
+    if profile is None:
+        profile = profile_frame(data)
+    
+    # Start every chart in a worker process and the table sections on threads,
+    # then lay the PDF out while they run
+    chart_pool = _get_chart_pool()
+    hist_jobs = [chart_pool.submit(render_histogram_png, *histogram_with_kde(data[feature]), feature)
+                 for feature in numerical_features[:6]]
+    bar_jobs = []
+    for feature in categorical_features[:4]:
+        top_cats = profile.value_counts(feature, 8)
+        bar_jobs.append(chart_pool.submit(render_bar_png, [str(v) for v in top_cats.index],
+                                          top_cats.to_numpy(), feature))
+    stats_to_show = ['count', 'mean', 'std', 'min', 'max']
+    with ThreadPoolExecutor(max_workers=2) as table_pool:
+        num_rows_job = table_pool.submit(_numerical_stats_rows, profile, numerical_features, stats_to_show,
+                                         approximate)
+        cat_tables_job = table_pool.submit(_value_count_tables, profile, categorical_features, approximate)
+    
     # Create PDF object with smaller margins to use more of the page
-    pdf = FPDF()
+    pdf = ReportPDF()
     pdf.set_auto_page_break(auto=True, margin=10)
     pdf.add_page()
     
@@ -89,8 +231,8 @@ def generate_pdf_report(data, metadata, numerical_features, categorical_features
     for i, row in df_preview.iterrows():
         for col in display_cols:
             val = row[col]
-            if isinstance(val, (int, float)):
-                val_str = f"{val:.2f}" if isinstance(val, float) else str(val)
+            if isinstance(val, (int, float, np.number)):
+                val_str = f"{val:.2f}" if isinstance(val, (float, np.floating)) else str(val)
             else:
                 val_str = str(val)
                 
@@ -113,12 +255,6 @@ def generate_pdf_report(data, metadata, numerical_features, categorical_features
         pdf.set_font("Arial", "B", 12)
         pdf.cell(190, 8, "Numerical Statistics", ln=True)
         
-        # Get statistics
-        num_stats = data[numerical_features].describe().round(2).T
-        # Select only key statistics to save space
-        stats_to_show = ['count', 'mean', 'std', 'min', 'max']
-        num_stats = num_stats[stats_to_show]
-        
         # Create a more compact table
         pdf.set_font("Arial", "B", 7)
         
@@ -134,15 +270,9 @@ def generate_pdf_report(data, metadata, numerical_features, categorical_features
         
         # Data rows
         pdf.set_font("Arial", "", 7)
-        for feature in num_stats.index:
-            # Feature name (possibly truncated)
-            feat_name = str(feature)[:15] + "..." if len(str(feature)) > 15 else str(feature)
+        for feat_name, values in num_rows_job.result():
             pdf.cell(feat_width, 6, feat_name, border=1)
-            
-            # Stats
-            for stat in stats_to_show:
-                val = num_stats.loc[feature, stat]
-                val_str = f"{val:.2f}" if isinstance(val, float) else str(val)
+            for val_str in values:
                 pdf.cell(stat_width, 6, val_str, border=1)
             pdf.ln()
         
@@ -152,36 +282,26 @@ def generate_pdf_report(data, metadata, numerical_features, categorical_features
         pdf.set_font("Arial", "B", 12)
         pdf.cell(190, 8, "Numerical Distributions", ln=True)
         
-        # Create a temporary directory for the images
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            # Create histograms (up to 6 for space considerations)
-            for i, feature in enumerate(numerical_features[:6]):
-                # Create histogram using seaborn
-                plt.figure(figsize=(5, 3))
-                sns.histplot(data[feature].dropna(), kde=True)
-                plt.title(f"Distribution of {feature}")
-                plt.tight_layout()
-                
-                # Save to temporary file
-                temp_img_path = os.path.join(tmpdirname, f"hist_{i}.png")
-                plt.savefig(temp_img_path, format='png', dpi=100)
-                plt.close()
-                
-                # Calculate position for 2 columns of plots
-                if i % 2 == 0:
-                    pdf.cell(95, 5, f"{feature}", ln=False)
-                    x = pdf.get_x()
-                    y = pdf.get_y()
-                    pdf.cell(95, 5, "", ln=True)
-                    pdf.image(temp_img_path, x=10, y=y+5, w=90)
-                else:
-                    pdf.cell(95, 5, f"{feature}", ln=True)
-                    pdf.image(temp_img_path, x=110, y=y+5, w=90)
-                    pdf.ln(50)  # Space for the plots
+        # Place histograms (up to 6 for space considerations) as their renders finish
+        for i, feature in enumerate(numerical_features[:6]):
+            image_name = f"hist_{i}.png"
+            pdf.register_image(image_name, hist_jobs[i].result())
             
-            # Add a page break only if there's an odd number of plots
-            if len(numerical_features[:6]) % 2 != 0:
-                pdf.ln(50)
+            # Calculate position for 2 columns of plots
+            if i % 2 == 0:
+                pdf.cell(95, 5, f"{feature}", ln=False)
+                x = pdf.get_x()
+                y = pdf.get_y()
+                pdf.cell(95, 5, "", ln=True)
+                pdf.image(image_name, x=10, y=y+5, w=90)
+            else:
+                pdf.cell(95, 5, f"{feature}", ln=True)
+                pdf.image(image_name, x=110, y=y+5, w=90)
+                pdf.ln(50)  # Space for the plots
+        
+        # Add a page break only if there's an odd number of plots
+        if len(numerical_features[:6]) % 2 != 0:
+            pdf.ln(50)
     
     # Categorical Statistics
     if categorical_features:
@@ -193,13 +313,10 @@ def generate_pdf_report(data, metadata, numerical_features, categorical_features
         pdf.cell(190, 8, "Categorical Statistics", ln=True)
         
         # For each categorical feature, show frequency table (up to 5 features)
-        for i, feature in enumerate(categorical_features[:5]):
+        for feature, rows, distinct in cat_tables_job.result():
             pdf.set_font("Arial", "B", 10)
             pdf.cell(190, 6, f"{feature} Value Counts:", ln=True)
             
-            # Get value counts
-            value_counts = data[feature].value_counts().head(8)  # Show top 8 values
-            
             # Create a table
             pdf.set_font("Arial", "", 8)
             
@@ -208,18 +325,14 @@ def generate_pdf_report(data, metadata, numerical_features, categorical_features
             pdf.cell(95, 6, "Count", border=1, ln=True)
             
             # Rows
-            for val, count in value_counts.items():
-                val_str = str(val)
-                if len(val_str) > 25:
-                    val_str = val_str[:22] + "..."
-                
+            for val_str, count_str in rows:
                 pdf.cell(95, 6, val_str, border=1)
-                pdf.cell(95, 6, str(count), border=1, ln=True)
+                pdf.cell(95, 6, count_str, border=1, ln=True)
             
             # Add note if there are more values
-            if len(data[feature].unique()) > 8:
+            if distinct > 8:
                 pdf.set_font("Arial", "I", 7)
-                pdf.cell(190, 4, f"Note: Only showing top 8 of {len(data[feature].unique())} unique values", ln=True)
+                pdf.cell(190, 4, f"Note: Only showing top 8 of {distinct} unique values", ln=True)
             
             pdf.ln(5)
         
@@ -227,36 +340,22 @@ def generate_pdf_report(data, metadata, numerical_features, categorical_features
         pdf.set_font("Arial", "B", 12)
         pdf.cell(190, 8, "Categorical Distributions", ln=True)
         
-        # Create a temporary directory for the images
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            # Create bar charts (up to 4 for space considerations)
-            for i, feature in enumerate(categorical_features[:4]):
-                # Get top 8 categories for readability
-                top_cats = data[feature].value_counts().head(8)
-                
-                # Create bar chart using seaborn
-                plt.figure(figsize=(5, 3))
-                sns.barplot(x=top_cats.index, y=top_cats.values)
-                plt.title(f"Top values: {feature}")
-                plt.xticks(rotation=45, ha='right')
-                plt.tight_layout()
-                
-                # Save to temporary file
-                temp_img_path = os.path.join(tmpdirname, f"bar_{i}.png")
-                plt.savefig(temp_img_path, format='png', dpi=100)
-                plt.close()
-                
-                # Position plots
-                if i % 2 == 0:
-                    pdf.cell(95, 5, f"{feature}", ln=False)
-                    x = pdf.get_x()
-                    y = pdf.get_y()
-                    pdf.cell(95, 5, "", ln=True)
-                    pdf.image(temp_img_path, x=10, y=y+5, w=90)
-                else:
-                    pdf.cell(95, 5, f"{feature}", ln=True)
-                    pdf.image(temp_img_path, x=110, y=y+5, w=90)
-                    pdf.ln(50)  # Space for the plots
+        # Place bar charts (up to 4 for space considerations)
+        for i, feature in enumerate(categorical_features[:4]):
+            image_name = f"bar_{i}.png"
+            pdf.register_image(image_name, bar_jobs[i].result())
+            
+            # Position plots
+            if i % 2 == 0:
+                pdf.cell(95, 5, f"{feature}", ln=False)
+                x = pdf.get_x()
+                y = pdf.get_y()
+                pdf.cell(95, 5, "", ln=True)
+                pdf.image(image_name, x=10, y=y+5, w=90)
+            else:
+                pdf.cell(95, 5, f"{feature}", ln=True)
+                pdf.image(image_name, x=110, y=y+5, w=90)
+                pdf.ln(50)  # Space for the plots
     
     # Footer
     pdf.set_y(-15)
@@ -266,34 +365,96 @@ def generate_pdf_report(data, metadata, numerical_features, categorical_features
     # Return the PDF bytes
     return pdf.output(dest='S').encode('latin1')
 
+def _report_metadata(data, metadata, profile):
+    """Metadata for a processed frame, derived from its own rows and profile"""
+    return dict(
+        metadata,
+        rows=profile.rows,
+        missing_values=int(profile.missing(data.columns).sum()),
+        duplicates=count_duplicates(data)
+    )
+
+def build_report(data, metadata, numerical_features, categorical_features, text_features, profile, processed,
+                 approximate=False):
+    """Background entry point: fill in processed metadata, then generate the PDF"""
+    if processed or metadata.get('duplicates') is None:
+        metadata = _report_metadata(data, metadata, profile)
+    return generate_pdf_report(data, metadata, numerical_features, categorical_features, text_features, profile,
+                               approximate)
+
 # The function to be called from your Streamlit app
 def setup_pdf_download_button():
-    """Set up a simple one-click PDF download button using Streamlit's download_button"""
+    """Set up a one-click PDF download button; reports are built in the background and stored by dataset"""
     if 'data' in st.session_state and st.session_state.data is not None:
-        # Check if PDF is already generated
-        if 'pdf_data' not in st.session_state:
-           
-            try:
-                # Generate the PDF and store in session state
-                pdf_data = generate_pdf_report(
-                    st.session_state.data,
-                    st.session_state.metadata,
-                    st.session_state.numerical_features,
-                    st.session_state.categorical_features,
-                    st.session_state.text_features
-                )
-                
-                # Store raw bytes in session state
-                st.session_state.pdf_data = pdf_data
-            except Exception as e:
-                st.error(f"Error generating PDF: {str(e)}")
-                return
+        processed = False
+        if st.session_state.processed_data is not None:
+            report_option = st.radio(
+                "Report data:",
+                ["Original Data", "Processed Data"],
+                horizontal=True,
+                key="report_data_option"
+            )
+            processed = report_option == "Processed Data"
         
-        # Display simple download button
-        st.download_button(
-            label="Download PDF Report",
-            data=st.session_state.pdf_data,
-            file_name="data_analysis_report.pdf",
-            mime="application/pdf",
-            key="download_pdf_button"
-        )
\ No newline at end of file
+        data = st.session_state.processed_data if processed else st.session_state.data
+        fingerprint, variant = get_dataset_key(data)
+        options = dict(st.session_state.preprocessing_options if processed else {},
+                       approximate=st.session_state.approximate_mode)
+        key = report_key(fingerprint, variant, options)
+        
+        # Reports for unchanged data come straight from the store; changed data triggers a build
+        result = _report_store.request(
+            key, _report_executor, build_report,
+            data,
+            st.session_state.metadata,
+            st.session_state.numerical_features,
+            st.session_state.categorical_features,
+            st.session_state.text_features,
+            get_profile(data),
+            processed,
+            st.session_state.approximate_mode
+        )
+        st.session_state.pdf_request = result
+        st.session_state.pdf_request_key = key
+        
+        if not isinstance(result, bytes) and not result.done() and hasattr(st, 'fragment'):
+            # Poll only the button area until the report is ready
+            st.fragment(run_every=2)(poll_pdf_request)()
+        else:
+            render_pdf_download_button()
+
+def poll_pdf_request():
+    """Wait for the pending report; once it is done, rerun the app so the button is drawn
+    outside the polling fragment and polling stops"""
+    result = st.session_state.get('pdf_request')
+    if result is None or isinstance(result, bytes) or result.done():
+        st.rerun()
+    st.caption("Preparing PDF report...")
+
+def render_pdf_download_button():
+    """Show the download button once the requested report is available"""
+    result = st.session_state.get('pdf_request')
+    if result is None:
+        return
+    if not isinstance(result, bytes):
+        if not result.done():
+            st.caption("Preparing PDF report...")
+            return
+        try:
+            result = result.result()
+        except Exception as e:
+            st.error(f"Error generating PDF: {str(e)}")
+            # Failed builds are not retried on every rerun; only on request
+            if st.button("Retry PDF report", key="retry_pdf_button"):
+                _report_store.discard_failure(st.session_state.pdf_request_key)
+                st.rerun()
+            return
+    
+    # Display simple download button
+    st.download_button(
+        label="Download PDF Report",
+        data=result,
+        file_name="data_analysis_report.pdf",
+        mime="application/pdf",
+        key="download_pdf_button"
+    )
\ No newline at end of file
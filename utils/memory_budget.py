@@ -0,0 +1,206 @@
+import threading
+import time
+import weakref
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from config import (SESSION_MEMORY_BUDGET_MB, GLOBAL_MEMORY_BUDGET_MB, SESSION_SPILL_DIR, SESSION_SPILL_MAX_MB,
+                    SESSION_IDLE_SECONDS)
+from utils.spill_cache import SpillCache
+
+MB = 1024 * 1024
+
+# Session frames that may be swapped for a memory-mapped copy, coldest first, and the
+# fingerprint that identifies each one's content
+SPILLABLE_KEYS = ('data', 'processed_data')
+FINGERPRINT_KEYS = {'data': 'data_fingerprint', 'processed_data': 'processed_fingerprint'}
+
+# Frames spilled by any session, keyed by fingerprint so sessions holding the same result share a file
+_session_spill = SpillCache(SESSION_SPILL_DIR, SESSION_SPILL_MAX_MB * MB)
+
+# Session state entries not charged to the session: report bytes live in the shared
+# report store, which is counted once for the whole process
+UNCHARGED_KEYS = ('pdf_request',)
+
+# Frames backed by memory-mapped files, and measured sizes of frames, by id; weak
+# references tell a live entry from a reused id
+_mapped = {}
+_sizes = {}
+
+# Process-wide caches holding frames or reports, as callables returning the objects they hold
+_shared_holders = []
+
+# Per spillable key, a callable returning a memory-mapped copy of the frame with a given
+# fingerprint from a file that already exists, or None
+_mapped_sources = {}
+
+# Resident bytes by object id and time of the last rerun per session id
+_usage = {}
+_lock = threading.Lock()
+
+
+def _remember(registry, obj, value):
+    key = id(obj)
+    registry[key] = (weakref.ref(obj, lambda _: registry.pop(key, None)), value)
+
+
+def _recall(registry, obj):
+    entry = registry.get(id(obj))
+    if entry is None or entry[0]() is not obj:
+        return None
+    return entry[1]
+
+
+def mark_mapped(frame):
+    """Record that a frame wraps memory-mapped buffers: its pages can be dropped by the OS at any time"""
+    _remember(_mapped, frame, True)
+    return frame
+
+
+def register_shared(holder):
+    """Count the objects holder() returns towards the global budget, e.g. a cache's values"""
+    _shared_holders.append(holder)
+
+
+def register_mapped_source(key, source):
+    """Let spill_frame map frames stored under key from source(fingerprint) instead of writing them out"""
+    _mapped_sources[key] = source
+
+
+def frame_bytes(frame):
+    """Bytes of a frame's columns, measured once per frame"""
+    size = _recall(_sizes, frame)
+    if size is None:
+        # Frames are not modified in place once stored, so deep sizing runs once per frame
+        size = int(frame.memory_usage(deep=True).sum())
+        _remember(_sizes, frame, size)
+    return size
+
+
+def mapped_bytes(value):
+    """Bytes of a frame that wraps memory-mapped files, else 0"""
+    return frame_bytes(value) if isinstance(value, pd.DataFrame) and _recall(_mapped, value) else 0
+
+
+def resident_bytes(value):
+    """Heap bytes an object keeps in memory; small objects count as 0.
+
+    Memory-mapped frames count as 0 too: their pages are file-backed page cache that
+    the kernel reclaims under pressure, so they are reported separately (mapped_bytes)
+    instead of being charged to a budget.
+    """
+    if isinstance(value, pd.DataFrame):
+        return 0 if _recall(_mapped, value) else frame_bytes(value)
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return 0
+
+
+def session_usage():
+    """Resident bytes of each session state entry that holds any"""
+    usage = {}
+    for key in st.session_state:
+        if key in UNCHARGED_KEYS:
+            continue
+        size = resident_bytes(st.session_state[key])
+        if size:
+            usage[key] = size
+    return usage
+
+
+def _held_objects(values):
+    """Resident bytes by object id, so an object several holders share is counted once"""
+    held = {}
+    for value in values:
+        if isinstance(value, dict) and 'data' in value:
+            # Ingest cache entries hold their frame under 'data'
+            value = value['data']
+        size = resident_bytes(value)
+        if size:
+            held[id(value)] = size
+    return held
+
+
+def _record(session_id, objects):
+    """Store the objects a session holds and return (bytes held by all active sessions and
+    the shared caches, number of active sessions)"""
+    now = time.monotonic()
+    shared = _held_objects(value for holder in _shared_holders for value in holder())
+    with _lock:
+        _usage[session_id] = (objects, now)
+        for other, (_, seen) in list(_usage.items()):
+            if now - seen > SESSION_IDLE_SECONDS:
+                del _usage[other]
+        for held, _ in _usage.values():
+            shared.update(held)
+        return sum(shared.values()), len(_usage)
+
+
+def spill_frame(key):
+    """Swap a session frame for a memory-mapped copy; pages are read back from disk when touched.
+
+    Uploads are mapped from the file the loader already converted them to, which also
+    releases the shared ingest cache's copy; other frames are written out once.
+    Returns False when the frame has no fingerprint or Arrow cannot hold its columns.
+    """
+    fingerprint = st.session_state.get(FINGERPRINT_KEYS[key])
+    if fingerprint is None or fingerprint in st.session_state.unspillable_frames:
+        return False
+    source = _mapped_sources.get(key)
+    mapped = source(fingerprint) if source is not None else None
+    if mapped is not None:
+        st.session_state[key] = mapped
+        return True
+    spilled = _session_spill.get(fingerprint)
+    if spilled is None:
+        try:
+            table = pa.Table.from_pandas(st.session_state[key])
+            store = _session_spill.put(fingerprint, table, {'key': key})
+        except (pa.ArrowException, OSError):
+            # Mixed-type object columns, or no room on disk: keep the frame and stop retrying it
+            st.session_state.unspillable_frames.add(fingerprint)
+            return False
+    else:
+        store = spilled[0]
+    # The mapped copy has Arrow-backed dtypes; that is the price of not holding the frame
+    st.session_state[key] = mark_mapped(store.to_frame())
+    return True
+
+
+def _session_objects():
+    return _held_objects(st.session_state[key] for key in st.session_state if key not in UNCHARGED_KEYS)
+
+
+def enforce_memory_budget():
+    """Spill this session's cold frames while it is over its budget; returns (resident bytes,
+    memory-mapped bytes) of the session.
+
+    The global total covers every active session plus the shared ingest cache and report
+    store, counting each object once. Sessions cannot safely touch each other's state,
+    so when the server is over the global budget each session shrinks to its share of
+    it on its own next rerun; the shared caches stay bounded by their entry limits.
+    """
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if ctx is not None else None
+    usage = session_usage()
+    total = sum(usage.values())
+    server_total, sessions = _record(session_id, _session_objects())
+
+    limit = SESSION_MEMORY_BUDGET_MB * MB
+    if server_total > GLOBAL_MEMORY_BUDGET_MB * MB:
+        limit = min(limit, GLOBAL_MEMORY_BUDGET_MB * MB // sessions)
+    for key in SPILLABLE_KEYS:
+        if total <= limit:
+            break
+        if usage.get(key) and spill_frame(key):
+            total -= usage[key]
+
+    _record(session_id, _session_objects())
+    mapped = sum(mapped_bytes(st.session_state[key]) for key in st.session_state)
+    return total, mapped
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    TEXT_DTYPE = None
+
+
+def _downcast_numeric(series):
+    """Smallest integer width, or float32 when every value survives the round trip"""
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(series) and series.dtype != np.float32:
+        narrow = series.astype(np.float32)
+        original = series.to_numpy()
+        if np.array_equal(narrow.to_numpy().astype(series.dtype), original, equal_nan=True):
+            return narrow
+    return series
+
+
+def optimize_dtypes(data, numerical_features, categorical_features, text_features):
+    """Shrink a freshly loaded frame: downcast numerics, categorize low-cardinality columns
+    and store text columns as Arrow-backed strings. Runs after feature classification,
+    so the feature lists are unaffected by the new dtypes."""
+    columns = {}
+    for col in data.columns:
+        series = data[col]
+        if col in numerical_features:
+            series = _downcast_numeric(series)
+        elif col in categorical_features and series.dtype == object:
+            series = series.astype('category')
+        elif col in text_features and series.dtype == object and TEXT_DTYPE is not None:
+            series = series.astype(TEXT_DTYPE)
+        columns[col] = series
+    return pd.DataFrame(columns, index=data.index)
@@ -0,0 +1,121 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from config import NGRAM_CACHE_MAX_ENTRIES, NGRAM_COUNTER_CAPACITY, NGRAM_SHARD_ROWS, NGRAM_WORKERS
+from utils.cache import LRUCache
+
+_ngram_cache = LRUCache(max_entries=NGRAM_CACHE_MAX_ENTRIES)
+
+
+class SpaceSavingCounter:
+    """Space-Saving heavy-hitters counter tracking at most about 2 * `capacity` items.
+
+    Trimming is batched: once the table doubles, everything below the top
+    `capacity` is evicted and `floor` records the largest evicted count. A new
+    item starts at `floor`, so counts overestimate by at most their error and
+    every item more frequent than total / capacity is guaranteed to be kept.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.floor = 0
+        self.counts = {}
+        self.errors = {}
+
+    def add(self, item, count=1):
+        if item in self.counts:
+            self.counts[item] += count
+            return
+        self.counts[item] = self.floor + count
+        self.errors[item] = self.floor
+        if len(self.counts) > 2 * self.capacity:
+            self._trim()
+
+    def update(self, items):
+        for item, count in Counter(items).items():
+            self.add(item, count)
+
+    def _trim(self):
+        ranked = sorted(self.counts, key=self.counts.get, reverse=True)
+        for item in ranked[self.capacity:]:
+            self.floor = max(self.floor, self.counts.pop(item))
+            self.errors.pop(item)
+
+    def merge(self, other):
+        """Combine two counters; items missing on one side are charged that side's floor"""
+        merged = SpaceSavingCounter(self.capacity)
+        merged.floor = self.floor + other.floor
+        for item in self.counts.keys() | other.counts.keys():
+            merged.counts[item] = (self.counts.get(item, self.floor) + other.counts.get(item, other.floor))
+            merged.errors[item] = (self.errors.get(item, self.floor) + other.errors.get(item, other.floor))
+        if len(merged.counts) > merged.capacity:
+            merged._trim()
+        return merged
+
+    def most_common(self, k):
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def count_shard(index, start_row, end_row, n, mask, capacity):
+    """Count the n-grams of a range of rows from the token index; runs on a worker thread"""
+    lo, hi = index.offsets[start_row], index.offsets[end_row]
+    ids = index.ids[lo:hi]
+    rows = np.repeat(np.arange(start_row, end_row), index.row_lengths()[start_row:end_row])
+
+    # Drop stop words and non-alphabetic tokens, then keep windows inside one row
+    keep = mask[ids]
+    ids, rows = ids[keep].astype(np.int64), rows[keep]
+    counter = SpaceSavingCounter(capacity)
+    if ids.size < n:
+        return counter
+    starts = np.flatnonzero(rows[:ids.size - n + 1] == rows[n - 1:])
+
+    # Encode each n-gram as one integer so numpy can count them in a single sort
+    vocab_size = len(index.vocab)
+    if vocab_size ** n < 2 ** 63:
+        keys = np.zeros(starts.size, dtype=np.int64)
+        for offset in range(n):
+            keys = keys * vocab_size + ids[starts + offset]
+        keys, counts = np.unique(keys, return_counts=True)
+        grams = np.stack(np.unravel_index(keys, (vocab_size,) * n), axis=1)
+    else:
+        windows = np.stack([ids[starts + offset] for offset in range(n)], axis=1)
+        grams, counts = np.unique(windows, axis=0, return_counts=True)
+
+    # Only the shard's most frequent n-grams enter its counter
+    top = np.argsort(-counts, kind='stable')[:2 * capacity]
+    for gram, count in zip(index.vocab[grams[top]], counts[top].tolist()):
+        counter.add(tuple(gram), count)
+    if top.size < counts.size:
+        counter.floor = max(counter.floor, int(counts[top[-1]]))
+    return counter
+
+
+def top_ngrams(index, n, stop_words, k=20, cache_key=None):
+    """Top-k n-grams from a token index; n-grams never span two rows.
+
+    Row shards are counted in parallel and summarized by bounded-memory
+    Space-Saving counters that are merged at the end. Results are cached under
+    (cache_key, n, stop words).
+    """
+    stop_words = frozenset(stop_words)
+    key = (cache_key, n, stop_words) if cache_key is not None else None
+    if key is not None and key in _ngram_cache:
+        return _ngram_cache.get(key)
+
+    mask = index.vocab_mask(stop_words)
+    bounds = list(range(0, index.rows, NGRAM_SHARD_ROWS)) + [index.rows]
+    shards = list(zip(bounds[:-1], bounds[1:]))
+    with ThreadPoolExecutor(max_workers=NGRAM_WORKERS) as pool:
+        counters = list(pool.map(
+            lambda shard: count_shard(index, shard[0], shard[1], n, mask, NGRAM_COUNTER_CAPACITY), shards
+        ))
+
+    merged = SpaceSavingCounter(NGRAM_COUNTER_CAPACITY)
+    for counter in counters:
+        merged = merged.merge(counter)
+
+    result = merged.most_common(k)
+    if key is not None:
+        _ngram_cache.put(key, result)
+    return result
@@ -0,0 +1,273 @@
+import numpy as np
+import plotly.colors
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from config import DENSITY_GRID_SIZE
+from utils.density import fft_kde
+
+# Upper bound on histogram bins and on outlier points drawn per box
+MAX_BINS = 200
+MAX_OUTLIERS = 500
+
+# Categories shaded individually in density scatter plots; the rest are grouped
+MAX_DENSITY_CATEGORIES = 10
+
+
+def finite_values(values):
+    """Float array of the non-missing values of a Series or array"""
+    if hasattr(values, 'to_numpy'):
+        values = values.to_numpy(dtype=float, na_value=np.nan)
+    values = np.asarray(values, dtype=float)
+    return values[np.isfinite(values)]
+
+
+def histogram_bins(values, bins='auto'):
+    """Bin counts and edges computed on the server"""
+    if values.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(1)
+    edges = np.histogram_bin_edges(values, bins=bins)
+    if len(edges) > MAX_BINS + 1:
+        edges = np.histogram_bin_edges(values, bins=MAX_BINS)
+    counts, edges = np.histogram(values, bins=edges)
+    return counts, edges
+
+
+def box_stats(values, seed=0):
+    """Quartiles, Tukey whiskers and a bounded sample of outliers"""
+    if values.size == 0:
+        return None
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    outliers = values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)]
+    if outliers.size > MAX_OUTLIERS:
+        # Always keep the extremes so the axis range matches the data
+        rng = np.random.default_rng(seed)
+        picked = rng.choice(outliers, size=MAX_OUTLIERS - 2, replace=False)
+        outliers = np.concatenate([[outliers.min(), outliers.max()], picked])
+    return {
+        'q1': q1, 'median': median, 'q3': q3,
+        'lowerfence': inside.min(), 'upperfence': inside.max(),
+        'mean': values.mean(), 'outliers': outliers
+    }
+
+
+def box_traces(stats, name, orientation='v', showlegend=False, position=None):
+    """A precomputed go.Box plus its outliers as a marker trace"""
+    position = [name if position is None else position]
+    box = go.Box(
+        q1=[stats['q1']], median=[stats['median']], q3=[stats['q3']],
+        lowerfence=[stats['lowerfence']], upperfence=[stats['upperfence']],
+        mean=[stats['mean']], name=str(name), boxpoints=False, showlegend=showlegend,
+        orientation=orientation, marker_color='#636efa',
+        **({'x': position} if orientation == 'v' else {'y': position})
+    )
+    points = stats['outliers']
+    placed = position * points.size
+    outliers = go.Scatter(
+        x=placed if orientation == 'v' else points,
+        y=points if orientation == 'v' else placed,
+        mode='markers', marker=dict(color='#636efa', size=4), name=str(name),
+        showlegend=False, hoverinfo='x+y'
+    )
+    return [box, outliers]
+
+
+def histogram_figure(values, title, x_label, marginal_box=True, kde_bandwidth=None):
+    """Histogram (optionally with a box marginal and KDE overlay) whose payload does not depend on row count"""
+    values = finite_values(values)
+    counts, edges = histogram_bins(values)
+    bars = go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+        marker_color='#636efa', name=x_label, showlegend=False
+    )
+    kde_line = None
+    if kde_bandwidth is not None and values.size:
+        grid, density = fft_kde(values, bandwidth=kde_bandwidth)
+        kde_line = go.Scatter(
+            x=grid, y=density * values.size * (edges[1] - edges[0]), mode='lines',
+            line=dict(color='#EF553B'), name='KDE', showlegend=False
+        )
+    stats = box_stats(values) if marginal_box else None
+
+    if stats is None:
+        fig = go.Figure(bars)
+        if kde_line is not None:
+            fig.add_trace(kde_line)
+        fig.update_xaxes(title_text=x_label)
+        fig.update_yaxes(title_text='count')
+    else:
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+        for trace in box_traces(stats, x_label, orientation='h'):
+            fig.add_trace(trace, row=1, col=1)
+        fig.add_trace(bars, row=2, col=1)
+        if kde_line is not None:
+            fig.add_trace(kde_line, row=2, col=1)
+        fig.update_yaxes(showticklabels=False, row=1, col=1)
+        fig.update_xaxes(title_text=x_label, row=2, col=1)
+        fig.update_yaxes(title_text='count', row=2, col=1)
+
+    fig.update_layout(title=title, template="plotly_white", bargap=0)
+    return fig
+
+
+def box_figure(values, title, y_label):
+    """Single box plot from precomputed quartiles and whiskers"""
+    fig = go.Figure()
+    stats = box_stats(finite_values(values))
+    if stats is not None:
+        fig.add_traces(box_traces(stats, y_label))
+    fig.update_layout(title=title, template="plotly_white", yaxis_title=y_label)
+    return fig
+
+
+def grouped_box_figure(df, cat_feature, num_feature, categories, title):
+    """One precomputed box per category"""
+    fig = go.Figure()
+    groups = dict(iter(df.groupby(cat_feature, observed=True)[num_feature]))
+    for category in categories:
+        if category not in groups:
+            continue
+        stats = box_stats(finite_values(groups[category]))
+        if stats is not None:
+            fig.add_traces(box_traces(stats, str(category)))
+    fig.update_layout(title=title, template="plotly_white", xaxis_title=cat_feature, yaxis_title=num_feature)
+    return fig
+
+
+def _hex_to_rgb(color):
+    color = color.lstrip('#')
+    return np.array([int(color[i:i + 2], 16) for i in (0, 2, 4)], dtype=float)
+
+
+def density_scatter_figure(df, x_feature, y_feature, color_by, title, size=DENSITY_GRID_SIZE):
+    """Rasterize a scatter plot into a density grid on the server instead of sending every point.
+
+    Without a color column the grid is drawn as a log-scaled heatmap. With one,
+    each cell blends the category colors by their share of the cell's points
+    and its opacity follows the log of the cell's total count.
+    """
+    columns = [x_feature, y_feature] + ([color_by] if color_by else [])
+    points = df[columns].dropna()
+    x = points[x_feature].to_numpy(dtype=float)
+    y = points[y_feature].to_numpy(dtype=float)
+    ranges = [[x.min(), x.max()], [y.min(), y.max()]] if len(points) else None
+    total, x_edges, y_edges = np.histogram2d(x, y, bins=size, range=ranges)
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+
+    if not color_by:
+        z = np.where(total > 0, np.log10(total + 1), np.nan).T
+        fig = go.Figure(go.Heatmap(
+            x=x_centers, y=y_centers, z=z, customdata=total.T, colorscale='Viridis',
+            colorbar=dict(title='log10(count + 1)'),
+            hovertemplate=f"{x_feature}: %{{x}}<br>{y_feature}: %{{y}}<br>points: %{{customdata:.0f}}<extra></extra>"
+        ))
+    else:
+        labels = points[color_by].astype(str)
+        top = labels.value_counts().index[:MAX_DENSITY_CATEGORIES]
+        labels = labels.where(labels.isin(top), 'Others')
+        palette = plotly.colors.qualitative.Plotly
+        mixed = np.zeros(total.shape + (3,))
+        fig = go.Figure()
+        for i, category in enumerate(labels.unique()):
+            selected = (labels == category).to_numpy()
+            counts, _, _ = np.histogram2d(x[selected], y[selected], bins=[x_edges, y_edges])
+            color = palette[i % len(palette)]
+            mixed += counts[..., None] * _hex_to_rgb(color)
+            # Legend entry only; the points themselves are in the image
+            fig.add_trace(go.Scatter(x=[None], y=[None], mode='markers', name=category,
+                                     marker=dict(color=color, size=10)))
+
+        filled = total > 0
+        mixed[filled] /= total[filled][:, None]
+        alpha = np.log1p(total) / np.log1p(total.max()) if total.max() > 0 else total
+        alpha = (0.15 + 0.85 * alpha) * filled
+        image = 255 * (1 - alpha[..., None]) + mixed * alpha[..., None]
+        # Image rows run top to bottom, i.e. from the largest y downwards
+        fig.add_trace(go.Image(
+            z=np.transpose(image, (1, 0, 2))[::-1].astype(np.uint8),
+            x0=x_centers[0], dx=x_centers[1] - x_centers[0] if size > 1 else 1,
+            y0=y_centers[-1], dy=-(y_centers[1] - y_centers[0]) if size > 1 else -1,
+            hoverinfo='skip'
+        ))
+        fig.update_yaxes(autorange=True)
+        fig.update_layout(legend_title_text=color_by)
+
+    fig.update_layout(title=title, template="plotly_white", xaxis_title=x_feature, yaxis_title=y_feature)
+    return fig
+
+
+def density_violin_figure(df, cat_feature, num_feature, categories, title, bins=DENSITY_GRID_SIZE):
+    """Violin shapes from server-side FFT KDEs on a shared grid, with precomputed boxes inside"""
+    fig = go.Figure()
+    values = finite_values(df[num_feature])
+    if values.size == 0:
+        return fig
+    edges = np.histogram_bin_edges(values, bins=bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    groups = dict(iter(df.groupby(cat_feature, observed=True)[num_feature]))
+    shown = [category for category in categories if category in groups]
+    palette = plotly.colors.qualitative.Plotly
+
+    for position, category in enumerate(shown):
+        group = finite_values(groups[category])
+        if group.size == 0:
+            continue
+        grid, group_density = fft_kde(group)
+        density = np.interp(centers, grid, group_density, left=0, right=0)
+        if not density.max() > 0:
+            continue
+        half_width = 0.4 * density / density.max()
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([position - half_width, (position + half_width)[::-1]]),
+            y=np.concatenate([centers, centers[::-1]]),
+            fill='toself', mode='lines', line=dict(color=palette[0], width=1),
+            name=str(category), showlegend=False, hoverinfo='name'
+        ))
+        fig.add_traces(box_traces(box_stats(group), str(category), position=position))
+
+    fig.update_traces(width=0.1, selector=dict(type='box'))
+    fig.update_layout(title=title, template="plotly_white", xaxis_title=cat_feature, yaxis_title=num_feature,
+                      xaxis=dict(tickmode='array', tickvals=list(range(len(shown))),
+                                 ticktext=[str(category) for category in shown]))
+    return fig
+
+
+def block_means(matrix, edges):
+    """Mean of the non-missing cells in each block of a square matrix cut at edges on both axes"""
+    present = ~np.isnan(matrix)
+    starts = edges[:-1]
+    sums = np.add.reduceat(np.add.reduceat(np.where(present, matrix, 0.0), starts, axis=0), starts, axis=1)
+    counts = np.add.reduceat(np.add.reduceat(present.astype(float), starts, axis=0), starts, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def correlation_heatmap_figure(corr, order, title, max_size):
+    """Heatmap of a correlation matrix in the given column order, with at most max_size
+    cells per axis: wider matrices are drawn as mean r over blocks of adjacent columns"""
+    names = corr.columns[order]
+    matrix = corr.to_numpy()[np.ix_(order, order)]
+    p = len(names)
+    if p <= max_size:
+        labels = [str(name) for name in names]
+        values = matrix
+        hover = 'x: %{x}<br>y: %{y}<br>r: %{z:.3f}<extra></extra>'
+    else:
+        edges = np.unique(np.linspace(0, p, max_size + 1).astype(np.int64))
+        values = block_means(matrix, edges)
+        labels = [
+            str(names[lo]) if hi - lo == 1 else f"{names[lo]} … {names[hi - 1]} ({hi - lo})"
+            for lo, hi in zip(edges[:-1], edges[1:])
+        ]
+        hover = 'x: %{x}<br>y: %{y}<br>mean r: %{z:.3f}<extra></extra>'
+    fig = go.Figure(go.Heatmap(
+        z=values, x=labels, y=labels, zmin=-1, zmax=1, colorscale='RdBu_r',
+        colorbar=dict(title='Correlation'), hovertemplate=hover
+    ))
+    fig.update_layout(title=title, template="plotly_white", yaxis_autorange='reversed')
+    if p > max_size:
+        fig.update_xaxes(showticklabels=False)
+        fig.update_yaxes(showticklabels=False)
+    return fig
@@ -0,0 +1,96 @@
+import os
+import threading
+from utils.cache import LRUCache, content_fingerprint
+
+
+def report_key(dataset_fingerprint, variant, options=None):
+    """Key a report by the dataset content, original/processed choice and preprocessing options"""
+    return content_fingerprint(dataset_fingerprint.encode('utf-8'), variant=variant,
+                               options=sorted((options or {}).items()))
+
+
+class ReportStore:
+    """LRU store of generated PDF reports, optionally persisted to a directory.
+
+    A build that raises is remembered by key, so reruns show its error instead of
+    rebuilding until the failure is discarded.
+    """
+
+    def __init__(self, max_entries, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self._memory = LRUCache(max_entries=max_entries)
+        self._pending = {}
+        self._failed = LRUCache(max_entries=max_entries)
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key):
+        pdf = self._memory.get(key)
+        if pdf is None and self.directory and os.path.exists(self._path(key)):
+            with open(self._path(key), 'rb') as f:
+                pdf = f.read()
+            os.utime(self._path(key))
+            self._memory.put(key, pdf)
+        return pdf
+
+    def held(self):
+        """PDF bytes kept in memory, for memory accounting"""
+        return self._memory.values()
+
+    def put(self, key, pdf):
+        self._memory.put(key, pdf)
+        if self.directory:
+            tmp_path = self._path(key) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(pdf)
+            os.replace(tmp_path, self._path(key))
+            self._evict_files()
+
+    def _evict_files(self):
+        """Drop the least recently used report files beyond max_entries"""
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                 if name.endswith('.pdf')]
+        if len(paths) <= self.max_entries:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def request(self, key, executor, build, *args):
+        """Return the stored report, or the future of a build shared by every caller asking for key"""
+        pdf = self.get(key)
+        if pdf is not None:
+            return pdf
+        with self._lock:
+            future = self._pending.get(key) or self._failed.get(key)
+            if future is None:
+                future = executor.submit(self._build, key, build, *args)
+                self._pending[key] = future
+            return future
+
+    def discard_failure(self, key):
+        """Forget a failed build so the next request for key builds again"""
+        with self._lock:
+            self._failed.pop(key)
+
+    def _build(self, key, build, *args):
+        try:
+            pdf = build(*args)
+            self.put(key, pdf)
+            return pdf
+        except Exception:
+            with self._lock:
+                # The pending future is about to hold this exception; later requests get it as is
+                self._failed.put(key, self._pending.get(key))
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
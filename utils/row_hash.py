@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+
+# Integers of at most this magnitude are exactly representable as float64
+EXACT_FLOAT_INT = 2 ** 53
+
+
+def _hash_values(series):
+    """Numeric columns as float64 where that is exact: hashes see the raw bits, and pandas
+    parses the same column as int64 or float64 depending on whether a chunk has missing values"""
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series) and len(series):
+        low, high = series.min(), series.max()
+        if not (pd.isna(low) or (-EXACT_FLOAT_INT <= low and high <= EXACT_FLOAT_INT)):
+            return series
+    return pd.Series(series.to_numpy(dtype=np.float64, na_value=np.nan), index=series.index)
+
+
+def row_hashes(df):
+    """One 64-bit hash per row over every column's values, ignoring the index and numeric dtypes"""
+    columns = {position: _hash_values(df.iloc[:, position]) for position in range(df.shape[1])}
+    return pd.util.hash_pandas_object(pd.DataFrame(columns, index=df.index), index=False).to_numpy()
+
+
+def duplicate_mask(df, hashes=None, verify=False):
+    """Rows repeating an earlier row, like df.duplicated(), decided from row hashes.
+
+    Equal rows always share a hash, so with verify=True only rows whose hash
+    occurs more than once are compared value by value to rule out collisions.
+    """
+    hashes = pd.Series(row_hashes(df) if hashes is None else hashes)
+    if not verify:
+        return hashes.duplicated().to_numpy()
+    repeated = hashes.duplicated(keep=False).to_numpy()
+    mask = np.zeros(len(hashes), dtype=bool)
+    if repeated.any():
+        mask[repeated] = df[repeated].duplicated().to_numpy()
+    return mask
+
+
+def count_duplicates(df, hashes=None, verify=False):
+    return int(duplicate_mask(df, hashes, verify).sum())
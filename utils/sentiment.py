@@ -0,0 +1,133 @@
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from textblob import TextBlob
+from config import CACHE_DIR, SENTIMENT_BATCH_SIZE, SENTIMENT_WORKERS
+
+# sqlite limits the number of bound parameters per statement
+_SQL_BATCH = 900
+
+_pool = None
+_init_lock = threading.Lock()
+
+
+def text_hash(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def score_batch(texts):
+    """Polarity and subjectivity for a batch of texts; runs in a worker process"""
+    scores = []
+    for text in texts:
+        sentiment = TextBlob(text).sentiment
+        scores.append((sentiment.polarity, sentiment.subjectivity))
+    return scores
+
+
+class SentimentStore:
+    """Persistent text-hash -> (polarity, subjectivity) store shared by all sessions"""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sentiment "
+                "(hash TEXT PRIMARY KEY, polarity REAL, subjectivity REAL)"
+            )
+            self._conn.commit()
+
+    def get_many(self, hashes):
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), _SQL_BATCH):
+                batch = hashes[start:start + _SQL_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, polarity, subjectivity FROM sentiment WHERE hash IN ({placeholders})", batch
+                )
+                found.update((h, (p, s)) for h, p, s in rows)
+        return found
+
+    def put_many(self, items):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sentiment (hash, polarity, subjectivity) VALUES (?, ?, ?)",
+                [(h, p, s) for h, (p, s) in items]
+            )
+            self._conn.commit()
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    with _init_lock:
+        if _store is None:
+            _store = SentimentStore(os.path.join(CACHE_DIR, 'sentiment.sqlite3'))
+        return _store
+
+
+def _get_pool():
+    global _pool
+    with _init_lock:
+        if _pool is None:
+            # Forking the threaded server process would copy the open sqlite connection and
+            # locks held by other threads into the workers
+            _pool = ProcessPoolExecutor(max_workers=SENTIMENT_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def iter_sentiment(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    """Score a Series of texts, yielding (scored, total, scores) after each completed batch.
+
+    Identical texts are scored once, results already in the persistent store are
+    reused and the rest are scored in batches on a process pool. 'scores' maps
+    each unique text to (polarity, subjectivity) for everything scored so far.
+    """
+    unique_texts = pd.unique(texts.to_numpy())
+    hashes = [text_hash(text) for text in unique_texts]
+    text_by_hash = dict(zip(hashes, unique_texts))
+    store = get_store()
+
+    cached = store.get_many(hashes)
+    scores = {text_by_hash[h]: value for h, value in cached.items()}
+    total = len(unique_texts)
+    yield len(scores), total, scores
+
+    pending = [h for h in hashes if h not in cached]
+    if not pending:
+        return
+
+    pool = _get_pool()
+    futures = {}
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        futures[pool.submit(score_batch, [text_by_hash[h] for h in batch])] = batch
+
+    for future in as_completed(futures):
+        batch = futures[future]
+        results = list(zip(batch, future.result()))
+        store.put_many(results)
+        scores.update((text_by_hash[h], value) for h, value in results)
+        yield len(scores), total, scores
+
+
+def sentiment_frame(texts, scores):
+    """Per-row sentiment table for the texts scored so far"""
+    polarity = texts.map({text: value[0] for text, value in scores.items()})
+    subjectivity = texts.map({text: value[1] for text, value in scores.items()})
+    scored = polarity.notna()
+    shown = texts[scored]
+    return pd.DataFrame({
+        'text': shown.where(shown.str.len() <= 100, shown.str[:100] + '...').to_numpy(),
+        'polarity': polarity[scored].to_numpy(),
+        'subjectivity': subjectivity[scored].to_numpy()
+    })
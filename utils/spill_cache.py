@@ -0,0 +1,102 @@
+import os
+import pickle
+import threading
+import pyarrow as pa
+from utils.cache import private_directory
+from utils.columnar_store import ColumnarStore, write_ipc, write_ipc_batches
+
+
+class SpillCache:
+    """Converted uploads on disk: an Arrow IPC file plus a pickled sidecar per key.
+
+    Files are memory-mapped on read. Once the directory grows past max_bytes the
+    least recently used entries (by modification time) are removed. Sidecars are
+    unpickled, so the cache is disabled unless the directory is private to this user.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        try:
+            self.enabled = private_directory(directory)
+        except OSError:
+            self.enabled = False
+
+    def _check_enabled(self):
+        if not self.enabled:
+            raise PermissionError(f"{self.directory} is not private to this user; spilling is disabled")
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + '.arrow', base + '.meta.pkl'
+
+    def get(self, key):
+        """(store, sidecar) for key, or None when it was never spilled or has been evicted"""
+        if not self.enabled:
+            return None
+        table_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'rb') as f:
+                sidecar = pickle.load(f)
+            store = ColumnarStore(table_path)
+        except (OSError, EOFError, pickle.UnpicklingError, pa.ArrowInvalid):
+            return None
+        os.utime(table_path)
+        os.utime(meta_path)
+        return store, sidecar
+
+    def _write_sidecar(self, meta_path, sidecar):
+        tmp_path = meta_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(sidecar, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, meta_path)
+
+    def put(self, key, table, sidecar):
+        """Write table and sidecar for key and return the memory-mapped store"""
+        self._check_enabled()
+        table_path, meta_path = self._paths(key)
+        write_ipc(table, table_path)
+        self._write_sidecar(meta_path, sidecar)
+        self._evict(keep=key)
+        return ColumnarStore(table_path)
+
+    def put_batches(self, key, schema, batches, describe):
+        """Stream record batches into the file for key, then store the sidecar describe(store)
+        derives from the memory-mapped result; returns (store, sidecar)"""
+        self._check_enabled()
+        table_path, meta_path = self._paths(key)
+        write_ipc_batches(schema, batches, table_path)
+        store = ColumnarStore(table_path)
+        sidecar = describe(store)
+        self._write_sidecar(meta_path, sidecar)
+        self._evict(keep=key)
+        return store, sidecar
+
+    def _evict(self, keep):
+        """Remove least recently used entries until the directory fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith('.arrow'):
+                    continue
+                key = name[:-len('.arrow')]
+                paths = self._paths(key)
+                try:
+                    size = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+                    entries.append((os.path.getmtime(paths[0]), key, size))
+                except OSError:
+                    continue
+            total = sum(size for _, _, size in entries)
+            for _, key, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if key == keep:
+                    continue
+                for path in self._paths(key):
+                    try:
+                        # Sessions still mapping the file keep their view until they drop it
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+from utils.column_profile import profile_frame
+from utils.memory_optimizer import optimize_dtypes
+from utils.row_hash import row_hashes
+from utils.type_inference import infer_feature_types
+
+
+class ReservoirSample:
+    """Uniform fixed-size row sample over a stream of DataFrame chunks (Algorithm R)"""
+
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.seen = 0
+        self.rows = None
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, chunk):
+        n = len(chunk)
+        if self.rows is None:
+            self.rows = chunk.iloc[0:0]
+
+        # Fill the reservoir first
+        fill = min(max(self.size - len(self.rows), 0), n)
+        if fill:
+            self.rows = pd.concat([self.rows, chunk.iloc[:fill]], ignore_index=True)
+
+        # Each later row i replaces a random slot with probability size / (i + 1)
+        if fill < n:
+            positions = np.arange(self.seen + fill, self.seen + n)
+            slots = self._rng.integers(0, positions + 1)
+            accepted = np.flatnonzero(slots < self.size)
+            if accepted.size:
+                # Several rows may hit the same slot; the last one wins
+                slots = slots[accepted][::-1]
+                _, first = np.unique(slots, return_index=True)
+                winners = accepted[::-1][first] + fill
+                keep = np.ones(len(self.rows), dtype=bool)
+                keep[slots[first]] = False
+                self.rows = pd.concat([self.rows[keep], chunk.iloc[winners]], ignore_index=True)
+
+        self.seen += n
+
+
+class _DuplicateCounter:
+    """Count duplicate rows across chunks from sorted 64-bit row hashes"""
+
+    def __init__(self):
+        self.duplicates = 0
+        self._seen = np.empty(0, dtype=np.uint64)
+
+    def add(self, chunk):
+        hashes = row_hashes(chunk)
+        unique = np.unique(hashes)
+        self.duplicates += len(hashes) - len(unique)
+
+        if self._seen.size:
+            idx = np.searchsorted(self._seen, unique).clip(max=self._seen.size - 1)
+            known = self._seen[idx] == unique
+            self.duplicates += int(known.sum())
+            unique = unique[~known]
+        self._seen = np.sort(np.concatenate([self._seen, unique]), kind='stable')
+
+
+def _merge_kind(current, series):
+    """Combine the dtype kind seen so far for a column with a new chunk"""
+    if pd.api.types.is_bool_dtype(series):
+        kind = 'bool'
+    elif pd.api.types.is_integer_dtype(series):
+        kind = 'int'
+    elif pd.api.types.is_float_dtype(series):
+        kind = 'float'
+    else:
+        kind = 'object'
+    if current is None or current == kind:
+        return kind
+    if {current, kind} == {'int', 'float'}:
+        return 'float'
+    return 'object'
+
+
+def _scale_to_file(column, strings, present, rows):
+    """Turn a numeric profile of the sample into one for the whole file, given the file's
+    profile of the same column as strings and the sample's non-missing strings.
+
+    Missing values are the file's plus its share of strings the sample could not parse.
+    Mean, spread and quartiles stay estimates from the sample: the quartiles are reported
+    as sampled and the distinct count as inexact.
+    """
+    unparsed = (present - column.count) / present if present else 0.0
+    column.count = strings.count - int(round(strings.count * unparsed))
+    column.nulls = rows - column.count
+    column.sketch.population = column.count
+    column.quartiles = {}
+    column.distinct = max(column.distinct, strings.distinct)
+    column.distinct_exact = False
+    # Its HyperLogLog saw only the sample
+    column.hll = None
+
+
+def stream_csv(source, chunksize, sample_size):
+    """Read a CSV in chunks and build the loader's feature lists, metadata and stats in one pass.
+
+    Memory is bounded by the chunk size, the reservoir sample, the per-column
+    profiles and the row hashes needed to count duplicates. The returned 'data'
+    is the reservoir sample while 'profile' covers every row of the file.
+    """
+    sample = ReservoirSample(sample_size)
+    duplicates = _DuplicateCounter()
+    columns = None
+    kinds = {}
+    profile = None
+    missing_values = 0
+    memory_usage = 0
+
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        if columns is None:
+            columns = chunk.columns.tolist()
+
+        for col in columns:
+            kinds[col] = _merge_kind(kinds.get(col), chunk[col])
+        # Numeric columns keep their frequencies too, in case a later chunk parses them as
+        # strings, until they have too many distinct values to track
+        tracked = columns if profile is None else [col for col in columns if profile[col].exact]
+        chunk_profile = profile_frame(chunk, numeric_counts=tracked)
+        profile = chunk_profile if profile is None else profile.merge(chunk_profile)
+
+        missing_values += int(chunk.isnull().sum().sum())
+        memory_usage += chunk.memory_usage(deep=True, index=False).sum()
+        duplicates.add(chunk)
+        sample.add(chunk)
+
+    if columns is None:
+        raise ValueError("The uploaded CSV file contains no rows")
+
+    rows = sample.seen
+    data = sample.rows
+    for col in columns:
+        # Chunks that parsed a column differently are reconciled in the sample
+        if kinds[col] == 'float':
+            data[col] = pd.to_numeric(data[col], errors='coerce').astype('float64')
+        elif kinds[col] == 'object' and data[col].dtype != object:
+            data[col] = data[col].astype(object)
+
+    # Segregate features on the sample, from the reconciled dtypes
+    numerical_features, categorical_features, text_features, inferences, conversions = infer_feature_types(data)
+    present = {col: int(data[col].notna().sum()) for col in conversions}
+    for col, values in conversions.items():
+        data[col] = values
+    if conversions:
+        # Chunks profiled these columns as strings, so their numeric stats come from the sample
+        converted = profile_frame(data, list(conversions)).columns
+        if rows > len(data):
+            for col, column in converted.items():
+                _scale_to_file(column, profile[col], present[col], rows)
+        profile.columns.update(converted)
+
+    data = optimize_dtypes(data, numerical_features, categorical_features, text_features)
+    sample_memory = data.memory_usage(deep=True, index=False).sum()
+
+    metadata = {
+        'rows': rows,
+        'columns': len(columns),
+        'duplicates': duplicates.duplicates,
+        'missing_values': missing_values,
+        'memory_usage': memory_usage / (1024 * 1024),  # MB
+        # Full-file size with optimized dtypes, extrapolated from the sample
+        'memory_usage_optimized': sample_memory * rows / max(len(data), 1) / (1024 * 1024),
+        'numerical_cols': len(numerical_features),
+        'categorical_cols': len(categorical_features),
+        'text_cols': len(text_features),
+        'inferred_types': {col: inference.as_dict() for col, inference in inferences.items()},
+        'sampled': rows > len(data),
+        'sample_rows': len(data)
+    }
+
+    return {
+        'data': data,
+        'numerical_features': numerical_features,
+        'categorical_features': categorical_features,
+        'text_features': text_features,
+        'metadata': metadata,
+        'profile': profile,
+        'descriptive_stats': profile.describe(),
+        # The sample is hashed on first use; the duplicate count above covers the whole file
+        'row_hashes': None
+    }
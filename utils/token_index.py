@@ -0,0 +1,79 @@
+import re
+import numpy as np
+import pandas as pd
+from config import TOKEN_INDEX_CACHE_MAX_ENTRIES
+from utils.cache import LRUCache
+
+TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)*")
+
+_index_cache = LRUCache(max_entries=TOKEN_INDEX_CACHE_MAX_ENTRIES)
+
+
+class TokenIndex:
+    """Lower-cased tokens of a text column as integer ids into a shared vocabulary.
+
+    Tokens of row r are ids[offsets[r]:offsets[r + 1]]. Word counts, top words,
+    word-cloud frequencies and n-grams are all derived from these arrays.
+    """
+
+    def __init__(self, vocab, ids, offsets):
+        self.vocab = vocab
+        self.ids = ids
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, texts):
+        tokens = texts.str.lower().str.findall(TOKEN_PATTERN)
+        lengths = tokens.str.len().to_numpy(dtype=np.int64)
+        flat = [token for row in tokens for token in row]
+        codes, vocab = pd.factorize(pd.Series(flat, dtype=object))
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(np.asarray(vocab, dtype=object), codes.astype(np.int32), offsets)
+
+    @property
+    def rows(self):
+        return len(self.offsets) - 1
+
+    def row_lengths(self):
+        return np.diff(self.offsets)
+
+    def row_ids(self):
+        """Row number of every token"""
+        return np.repeat(np.arange(self.rows), self.row_lengths())
+
+    def vocab_mask(self, stop_words=(), min_len=1, max_len=None, alpha_only=True):
+        """Boolean mask over the vocabulary selecting the words to keep"""
+        words = pd.Series(self.vocab, dtype=object)
+        lengths = words.str.len()
+        mask = (lengths >= min_len) & ~words.isin(stop_words)
+        if max_len is not None:
+            mask &= lengths <= max_len
+        if alpha_only:
+            mask &= words.str.isalpha()
+        return mask.to_numpy()
+
+    def frequencies(self):
+        return np.bincount(self.ids, minlength=len(self.vocab))
+
+    def top_words(self, k, mask):
+        counts = np.where(mask, self.frequencies(), 0)
+        k = min(k, int((counts > 0).sum()))
+        top = np.argpartition(-counts, k - 1)[:k] if k else np.empty(0, dtype=np.int64)
+        top = top[np.argsort(-counts[top], kind='stable')]
+        return [(self.vocab[i], int(counts[i])) for i in top]
+
+    def word_frequencies(self, mask):
+        """Frequencies for WordCloud.generate_from_frequencies"""
+        counts = self.frequencies()
+        keep = np.flatnonzero(mask & (counts > 0))
+        return dict(zip(self.vocab[keep], counts[keep].tolist()))
+
+
+def get_token_index(texts, cache_key):
+    """Build the token index for a text column once and reuse it across reruns and sessions"""
+    index = _index_cache.get(cache_key)
+    if index is None:
+        index = TokenIndex.build(texts)
+        _index_cache.put(cache_key, index)
+    return index
@@ -0,0 +1,232 @@
+import math
+import re
+import numpy as np
+import pandas as pd
+from config import INFERENCE_SAMPLE_ROWS, INFERENCE_MIN_CONFIDENCE
+from utils.sketches import HyperLogLog, hash_values
+
+# Share of rows with distinct values, and mean value length, above which a column is text
+TEXT_UNIQUE_RATIO = 0.3
+TEXT_MEAN_LENGTH = 30
+
+# Share of non-missing values that must parse for a column to be numbers or dates stored as strings
+NUMERIC_PARSE_RATIO = 0.99
+DATETIME_PARSE_RATIO = 0.95
+DATETIME_PROBE_ROWS = 500
+
+# Distinct share above which a whitespace-free or id-named column is an identifier
+ID_UNIQUE_RATIO = 0.99
+ID_NAME = re.compile(r'(?:^|[_\s-])[iI][dD]$|[a-z](?:Id|ID)$')
+
+BOOLEAN_TOKENS = {'true', 'false', 'yes', 'no', 't', 'f', 'y', 'n'}
+
+# Numbers whose commas can only be thousands separators
+THOUSANDS_PATTERN = re.compile(r'[+-]?\d{1,3}(?:,\d{3})+(?:\.\d+)?$')
+
+# Feature list each inferred kind goes to; datetimes and identifiers are left out of the analysis tabs
+FEATURE_OF_KIND = {
+    'numerical': 'numerical', 'numeric_string': 'numerical',
+    'categorical': 'categorical', 'boolean': 'categorical',
+    'text': 'text', 'datetime': None, 'id': None
+}
+
+# Rows hashed per block before the HyperLogLog estimate is checked against the threshold
+HLL_BLOCK_ROWS = 100000
+
+
+class ColumnInference:
+    """Inferred kind of one column, how sure the sample was, and whether the full column was read"""
+
+    def __init__(self, name, kind, confidence, full_scan=False):
+        self.name = name
+        self.kind = kind
+        self.confidence = confidence
+        self.full_scan = full_scan
+
+    def as_dict(self):
+        return {'kind': self.kind, 'confidence': round(float(self.confidence), 4), 'full_scan': self.full_scan}
+
+
+def _confidence(z):
+    """Two-sided normal confidence for a decision z standard errors from its threshold"""
+    return math.erf(z / math.sqrt(2)) if np.isfinite(z) else 1.0
+
+
+def stratified_positions(rows, size, strata=10, seed=0):
+    """Row positions drawn uniformly within equal blocks of the frame, so sorted or grouped
+    files are represented from start to end"""
+    if rows <= size:
+        return np.arange(rows)
+    rng = np.random.default_rng(seed)
+    bounds = np.linspace(0, rows, strata + 1).astype(np.int64)
+    takes = np.diff(np.linspace(0, size, strata + 1).astype(np.int64))
+    return np.sort(np.concatenate([
+        lo + rng.choice(hi - lo, size=take, replace=False)
+        for lo, hi, take in zip(bounds[:-1], bounds[1:], takes)
+    ]))
+
+
+def _sample_cardinality(sample, population, rows):
+    """(above TEXT_UNIQUE_RATIO?, distinct ratio, confidence) from the sample's repeat structure.
+
+    Distinct values in the full column are estimated with the bias-corrected Chao1
+    estimator from singletons and doubletons; its relative error shrinks with the
+    number of doubletons.
+    """
+    counts = sample.value_counts()
+    if len(sample) >= population:
+        ratio = len(counts) / rows if rows else 0.0
+        return ratio > TEXT_UNIQUE_RATIO, ratio, 1.0
+    f1 = int((counts == 1).sum())
+    f2 = int((counts == 2).sum())
+    distinct = min(len(counts) + f1 * (f1 - 1) / (2 * (f2 + 1)), population)
+    ratio = distinct / rows
+    z = abs(math.log(ratio / TEXT_UNIQUE_RATIO)) * math.sqrt(f2 + 1)
+    return ratio > TEXT_UNIQUE_RATIO, ratio, _confidence(z)
+
+
+def _full_cardinality(series, rows):
+    """(above TEXT_UNIQUE_RATIO?, distinct ratio) from a HyperLogLog fed block by block.
+
+    Stops as soon as the estimate is clearly past the threshold; only an estimate
+    within the sketch's error of the threshold falls back to an exact nunique().
+    """
+    threshold = TEXT_UNIQUE_RATIO * rows
+    hll = HyperLogLog()
+    margin = 3 * hll.relative_error
+    values = series.dropna()
+    for start in range(0, len(values), HLL_BLOCK_ROWS):
+        hll.add_hashes(hash_values(values.iloc[start:start + HLL_BLOCK_ROWS]))
+        if hll.count() > threshold * (1 + margin):
+            return True, hll.count() / rows
+    if hll.count() < threshold * (1 - margin):
+        return False, hll.count() / rows
+    distinct = values.nunique()
+    return distinct > threshold, distinct / rows
+
+
+def _string_lengths(values):
+    """Length of each value's string form, converting only values that are not strings already"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        lengths = values.cat.categories.astype(str).str.len().to_numpy()
+        return pd.Series(lengths[values.cat.codes.to_numpy()], index=values.index)
+    try:
+        lengths = values.str.len()
+    except AttributeError:
+        return values.astype(str).str.len()
+    other = lengths.isna()
+    if other.any():
+        lengths[other] = values[other].astype(str).str.len()
+    return lengths
+
+
+def _sample_length(sample, population):
+    """(mean length above TEXT_MEAN_LENGTH?, confidence) from the sample mean and its standard error"""
+    lengths = _string_lengths(sample).astype(float)
+    mean = lengths.mean() if len(lengths) else 0.0
+    if len(sample) >= population:
+        return mean > TEXT_MEAN_LENGTH, 1.0
+    se = lengths.std(ddof=1) / math.sqrt(len(lengths)) if len(lengths) > 1 else 0.0
+    z = abs(mean - TEXT_MEAN_LENGTH) / se if se > 0 else math.inf
+    return mean > TEXT_MEAN_LENGTH, _confidence(z)
+
+
+def parse_numbers(values):
+    """Numbers from strings with surrounding spaces and comma thousands separators; other values,
+    including decimal commas such as "1,5" and lists such as "3,4", become NaN"""
+    strings = values.astype(str).str.strip()
+    grouped = strings.str.match(THOUSANDS_PATTERN)
+    strings = strings.where(~grouped, strings.str.replace(',', '', regex=False))
+    return pd.to_numeric(strings, errors='coerce')
+
+
+def _infer_numeric(series, name, sample):
+    """Numeric dtype columns are numerical unless they look like a row identifier"""
+    if (pd.api.types.is_integer_dtype(series) and ID_NAME.search(str(name))
+            and len(sample) and sample.is_unique):
+        return ColumnInference(name, 'id', 1.0 if len(sample) == series.count() else 0.99)
+    return ColumnInference(name, 'numerical', 1.0)
+
+
+def _infer_strings(series, name, sample, rows, min_confidence):
+    """Boolean, number, date, identifier, text or categorical for an object or category column.
+
+    Returns the inference and, for numbers stored as strings, the parsed column.
+    """
+    population = int(series.count())
+    if population == 0:
+        return ColumnInference(name, 'categorical', 1.0), None
+
+    strings = sample.astype(str)
+    tokens = set(strings.str.strip().str.lower().unique())
+    if len(tokens) <= 2 and tokens <= BOOLEAN_TOKENS:
+        # Few distinct values, so confirming on the whole column is cheap
+        full = set(series.value_counts().index.astype(str).str.strip().str.lower())
+        if full <= BOOLEAN_TOKENS:
+            return ColumnInference(name, 'boolean', 1.0, full_scan=True), None
+
+    if parse_numbers(sample).notna().mean() >= NUMERIC_PARSE_RATIO:
+        parsed = parse_numbers(series.dropna())
+        parsed_ratio = parsed.notna().mean()
+        if parsed_ratio >= NUMERIC_PARSE_RATIO:
+            return (ColumnInference(name, 'numeric_string', parsed_ratio, full_scan=True),
+                    parsed.reindex(series.index))
+
+    # Date parsing is per value, so only a probe of digit-bearing columns is parsed
+    if strings.str.contains(r'\d').mean() >= DATETIME_PARSE_RATIO:
+        probe = strings.iloc[:DATETIME_PROBE_ROWS]
+        date_ratio = pd.to_datetime(probe, errors='coerce', format='mixed').notna().mean()
+        if date_ratio >= DATETIME_PARSE_RATIO:
+            return ColumnInference(name, 'datetime', date_ratio), None
+
+    full_scan = False
+    high, ratio, confidence = _sample_cardinality(sample, population, rows)
+    if confidence < min_confidence:
+        high, ratio = _full_cardinality(series, rows)
+        confidence, full_scan = 1.0, True
+    if high:
+        no_spaces = not strings.str.contains(r'\s').any()
+        if ratio >= ID_UNIQUE_RATIO and (no_spaces or ID_NAME.search(str(name))):
+            return ColumnInference(name, 'id', confidence, full_scan), None
+        return ColumnInference(name, 'text', confidence, full_scan), None
+
+    long_values, length_confidence = _sample_length(sample, population)
+    if length_confidence < min_confidence:
+        long_values = _string_lengths(series.dropna()).mean() > TEXT_MEAN_LENGTH
+        length_confidence, full_scan = 1.0, True
+    kind = 'text' if long_values else 'categorical'
+    return ColumnInference(name, kind, min(confidence, length_confidence), full_scan), None
+
+
+def infer_feature_types(data, sample_rows=INFERENCE_SAMPLE_ROWS, min_confidence=INFERENCE_MIN_CONFIDENCE, seed=0):
+    """Classify every column from a stratified row sample, reading the full column only when
+    the sample's confidence is below min_confidence.
+
+    Returns the numerical, categorical and text feature lists, the ColumnInference
+    per column, and parsed Series for columns holding numbers as strings.
+    """
+    rows = len(data)
+    positions = stratified_positions(rows, sample_rows, seed=seed)
+    inferences = {}
+    conversions = {}
+    for col in data.columns:
+        series = data[col]
+        sample = series.iloc[positions].dropna()
+        if pd.api.types.is_bool_dtype(series):
+            inference = ColumnInference(col, 'boolean', 1.0)
+        elif pd.api.types.is_numeric_dtype(series):
+            inference = _infer_numeric(series, col, sample)
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            inference = ColumnInference(col, 'datetime', 1.0)
+        else:
+            inference, converted = _infer_strings(series, col, sample, rows, min_confidence)
+            if converted is not None:
+                conversions[col] = converted
+        inferences[col] = inference
+
+    features = {'numerical': [], 'categorical': [], 'text': []}
+    for col, inference in inferences.items():
+        feature = FEATURE_OF_KIND[inference.kind]
+        if feature is not None:
+            features[feature].append(col)
+    return features['numerical'], features['categorical'], features['text'], inferences, conversions